@@ -0,0 +1,317 @@
+import ast
+import operator
+import re
+from functools import lru_cache
+from typing import Any
+
+MAX_EXPRESSION_LENGTH = 1000
+MAX_SEQUENCE_LENGTH = 100000
+
+
+class ExpressionError(ValueError):
+    """Raised for expressions that are invalid or fail to evaluate."""
+
+
+def _multiply(left: Any, right: Any) -> Any:
+    for sequence, times in ((left, right), (right, left)):
+        if (
+            isinstance(sequence, str | list)
+            and isinstance(times, int)
+            and len(sequence) * times > MAX_SEQUENCE_LENGTH
+        ):
+            raise ExpressionError("Result of the expression is too large")
+    return operator.mul(left, right)
+
+
+def _modulo(left: Any, right: Any) -> Any:
+    # `%` on a string is printf-style formatting, which can pad to any width.
+    if not (isinstance(left, int | float) and isinstance(right, int | float)):
+        raise ExpressionError("% is only supported between numbers")
+    return operator.mod(left, right)
+
+
+def _check_size(length: int) -> None:
+    if length > MAX_SEQUENCE_LENGTH:
+        raise ExpressionError("Result of the expression is too large")
+
+
+def _text_size(value: Any) -> int:
+    """
+    Lower bound of the length of `str(value)`, counted without building it
+    and stopping once it exceeds MAX_SEQUENCE_LENGTH.
+    """
+    size, stack = 0, [value]
+    while stack and size <= MAX_SEQUENCE_LENGTH:
+        item = stack.pop()
+        if isinstance(item, str):
+            size += len(item) + 2
+        elif isinstance(item, dict):
+            size += 2 + 4 * len(item)
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, list | tuple | set):
+            size += 2 + 2 * len(item)
+            stack.extend(item)
+        else:
+            size += 8
+    return size
+
+
+def _to_str(value: Any) -> str:
+    """`str(value)`, refusing values whose text would be too large."""
+    if not isinstance(value, str):
+        _check_size(_text_size(value))
+    return str(value)
+
+
+def _call_string_method(target: str, name: str, args: list) -> Any:
+    """Call a string method, refusing calls whose result would be too large."""
+    if name == "replace" and len(args) >= 2 and all(isinstance(a, str) for a in args[:2]):
+        old, new = args[0], args[1]
+        count = target.count(old) if old else len(target) + 1
+        if len(args) > 2 and isinstance(args[2], int) and args[2] >= 0:
+            count = min(count, args[2])
+        _check_size(len(target) + count * (len(new) - len(old)))
+    elif name == "join" and args and isinstance(args[0], list | tuple | str):
+        items = args[0]
+        lengths = sum(len(item) for item in items if isinstance(item, str))
+        _check_size(lengths + len(target) * max(len(items) - 1, 0))
+    return getattr(target, name)(*args)
+
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: _multiply,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: _modulo,
+}
+
+_UNARY_OPERATORS = {
+    ast.Not: operator.not_,
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+}
+
+_COMPARE_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+    ast.In: lambda a, b: a in b,
+    ast.NotIn: lambda a, b: a not in b,
+    ast.Is: operator.is_,
+    ast.IsNot: operator.is_not,
+}
+
+FUNCTIONS = {
+    "len": len,
+    "any": any,
+    "all": all,
+    "str": _to_str,
+    "int": int,
+    "float": float,
+    "bool": bool,
+    "min": min,
+    "max": max,
+    "sorted": sorted,
+    "lower": lambda value: _to_str(value).lower(),
+    "upper": lambda value: _to_str(value).upper(),
+}
+
+STRING_METHODS = {
+    "startswith",
+    "endswith",
+    "lower",
+    "upper",
+    "strip",
+    "split",
+    "replace",
+    "join",
+}
+
+_TEMPLATE = re.compile(r"{{\s*(.+?)\s*}}")
+
+_ALLOWED_NODES = (
+    ast.Expression,
+    ast.BoolOp,
+    ast.And,
+    ast.Or,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Compare,
+    ast.IfExp,
+    ast.Call,
+    ast.Constant,
+    ast.Name,
+    ast.Load,
+    ast.Attribute,
+    ast.Subscript,
+    ast.Slice,
+    ast.List,
+    ast.Tuple,
+    ast.Dict,
+    *_BINARY_OPERATORS,
+    *_UNARY_OPERATORS,
+    *_COMPARE_OPERATORS,
+)
+
+
+@lru_cache(maxsize=512)
+def compile_expression(expression: str) -> ast.Expression:
+    """
+    Parse an expression, rejecting anything outside the supported subset:
+    literals, names, `.key` and `[index]` access, arithmetic, comparisons,
+    boolean logic, conditionals and calls to the allowed functions.
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError("Expression is too long")
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ExpressionError(f"Invalid expression: {e.msg}") from e
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS:
+                continue
+            if isinstance(node.func, ast.Attribute) and node.func.attr in STRING_METHODS:
+                continue
+            raise ExpressionError("Only the allowed functions can be called")
+        if isinstance(node, ast.Attribute) and node.attr.startswith("_"):
+            raise ExpressionError("Private attributes are not accessible")
+        if not isinstance(node, _ALLOWED_NODES):
+            raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+    return tree
+
+
+def evaluate(expression: str, variables: dict[str, Any]) -> Any:
+    """
+    Evaluate an expression over `variables`. Missing keys and indexes
+    evaluate to None instead of failing, so `payload.ref == "main"` is
+    simply false when the payload has no `ref`.
+    """
+    tree = compile_expression(expression)
+    try:
+        return _eval(tree.body, variables)
+    except ExpressionError:
+        raise
+    except Exception as e:
+        raise ExpressionError(f"Failed to evaluate {expression!r}: {e}") from e
+
+
+def _get(value: Any, key: Any) -> Any:
+    if isinstance(value, dict):
+        return value.get(key)
+    if isinstance(value, list | tuple | str) and isinstance(key, int | slice):
+        try:
+            return value[key]
+        except IndexError:
+            return None
+    return None
+
+
+def _eval(node: ast.AST, variables: dict[str, Any]) -> Any:
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.Name):
+        if node.id in variables:
+            return variables[node.id]
+        if node.id in FUNCTIONS:
+            return FUNCTIONS[node.id]
+        raise ExpressionError(f"Unknown name: {node.id}")
+    if isinstance(node, ast.Attribute):
+        return _get(_eval(node.value, variables), node.attr)
+    if isinstance(node, ast.Subscript):
+        return _get(_eval(node.value, variables), _eval(node.slice, variables))
+    if isinstance(node, ast.Slice):
+        return slice(
+            *(_eval(part, variables) if part else None for part in (node.lower, node.upper, node.step))
+        )
+    if isinstance(node, ast.BoolOp):
+        if isinstance(node.op, ast.And):
+            result = True
+            for value in node.values:
+                result = _eval(value, variables)
+                if not result:
+                    return result
+            return result
+        result = False
+        for value in node.values:
+            result = _eval(value, variables)
+            if result:
+                return result
+        return result
+    if isinstance(node, ast.UnaryOp):
+        return _UNARY_OPERATORS[type(node.op)](_eval(node.operand, variables))
+    if isinstance(node, ast.BinOp):
+        return _BINARY_OPERATORS[type(node.op)](
+            _eval(node.left, variables), _eval(node.right, variables)
+        )
+    if isinstance(node, ast.Compare):
+        left = _eval(node.left, variables)
+        for op, comparator in zip(node.ops, node.comparators, strict=False):
+            right = _eval(comparator, variables)
+            if not _COMPARE_OPERATORS[type(op)](left, right):
+                return False
+            left = right
+        return True
+    if isinstance(node, ast.IfExp):
+        if _eval(node.test, variables):
+            return _eval(node.body, variables)
+        return _eval(node.orelse, variables)
+    if isinstance(node, ast.List | ast.Tuple):
+        return [_eval(item, variables) for item in node.elts]
+    if isinstance(node, ast.Dict):
+        return {
+            _eval(key, variables): _eval(value, variables)
+            for key, value in zip(node.keys, node.values, strict=False)
+        }
+    if isinstance(node, ast.Call):
+        args = [_eval(arg, variables) for arg in node.args]
+        if isinstance(node.func, ast.Attribute):
+            target = _eval(node.func.value, variables)
+            if not isinstance(target, str):
+                raise ExpressionError(f"{node.func.attr}() can only be called on strings")
+            return _call_string_method(target, node.func.attr, args)
+        return FUNCTIONS[node.func.id](*args)
+    raise ExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+
+def render_template(template: Any, variables: dict[str, Any]) -> Any:
+    """
+    Render a JSON template. A string that is a single `{{ expression }}` is
+    replaced by the value of the expression; expressions embedded in longer
+    strings are interpolated as text. Dicts and lists are rendered recursively.
+    """
+    if isinstance(template, dict):
+        return {key: render_template(value, variables) for key, value in template.items()}
+    if isinstance(template, list):
+        return [render_template(item, variables) for item in template]
+    if not isinstance(template, str):
+        return template
+    match = _TEMPLATE.fullmatch(template.strip())
+    if match:
+        return evaluate(match.group(1), variables)
+    return _TEMPLATE.sub(
+        lambda m: _to_text(evaluate(m.group(1), variables)), template
+    )
+
+
+def validate_template(template: Any) -> None:
+    """Compile every expression of a JSON template, raising ExpressionError."""
+    if isinstance(template, dict):
+        for value in template.values():
+            validate_template(value)
+    elif isinstance(template, list):
+        for item in template:
+            validate_template(item)
+    elif isinstance(template, str):
+        for expression in _TEMPLATE.findall(template):
+            compile_expression(expression)
+
+
+def _to_text(value: Any) -> str:
+    return "" if value is None else _to_str(value)
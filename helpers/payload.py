@@ -0,0 +1,102 @@
+import copy
+from typing import Any
+
+_MISSING = object()
+
+
+def get_path(data: Any, path: str, default: Any = None) -> Any:
+    """
+    Resolve a dotted path (e.g. `repository.name` or `commits.0.id`) in nested data.
+
+    When a list is reached and the next segment is not an index, the rest of
+    the path is resolved for every item (e.g. `commits.message`).
+    """
+    value = _resolve(data, path.split(".") if path else [])
+    return default if value is _MISSING else value
+
+
+def _resolve(data: Any, segments: list[str]) -> Any:
+    if not segments:
+        return data
+    head, rest = segments[0], segments[1:]
+    if isinstance(data, dict):
+        if head not in data:
+            return _MISSING
+        return _resolve(data[head], rest)
+    if isinstance(data, list):
+        if head.lstrip("-").isdigit():
+            index = int(head)
+            if -len(data) <= index < len(data):
+                return _resolve(data[index], rest)
+            return _MISSING
+        values = [_resolve(item, segments) for item in data]
+        return [value for value in values if value is not _MISSING]
+    return _MISSING
+
+
+def _project(data: Any, segments: list[str]) -> Any:
+    if not segments:
+        # Copied so that merging projections never mutates the payload.
+        return copy.deepcopy(data)
+    head, rest = segments[0], segments[1:]
+    if isinstance(data, dict):
+        if head not in data:
+            return _MISSING
+        value = _project(data[head], rest)
+        return _MISSING if value is _MISSING else {head: value}
+    if isinstance(data, list):
+        if not head.lstrip("-").isdigit():
+            return [_project(item, segments) for item in data]
+        index = int(head)
+        if -len(data) <= index < len(data):
+            # Keep the list, with the item at its position, so that other
+            # paths into the same list merge item by item.
+            value = _project(data[index], rest)
+            if value is _MISSING:
+                return _MISSING
+            projected = [_MISSING] * len(data)
+            projected[index] = value
+            return projected
+    return _MISSING
+
+
+def _merge(target: Any, value: Any) -> Any:
+    if value is _MISSING:
+        return target
+    if isinstance(target, dict) and isinstance(value, dict):
+        for key, item in value.items():
+            target[key] = _merge(target[key], item) if key in target else item
+        return target
+    if isinstance(target, list) and isinstance(value, list):
+        return [
+            _merge(old, new) for old, new in zip(target, value, strict=False)
+        ]
+    return value
+
+
+def project_payload(payload: dict | None, fields: list[str] | None) -> dict:
+    """
+    Keep only the given dotted `fields` of a payload, preserving its nesting.
+
+    Paths that cross a list are applied to every item, so `commits.message`
+    keeps a list of commits holding only their message, while `commits.0.id`
+    keeps a list with only the first commit. The payload is not modified;
+    without fields it is returned unchanged.
+    """
+    if not payload or not fields:
+        return payload or {}
+    projected: dict = {}
+    for field in fields:
+        value = _project(payload, field.split("."))
+        if value is _MISSING:
+            continue
+        projected = _merge(projected, value)
+    return _strip_missing(projected)
+
+
+def _strip_missing(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {k: _strip_missing(v) for k, v in data.items() if v is not _MISSING}
+    if isinstance(data, list):
+        return [_strip_missing(item) for item in data if item is not _MISSING]
+    return data
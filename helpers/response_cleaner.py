@@ -1,3 +1,5 @@
+import json
+
 
 def clean_response(response):
     """
@@ -15,3 +17,70 @@ def clean_response(response):
     response = response.strip().replace("\n", " ").replace("\r", " ")
     response = response.replace("```json", "").replace("```", "")
     return response.strip() if isinstance(response, str) else str(response).strip()
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+_decoder = json.JSONDecoder(strict=False)
+
+
+def _close_truncated(text):
+    """
+    Close the strings, objects and arrays left open by a truncated JSON text.
+
+    Args:
+        text (str): JSON text starting with `{` or `[`.
+
+    Returns:
+        str: The text with its open structures closed.
+    """
+    stack = []
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(_CLOSERS[char])
+        elif char in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",:")
+    return text + "".join(reversed(stack))
+
+
+def parse_json_response(response):
+    """
+    Parses the JSON value of a model response, tolerating code fences,
+    text around the JSON, raw newlines inside strings and truncated output.
+
+    Args:
+        response (str or None): The response to parse.
+
+    Returns:
+        dict or list or None: The first JSON object or array found, or None.
+    """
+    if not response:
+        return None
+    text = response.replace("```json", "").replace("```", "").strip()
+    starts = [i for i, char in enumerate(text) if char in _CLOSERS]
+    for start in starts:
+        try:
+            value, _ = _decoder.raw_decode(text, start)
+            return value
+        except json.JSONDecodeError:
+            continue
+    if not starts:
+        return None
+    try:
+        value, _ = _decoder.raw_decode(_close_truncated(text[starts[0]:]))
+        return value
+    except json.JSONDecodeError:
+        return None
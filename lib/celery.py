@@ -24,4 +24,22 @@ celery_app.conf.update(
     enable_utc=True,
     worker_concurrency=WORKER_CONCURRENCY,  # Adjust based on your server capacity
     broker_connection_retry_on_startup=True,
+    beat_schedule={
+        "purge-expired-payloads": {
+            "task": "payloads.purge",
+            "schedule": 60 * 60,  # Every hour
+        },
+        "schedule-workflow-runs": {
+            "task": "workflows.schedule",
+            "schedule": 30,  # Every 30 seconds
+        },
+        "requeue-deferred-webhooks": {
+            "task": "webhooks.requeue_deferred",
+            "schedule": 60,  # Every minute
+        },
+        "deliver-email-outbox": {
+            "task": "emails.deliver_outbox",
+            "schedule": 30,  # Every 30 seconds
+        },
+    },
 )
@@ -0,0 +1,36 @@
+from lib.cache import get_cache
+
+GLOBAL_SCOPE = "global"
+
+
+def _metrics_key(scope: str) -> str:
+    return f"metrics_{scope}"
+
+
+def org_scope(org_id: int) -> str:
+    """Metrics scope of an organization."""
+    return f"org_{org_id}"
+
+
+def increment(name: str, amount: int = 1, org_id: int | None = None) -> None:
+    """
+    Increment a counter globally and, when given, for an organization.
+    """
+    cache = get_cache()
+    pipeline = cache.pipeline()
+    pipeline.hincrby(_metrics_key(GLOBAL_SCOPE), name, amount)
+    if org_id is not None:
+        pipeline.hincrby(_metrics_key(org_scope(org_id)), name, amount)
+    pipeline.execute()
+
+
+def get_metrics(org_id: int | None = None) -> dict[str, int]:
+    """
+    Return all counters of an organization, or the global ones.
+    """
+    scope = org_scope(org_id) if org_id is not None else GLOBAL_SCOPE
+    raw = get_cache().hgetall(_metrics_key(scope))
+    return {
+        (k.decode("utf-8") if isinstance(k, bytes) else k): int(v)
+        for k, v in raw.items()
+    }
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from datetime import UTC, datetime, timedelta
+from functools import lru_cache
+from pathlib import Path
+
+PAYLOAD_STORE_BACKEND = os.getenv("PAYLOAD_STORE_BACKEND", "gridfs")
+PAYLOAD_STORE_PATH = os.getenv("PAYLOAD_STORE_PATH", ".payloads")
+PAYLOAD_STORE_TTL = int(os.getenv("PAYLOAD_STORE_TTL_SECONDS", 60 * 60 * 24 * 7))
+# Size of the copy of a payload kept on its input log, readable after expiry.
+PAYLOAD_PREVIEW_BYTES = int(os.getenv("PAYLOAD_PREVIEW_BYTES", 4096))
+
+
+def serialize_payload(payload: dict | bytes) -> bytes:
+    """
+    Canonical bytes of a payload: sorted keys and compact separators so that
+    equal payloads always hash to the same key.
+    """
+    if isinstance(payload, bytes):
+        return payload
+    return json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), default=str
+    ).encode("utf-8")
+
+
+def payload_key(data: bytes) -> str:
+    """Return the content address (sha256 hex digest) of serialized payload bytes."""
+    return hashlib.sha256(data).hexdigest()
+
+
+def payload_preview(payload: dict | None, max_bytes: int = PAYLOAD_PREVIEW_BYTES) -> dict | str:
+    """
+    Bounded copy of a payload for its input log: the payload itself when it
+    fits in `max_bytes`, otherwise its JSON truncated to that size.
+    """
+    data = serialize_payload(payload or {})
+    if len(data) <= max_bytes:
+        return payload or {}
+    return data[:max_bytes].decode("utf-8", errors="ignore") + "..."
+
+
+class PayloadStore(ABC):
+    """Content-addressed storage for workflow input payloads."""
+
+    def __init__(self, ttl: int = PAYLOAD_STORE_TTL):
+        self.ttl = ttl
+
+    def put(self, payload: dict | bytes) -> str:
+        """
+        Store a payload and return its hash key. Storing identical content
+        again only refreshes its expiration.
+        """
+        data = serialize_payload(payload)
+        key = payload_key(data)
+        if not self._touch(key):
+            self._write(key, data)
+        return key
+
+    def get(self, key: str) -> dict | None:
+        """Return the payload stored under `key`, or None if missing or expired."""
+        data = self._read(key)
+        if data is None:
+            return None
+        return json.loads(data)
+
+    @abstractmethod
+    def _touch(self, key: str) -> bool:
+        """Refresh the expiration of an existing entry. Returns False if missing."""
+
+    @abstractmethod
+    def _write(self, key: str, data: bytes) -> None:
+        """Write a new entry."""
+
+    @abstractmethod
+    def _read(self, key: str) -> bytes | None:
+        """Read an entry's bytes."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Delete an entry."""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed."""
+
+
+class LocalPayloadStore(PayloadStore):
+    """Payload store on the local disk, expiring entries by modification time."""
+
+    def __init__(self, root: str | Path = PAYLOAD_STORE_PATH, ttl: int = PAYLOAD_STORE_TTL):
+        super().__init__(ttl=ttl)
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _expired(self, path: Path) -> bool:
+        return path.stat().st_mtime + self.ttl < time.time()
+
+    def _touch(self, key: str) -> bool:
+        path = self._path(key)
+        if not path.exists():
+            return False
+        path.touch()
+        return True
+
+    def _write(self, key: str, data: bytes) -> None:
+        # Write to a temporary file first so readers never see partial content.
+        with tempfile.NamedTemporaryFile(dir=self.root, delete=False) as tmp:
+            tmp.write(data)
+        os.replace(tmp.name, self._path(key))
+
+    def _read(self, key: str) -> bytes | None:
+        path = self._path(key)
+        if not path.exists() or self._expired(path):
+            return None
+        return path.read_bytes()
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def purge_expired(self) -> int:
+        removed = 0
+        for path in self.root.glob("*.json"):
+            if self._expired(path):
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
+
+
+class GridFSPayloadStore(PayloadStore):
+    """Payload store on MongoDB GridFS, using the hash key as the file id."""
+
+    def __init__(self, bucket: str = "payloads", ttl: int = PAYLOAD_STORE_TTL):
+        import gridfs
+
+        from lib.mongo import db
+
+        super().__init__(ttl=ttl)
+        self.fs = gridfs.GridFS(db, collection=bucket)
+        self.files = db[f"{bucket}.files"]
+
+    def _expires_at(self) -> datetime:
+        return datetime.now(UTC) + timedelta(seconds=self.ttl)
+
+    def _touch(self, key: str) -> bool:
+        result = self.files.update_one(
+            {"_id": key}, {"$set": {"expiresAt": self._expires_at()}}
+        )
+        return result.matched_count > 0
+
+    def _write(self, key: str, data: bytes) -> None:
+        import gridfs
+
+        try:
+            self.fs.put(data, _id=key, expiresAt=self._expires_at())
+        except gridfs.errors.FileExists:
+            # Stored concurrently by another process; content is identical.
+            self._touch(key)
+
+    def _read(self, key: str) -> bytes | None:
+        document = self.files.find_one({"_id": key}, {"expiresAt": 1})
+        if not document:
+            return None
+        expires_at = document.get("expiresAt")
+        if expires_at and expires_at.replace(tzinfo=UTC) < datetime.now(UTC):
+            return None
+        return self.fs.get(key).read()
+
+    def delete(self, key: str) -> None:
+        self.fs.delete(key)
+
+    def purge_expired(self) -> int:
+        expired = self.files.find(
+            {"expiresAt": {"$lt": datetime.now(UTC)}}, {"_id": 1}
+        )
+        removed = 0
+        for document in expired:
+            self.fs.delete(document["_id"])
+            removed += 1
+        return removed
+
+
+@lru_cache(maxsize=1)
+def get_payload_store() -> PayloadStore:
+    """Get the configured payload store (`gridfs` or `local`)."""
+    if PAYLOAD_STORE_BACKEND == "local":
+        return LocalPayloadStore()
+    return GridFSPayloadStore()
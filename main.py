@@ -20,6 +20,7 @@ from models.response.auth import AuthResponse
 from models.user import UserCreate
 from routes.api import api_router
 from services import user_service
+from services.workflows.tasks import validate_task_templates
 
 origins = os.getenv("CORS_ORIGINS", "*").split(",")
 print(f"Origins: {origins}")
@@ -41,6 +42,7 @@ async def lifespan(app: FastAPI):
         decode_responses=True,
     )
     await FastAPILimiter.init(redis_connection)
+    validate_task_templates()
     yield
     mongo_client.close()
     logger.info("Shutting down")
@@ -0,0 +1,25 @@
+from datetime import datetime
+from enum import Enum
+
+from pydantic import BaseModel
+
+
+class AgentJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
+class AgentJob(BaseModel):
+    id: str
+    org_id: int
+    agent: str
+    conversation_id: str
+    status: AgentJobStatus = AgentJobStatus.QUEUED
+    response: str | None = None
+    error: str | None = None
+    callback_url: str | None = None
+    started_at: datetime | None = None
+    created_at: datetime
+    updated_at: datetime
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field
+from urllib.parse import urlparse
+
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class ContentConfig(BaseModel):
@@ -21,3 +23,40 @@ class ContentConfig(BaseModel):
 class AgentProcess(BaseModel):
     agent: str = "multi"
     text: str
+    conversation_id: str | None = Field(
+        default=None,
+        max_length=128,
+        pattern=r"^[A-Za-z0-9_-]+$",
+        description="Id of the conversation to continue. A new one is started if not given.",
+    )
+    stream: bool = Field(
+        default=False,
+        description="Stream the progress of the response as Server-Sent Events.",
+    )
+    background: bool = Field(
+        default=False,
+        description="Run the agent in a background job and return its id.",
+    )
+    callback_url: str | None = Field(
+        default=None,
+        max_length=2048,
+        description="URL the job result is posted to when a background job finishes.",
+    )
+
+    @field_validator("callback_url")
+    @classmethod
+    def validate_callback_url(cls, value: str | None) -> str | None:
+        if value is None:
+            return value
+        url = urlparse(value)
+        if url.scheme not in ("http", "https") or not url.hostname:
+            raise ValueError("callback_url must be an http(s) URL")
+        return value
+
+    @model_validator(mode="after")
+    def validate_mode(self):
+        if self.stream and self.background:
+            raise ValueError("stream and background cannot be used together")
+        if self.callback_url and not self.background:
+            raise ValueError("callback_url requires background")
+        return self
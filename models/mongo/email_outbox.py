@@ -0,0 +1,33 @@
+from datetime import datetime
+from enum import Enum
+
+from pydantic import BaseModel
+
+from .mongo_base import MongoModel
+
+
+class EmailStatus(str, Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+class EmailOutboxBase(BaseModel):
+    to: str
+    subject: str = ""
+    html: str = ""
+    text: str = ""
+    from_email: str | None = None
+    kind: str | None = None  # e.g. signup_validation, org_invite
+    status: EmailStatus = EmailStatus.PENDING
+    attempts: int = 0
+    next_attempt_at: datetime | None = None
+    lease_id: str | None = None  # Claim of the worker sending it
+    lease_until: datetime | None = None
+    provider_id: str | None = None
+    last_error: str | None = None
+
+
+class EmailOutbox(MongoModel, EmailOutboxBase):
+    _collection_name = "emailOutbox"
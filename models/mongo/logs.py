@@ -17,6 +17,10 @@ class LogBase(BaseModel):
     agent: str | None = None
     embeddings: list[int] | None = []
     source_id: ObjectId | None = None
+    prompt_tokens: int | None = None
+    payload_ref: str | None = None  # Hash key of the input payload in the payload store
+    cache_hit: bool | None = None  # Result reused from the node result cache
+    delivery_id: str | None = None  # Webhook delivery that created the input log
 
 class LogOutput(BaseModel):
     id: ObjectId
@@ -25,8 +29,34 @@ class LogOutput(BaseModel):
     data: dict[str, Any] | str | list[dict[str, Any]] | None = {}
     source: ObjectId | str = None
     source_event: dict[str, Any] | None = None
+    prompt_tokens: int | None = None
+    payload_ref: str | None = None
+    cache_hit: bool | None = None
     createdAt: datetime = None
 
+    @classmethod
+    def from_document(cls, log: dict) -> "LogOutput":
+        """
+        Build the output of a log document as stored in the logs collection.
+        """
+        return cls(
+            id=str(log["_id"]),
+            agent=log["agent"],
+            type=log["type"],
+            data=log["data"],
+            source=log["source"],
+            source_event=json.loads(
+                json.dumps(log.get("source_event", [])[0], default=str)
+            )
+            if log.get("source_event")
+            else None,
+            prompt_tokens=log.get("prompt_tokens"),
+            payload_ref=log.get("payload_ref"),
+            cache_hit=log.get("cache_hit"),
+            createdAt=log["createdAt"],
+            updatedAt=log["updatedAt"],
+        )
+
 
 class Log(MongoModel, LogBase):
     _collection_name = "logs"
@@ -1,7 +1,8 @@
 from enum import Enum
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator, model_validator
 
+from helpers.expressions import compile_expression, validate_template
 from utils.object_id import ObjectId
 
 from .mongo_base import MongoModel
@@ -13,6 +14,11 @@ class EventType(str, Enum):
     MANUAL_PROMPT = "manual_prompt"
 
 
+class NodeType(str, Enum):
+    CONDITION = "condition"  # Continue the chain only if `condition` holds
+    TRANSFORM = "transform"  # Render `mapping` as the node result
+
+
 class FlowBase(BaseModel):
     organizationId: int
     is_head: bool | None = False
@@ -26,6 +32,16 @@ class FlowBase(BaseModel):
 class WorkflowBase(FlowBase):
     agent: str | None = ""
     prompt: str | None = ""
+    payload_fields: list[str] | None = None  # Dotted paths of the payload to keep
+    coalesce_window_seconds: int | None = None  # Merge events arriving within the window
+    timeout_seconds: int | None = None  # Cancel the node's model call after this
+    hedge: bool | None = None  # Send a duplicate model call when slower than p95
+    cache_ttl_seconds: int | None = None  # Reuse results of identical prompts for this long
+    cache_version: int | None = 0  # Bumped on changes to invalidate cached results
+    structured_output: bool | None = None  # Constrain the answer to a JSON schema (no tools)
+    node_type: NodeType | None = None  # Rule node run without the model
+    condition: str | None = None  # Expression over payload, context and last
+    mapping: dict | None = None  # JSON template with {{ expression }} values
 
 
 class WorkflowTaskBase(FlowBase):
@@ -38,6 +54,40 @@ class CreateWorkFlow(BaseModel):
     is_head: bool = False
     events: list[EventType] = []
     agent: str
+    payload_fields: list[str] | None = None
+    coalesce_window_seconds: int | None = None
+    timeout_seconds: int | None = None
+    hedge: bool | None = None
+    cache_ttl_seconds: int | None = None
+    structured_output: bool | None = None
+
+
+class CreateWorkflowRule(BaseModel):
+    node_type: NodeType
+    is_head: bool = False
+    events: list[EventType] = []
+    condition: str | None = None
+    mapping: dict | None = None
+
+    @field_validator("condition")
+    def validate_condition(cls, v):
+        if v is not None:
+            compile_expression(v)
+        return v
+
+    @field_validator("mapping")
+    def validate_mapping(cls, v):
+        if v is not None:
+            validate_template(v)
+        return v
+
+    @model_validator(mode="after")
+    def validate_node_type(self):
+        if self.node_type == NodeType.CONDITION and not self.condition:
+            raise ValueError("Condition nodes require a condition")
+        if self.node_type == NodeType.TRANSFORM and self.mapping is None:
+            raise ValueError("Transform nodes require a mapping")
+        return self
 
 
 class CreateWorkflowTask(BaseModel):
@@ -48,11 +98,37 @@ class UpdateWorkflow(BaseModel):
     prompt: str | None = None
     agent: str | None = None
     events: list[EventType] | None = None
+    payload_fields: list[str] | None = None
+    coalesce_window_seconds: int | None = None
+    timeout_seconds: int | None = None
+    hedge: bool | None = None
+    cache_ttl_seconds: int | None = None
+    structured_output: bool | None = None
+    condition: str | None = None
+    mapping: dict | None = None
+    enabled: bool | None = None
+
+    @field_validator("condition")
+    def validate_condition(cls, v):
+        if v is not None:
+            compile_expression(v)
+        return v
+
+    @field_validator("mapping")
+    def validate_mapping(cls, v):
+        if v is not None:
+            validate_template(v)
+        return v
 
 
 class UpdateWorkflowTask(BaseModel):
     parameters: dict | None = {}
     task_template_id: ObjectId | None = None
+    enabled: bool | None = None
+
+
+class RunWorkflow(BaseModel):
+    payload: dict = {}  # Event the workflow is run with
 class Workflow(MongoModel, WorkflowBase, WorkflowTaskBase, FlowBase):
     _collection_name = "workflows"
     task: Task | None = None
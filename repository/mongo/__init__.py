@@ -1,5 +1,6 @@
 from .agent_repository import AgentRepository
 from .changelog_repository import ChangelogRepository
+from .email_outbox_repository import EmailOutboxRepository
 from .knowledge_repository import KnowledgeRepository
 from .logs_repository import LogsRepository
 from .out_repository import OutDocumentRepository
@@ -20,3 +21,4 @@ class Repository:
         self.workflow = WorkflowRepository()
         self.agent = AgentRepository()
         self.task = TaskRepository()
+        self.email_outbox = EmailOutboxRepository()
@@ -1,6 +1,10 @@
+from datetime import datetime
+
+from pymongo import UpdateOne
+
 from models.mongo.agents import Agent, AgentBase
 
-from .base import MongoRepository
+from .base import MongoRepository, tz_zone
 
 
 class AgentRepository(MongoRepository[Agent]):
@@ -19,3 +23,36 @@ class AgentRepository(MongoRepository[Agent]):
         if not agent:
             return None
         return agent
+
+    def get_agent_configs(self, org_id: int) -> dict[str, Agent]:
+        """
+        Returns every agent configuration of an organization by agent name.
+        """
+        if org_id is None:
+            raise ValueError("org_id is not set for the agent.")
+        return {agent.name: agent for agent in self.find({"organizationId": org_id})}
+
+    def create_defaults(self, agents: list[AgentBase]) -> None:
+        """
+        Creates the agent configurations that do not exist yet in a single
+        round trip. Existing configurations are left untouched.
+        """
+        if not agents:
+            return
+        _date = datetime.now(tz_zone)
+        self.bulk_write(
+            [
+                UpdateOne(
+                    {"organizationId": agent.organizationId, "name": agent.name},
+                    {
+                        "$setOnInsert": {
+                            **agent.model_dump(),
+                            "createdAt": _date,
+                            "updatedAt": _date,
+                        }
+                    },
+                    upsert=True,
+                )
+                for agent in agents
+            ]
+        )
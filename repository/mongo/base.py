@@ -41,6 +41,23 @@ class MongoRepository(BaseRepository[T]):
         inserted = self.collection_db.insert_one(data)
         return self.find_by_id(ObjectId(inserted.inserted_id))
 
+    def create_many(self, data: list[T | dict], options: dict = None) -> list[ObjectId]:
+        """Create several documents in a single round trip and return their ids."""
+        if options is None:
+            options = {}
+        if not data:
+            return []
+        _date = datetime.now(tz_zone)
+        documents = []
+        for item in data:
+            if isinstance(item, BaseModel):
+                item = item.model_dump(**options, exclude={"_id"})
+            item["createdAt"] = _date
+            item["updatedAt"] = _date
+            documents.append(item)
+        inserted = self.collection_db.insert_many(documents)
+        return [ObjectId(_id) for _id in inserted.inserted_ids]
+
     def find(self, query: dict, options: dict = None) -> list[T]:
         """Find documents matching the query."""
         if options is None:
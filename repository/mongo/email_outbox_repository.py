@@ -0,0 +1,114 @@
+import uuid
+from datetime import datetime, timedelta
+
+from models.mongo.email_outbox import EmailOutbox, EmailStatus
+
+from .base import MongoRepository, tz_zone
+
+
+class EmailOutboxRepository(MongoRepository[EmailOutbox]):
+    """Repository for the outbox of transactional emails."""
+
+    def __init__(self):
+        super().__init__(collection="emailOutbox", model=EmailOutbox)
+
+    def ensure_indexes(self) -> None:
+        """Indexes of the queries claiming due and expired emails."""
+        self.collection_db.create_index([("status", 1), ("next_attempt_at", 1)])
+        self.collection_db.create_index([("status", 1), ("lease_until", 1)])
+        self.collection_db.create_index("lease_id")
+
+    def claim_batch(self, limit: int, lease_seconds: int) -> list[EmailOutbox]:
+        """
+        Claim up to `limit` emails due for delivery. Emails left in `sending`
+        by a worker that died are claimed again once their lease expires.
+        Candidates are leased with a single update, and only the emails that
+        carry this claim's lease id are returned, so concurrent workers never
+        share an email.
+        """
+        now = datetime.now(tz_zone)
+        due = {
+            "$or": [
+                {"status": EmailStatus.PENDING.value, "next_attempt_at": None},
+                {"status": EmailStatus.PENDING.value, "next_attempt_at": {"$lte": now}},
+                {"status": EmailStatus.SENDING.value, "lease_until": {"$lte": now}},
+            ]
+        }
+        candidates = [
+            document["_id"]
+            for document in self.collection_db.find(due, {"_id": 1})
+            .sort("createdAt", 1)
+            .limit(limit)
+        ]
+        if not candidates:
+            return []
+        lease_id = uuid.uuid4().hex
+        self.collection_db.update_many(
+            {"$and": [{"_id": {"$in": candidates}}, due]},
+            {
+                "$set": {
+                    "status": EmailStatus.SENDING.value,
+                    "lease_id": lease_id,
+                    "lease_until": now + timedelta(seconds=lease_seconds),
+                    "updatedAt": now,
+                }
+            },
+        )
+        return [
+            self.model(**document)
+            for document in self.collection_db.find({"lease_id": lease_id}).sort(
+                "createdAt", 1
+            )
+        ]
+
+    def mark_sent(self, email_id, provider_id: str | None, attempts: int) -> None:
+        self.collection_db.update_one(
+            {"_id": email_id},
+            {
+                "$set": {
+                    "status": EmailStatus.SENT.value,
+                    "provider_id": provider_id,
+                    "attempts": attempts,
+                    "lease_id": None,
+                    "lease_until": None,
+                    "last_error": None,
+                    "updatedAt": datetime.now(tz_zone),
+                }
+            },
+        )
+
+    def mark_failed(
+        self, email_id, error: str, attempts: int, retry_at: datetime | None
+    ) -> None:
+        """Schedule a retry at `retry_at`, or give up if it is None."""
+        self.collection_db.update_one(
+            {"_id": email_id},
+            {
+                "$set": {
+                    "status": (
+                        EmailStatus.PENDING.value if retry_at else EmailStatus.FAILED.value
+                    ),
+                    "next_attempt_at": retry_at,
+                    "attempts": attempts,
+                    "lease_id": None,
+                    "lease_until": None,
+                    "last_error": error,
+                    "updatedAt": datetime.now(tz_zone),
+                }
+            },
+        )
+
+    def release(self, email_ids: list) -> None:
+        """Return claimed emails to the queue without counting an attempt."""
+        if not email_ids:
+            return
+        self.collection_db.update_many(
+            {"_id": {"$in": email_ids}, "status": EmailStatus.SENDING.value},
+            {
+                "$set": {
+                    "status": EmailStatus.PENDING.value,
+                    "lease_id": None,
+                    "lease_until": None,
+                }
+            },
+        )
@@ -1,6 +1,11 @@
-from models.mongo.logs import Log
+from datetime import datetime
 
-from .base import MongoRepository
+from pymongo import UpdateOne
+
+from models.mongo.logs import Log, LogBase
+from utils.object_id import ObjectId
+
+from .base import MongoRepository, tz_zone
 
 
 class LogsRepository(MongoRepository[Log]):
@@ -9,6 +14,40 @@ class LogsRepository(MongoRepository[Log]):
     def __init__(self):
         super().__init__(collection="logs", model=Log)
 
+    def upsert_by_delivery(self, logs: list[LogBase]) -> list[ObjectId]:
+        """
+        Create the logs of webhook deliveries in a single round trip, keyed
+        by `delivery_id`: a delivery processed again reuses its existing log.
+        Returns the log ids in the order of `logs`.
+        """
+        if not logs:
+            return []
+        _date = datetime.now(tz_zone)
+        self.bulk_write(
+            [
+                UpdateOne(
+                    {"organizationId": log.organizationId, "delivery_id": log.delivery_id},
+                    {
+                        "$setOnInsert": {
+                            **log.model_dump(),
+                            "createdAt": _date,
+                            "updatedAt": _date,
+                        }
+                    },
+                    upsert=True,
+                )
+                for log in logs
+            ]
+        )
+        ids = {
+            (document["organizationId"], document["delivery_id"]): ObjectId(document["_id"])
+            for document in self.collection_db.find(
+                {"delivery_id": {"$in": [log.delivery_id for log in logs]}},
+                {"_id": 1, "organizationId": 1, "delivery_id": 1},
+            )
+        }
+        return [ids[(log.organizationId, log.delivery_id)] for log in logs]
+
     def get_by_organization_id(
         self, organization_id: int, limit: int = 20, page: int = 1
     ) -> tuple[list[Log], int, int]:
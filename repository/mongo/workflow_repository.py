@@ -45,6 +45,19 @@ class WorkflowRepository(MongoRepository[Workflow]):
         workflows = [self.model(**doc) for doc in raw_cursor]
         return workflows
 
+    def get_head_workflow_routes(self, org_id: int) -> list[dict]:
+        """Get the routing fields of the enabled head workflows of an organization."""
+        return list(
+            self.collection_db.find(
+                {"organizationId": org_id, "is_head": True, "enabled": True},
+                {"_id": 1, "events": 1, "coalesce_window_seconds": 1},
+            )
+        )
+
+    def get_head_workflow_org_ids(self) -> list[int]:
+        """Get the ids of all organizations that have head workflows."""
+        return self.collection_db.distinct("organizationId", {"is_head": True})
+
     def get_workflow_nodes(self, workflow_id: str) -> list[Workflow]:
         """Get workflow nodes by workflow ID."""
         pipeline = pipeline = [
@@ -177,6 +190,15 @@ class WorkflowRepository(MongoRepository[Workflow]):
             return
         self.delete_many({"_id": {"$in": workflows_ids}})
 
+    def bump_cache_version(self, node_ids: list[ObjectId | str]) -> None:
+        """Invalidate the cached results of nodes by bumping their version."""
+        if not node_ids:
+            return
+        self.collection_db.update_many(
+            {"_id": {"$in": [ObjectId(node_id) for node_id in node_ids]}},
+            {"$inc": {"cache_version": 1}},
+        )
+
     def get_with_task(
         self,
         workflow_id: str,
@@ -1,20 +1,29 @@
+import asyncio
 import json
 
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from loguru import logger
+from sse_starlette.sse import EventSourceResponse
 
 from helpers.auth import user_is_authenticated
+from lib import metrics
 from lib.cache import get_cache
 from middleware.org_middleware import (
     validate_org_middleware,
     validate_user_verified_middleware,
 )
+from models.agent_job import AgentJob
 from models.inputs.agent import AgentProcess
 from models.mongo.agents import AgentOutput, AgentUpdate
 from models.response.api import Response
 from models.user import UserRead
 from repository import repository
 from services.agents import AgentCaller, get_available_agents
+from services.agents.jobs import create_job, get_job
+from services.agents.limiter import get_llm_limiter
+from services.agents.pool import get_agent_pool, invalidate_agent
 
 cache = get_cache()
 
@@ -27,7 +36,7 @@ EXP_FIVE_MINUTES = 60 * 5  # Cache expiration time in seconds
 @validate_user_verified_middleware
 @validate_org_middleware
 async def list_agents(org_id: int, user: UserRead = Depends(user_is_authenticated)):
-    agents = get_available_agents(exclude="multi_agent")
+    agents = get_available_agents(include_orchestrators=False)
     return {
         "data": agents,
     }
@@ -37,15 +46,29 @@ async def list_agents(org_id: int, user: UserRead = Depends(user_is_authenticate
 @validate_user_verified_middleware
 @validate_org_middleware
 async def process_agent(
-    data: AgentProcess, user: UserRead = Depends(user_is_authenticated)
+    org_id: int, data: AgentProcess, user: UserRead = Depends(user_is_authenticated)
 ):
-    agent_caller = AgentCaller.create(org_id=data.org_id, agent=data.agent)
+    if data.background:
+        try:
+            job = create_job(org_id=org_id, data=data)
+        except Exception as e:
+            logger.error(f"Error queuing agent job: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Error queuing agent job: {str(e)}",
+            ) from e
+        return JSONResponse(status_code=202, content=jsonable_encoder({"data": job}))
+    agent_caller = AgentCaller.create(
+        org_id=org_id, agent=data.agent, session_id=data.conversation_id
+    )
     if not agent_caller:
-        logger.error(f"Agent {data.agent} not found for org_id {data.org_id}")
+        logger.error(f"Agent {data.agent} not found for org_id {org_id}")
         raise HTTPException(
             status_code=400,
-            detail=f"Agent {data.agent} not found for org_id {data.org_id}",
+            detail=f"Agent {data.agent} not found for org_id {org_id}",
         )
+    if data.stream:
+        return EventSourceResponse(_stream_agent(agent_caller, data.text))
     try:
         response = await agent_caller.generate(text=data.text)
         if not response:
@@ -53,7 +76,7 @@ async def process_agent(
                 status_code=500,
                 detail="No response generated by the agent.",
             )
-        return {"response": response}
+        return {"response": response, "conversation_id": agent_caller.id}
     except Exception as e:
         logger.error(f"Error processing agent: {str(e)}")
         raise HTTPException(
@@ -62,6 +85,65 @@ async def process_agent(
         ) from e
 
 
+async def _stream_agent(agent_caller: AgentCaller, text: str):
+    """
+    Server-Sent Events of an agent run. The run is cancelled when the client
+    disconnects, so abandoned generations stop consuming the model.
+    """
+    try:
+        async for chunk in agent_caller.stream(text):
+            yield {"event": chunk["type"], "data": json.dumps(chunk)}
+    except asyncio.CancelledError:
+        logger.info(
+            f"Client disconnected, cancelled agent run of org_id {agent_caller.org_id}"
+        )
+        metrics.increment("agent_streams_cancelled", org_id=agent_caller.org_id)
+        raise
+    except Exception as e:
+        logger.error(f"Error streaming agent: {str(e)}")
+        yield {"event": "error", "data": json.dumps({"type": "error", "detail": str(e)})}
+
+
+@agents_router.get("/{org_id}/limits", response_model=Response[dict])
+@validate_user_verified_middleware
+@validate_org_middleware
+async def get_agent_limits(org_id: int, user: UserRead = Depends(user_is_authenticated)):
+    try:
+        return {
+            "data": get_llm_limiter().get_limits(org_id=org_id),
+        }
+    except Exception as e:
+        logger.error(f"Error getting model call limits: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@agents_router.get("/{org_id}/pool", response_model=Response[dict])
+@validate_user_verified_middleware
+@validate_org_middleware
+async def get_agent_pool_stats(org_id: int, user: UserRead = Depends(user_is_authenticated)):
+    try:
+        return {
+            "data": get_agent_pool().get_stats(org_id=org_id),
+        }
+    except Exception as e:
+        logger.error(f"Error getting agent pool stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@agents_router.get("/{org_id}/jobs/{job_id}", response_model=Response[AgentJob])
+@validate_user_verified_middleware
+@validate_org_middleware
+async def get_agent_job(
+    org_id: int, job_id: str, user: UserRead = Depends(user_is_authenticated)
+):
+    job = get_job(org_id=org_id, job_id=job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Agent job {job_id} not found")
+    return {
+        "data": job,
+    }
+
+
 @agents_router.get("/{org_id}/{agent_name}", response_model=Response[AgentOutput])
 @validate_user_verified_middleware
 @validate_org_middleware
@@ -126,14 +208,15 @@ async def update_agent(
     update_data: AgentUpdate = None,
 ):
     agent_name = agent_name.lower().strip()
-    agent_name = f"{agent_name.capitalize()}Agent"
     updated_agent = repository.mongo.agent.update(
         query={
             "organizationId": org_id,
-            "name": agent_name,
+            "name": f"{agent_name.capitalize()}Agent",
         },
         update_data=update_data,
     )
+    invalidate_agent(org_id, agent_name)
+    cache.delete(f"agent_config_{org_id}_{agent_name}")
     return {
         "data": updated_agent,
     }
@@ -1,30 +1,60 @@
-from fastapi import APIRouter, HTTPException, Request
+import os
+
+from fastapi import APIRouter, HTTPException, Request, status
 from loguru import logger
 
-from models.mongo.workflow import EventType
-from repository import repository
-from services.workflows import WorkflowService
+from lib import metrics
+from services.webhook_service.idempotency import (
+    claim_delivery,
+    idempotency_key,
+    release_delivery,
+)
+from services.webhook_service.resolver import resolve_org_id
+from services.webhook_service.stream import DEFERRED_STREAM, enqueue_delivery
+from services.workflows.backpressure import check_admission
+
+# What to do with deliveries while the workflow queue is saturated:
+# "reject" answers 429 with Retry-After, "defer" parks them in a deferred stream.
+SHED_MODE = os.getenv("WEBHOOK_SHED_MODE", "reject")
 
 git_router = APIRouter()
 
 
-@git_router.post("/{webhook_id}", status_code=200)
+@git_router.post("/{webhook_id}", status_code=status.HTTP_202_ACCEPTED)
 async def handle_git_webhook(webhook_id: str, request: Request):
-    try:
-        # Process the webhook data
-        data = await request.json()
-        # Here you would typically process the data, e.g., update a database, trigger a build, etc.
-        # For now, we just log it
-        logger.info(f"Received webhook for {webhook_id}: {data}")
-        webhook = await repository.sql.input_webhook.get_by_key(webhook_id)
-        if not webhook:
-            logger.error(f"Webhook with ID {webhook_id} not found.")
-            raise HTTPException(status_code=404, detail="Webhook not found.")
-        logger.info(f"Webhook {webhook_id} found: {webhook}")
-        workflow_service = WorkflowService(
-            org_id=webhook.org_id, event=EventType.GIT_WEBHOOK.value
+    org_id = await resolve_org_id(webhook_id)
+    if org_id is None:
+        logger.error(f"Webhook with ID {webhook_id} not found.")
+        raise HTTPException(status_code=404, detail="Webhook not found.")
+    body = await request.body()
+    delivery = idempotency_key(request.headers, body)
+    if not claim_delivery(webhook_id, delivery):
+        logger.info(f"Skipping duplicate delivery {delivery} for webhook {webhook_id}")
+        metrics.increment("webhook_duplicates_suppressed", org_id=org_id)
+        return {"data": {"status": "duplicate", "delivery": delivery}}
+    admission = check_admission(org_id)
+    if not admission.admitted and SHED_MODE != "defer":
+        release_delivery(webhook_id, delivery)
+        logger.warning(f"Shedding webhook {webhook_id} delivery: {admission.reason}")
+        metrics.increment("webhook_deliveries_shed", org_id=org_id)
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=admission.reason,
+            headers={"Retry-After": str(admission.retry_after)},
         )
-        workflow_service.run(payload=data)
+    try:
+        if not admission.admitted:
+            enqueue_delivery(
+                webhook_id, org_id, delivery, request.headers, body, stream=DEFERRED_STREAM
+            )
+            logger.warning(f"Deferring webhook {webhook_id} delivery: {admission.reason}")
+            metrics.increment("webhook_deliveries_deferred", org_id=org_id)
+            return {"data": {"status": "deferred", "delivery": delivery}}
+        entry_id = enqueue_delivery(webhook_id, org_id, delivery, request.headers, body)
+        logger.info(f"Queued webhook {webhook_id} delivery {delivery} as {entry_id}")
+        metrics.increment("webhook_deliveries_accepted", org_id=org_id)
+        return {"data": {"status": "accepted", "delivery": delivery}}
     except Exception as e:
-        logger.error(f"Error processing webhook {webhook_id}: {str(e)}")
+        release_delivery(webhook_id, delivery)
+        logger.error(f"Error queueing webhook {webhook_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e)) from e
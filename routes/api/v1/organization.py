@@ -4,6 +4,8 @@ from loguru import logger
 
 from helpers.auth import user_is_authenticated
 from helpers.webhook import generate_webhook_id
+from lib import metrics
+from lib.payload_store import get_payload_store
 from middleware.org_middleware import (
     validate_org_middleware,
     validate_user_verified_middleware,
@@ -21,8 +23,12 @@ from services.organization_service import (
     resend_invite_to_org,
     send_invite_to_org,
 )
+from services.webhook_service.resolver import invalidate_webhook_key
+from services.webhook_service.stream import deferred_depth
+from services.workflows.backpressure import get_inflight, queue_depth
+from services.workflows.scheduler import pending_runs
 from shared.roles import RoleEnum
-import json
+from utils.object_id import ObjectId
 
 organization_router = APIRouter()
 
@@ -44,6 +50,7 @@ async def create_webhook_input(
         webhook = await repository.sql.input_webhook.create(
             {**data.model_dump(), "org_id": org_id, "key": webhook_id}
         )
+        invalidate_webhook_key(webhook_id)
         return {
             "data": webhook,
         }
@@ -65,7 +72,11 @@ async def delete_webhook_input(
     try:
         # Here you would typically process the data, e.g., update a database, trigger a build, etc.
         # For now, we just log it
-        await repository.sql.input_webhook.delete({"id": webhook_id})
+        query = {"id": webhook_id}
+        webhook = await repository.sql.input_webhook.find_one(query)
+        await repository.sql.input_webhook.delete(query)
+        if webhook:
+            invalidate_webhook_key(webhook.key)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -99,6 +110,34 @@ async def get_webhook_inputs(
         logger.error(e)
         raise HTTPException(status_code=500, detail=str(e)) from e
 
+@organization_router.get(
+    "/{org_id}/webhook/metrics",
+    response_model=Response[dict[str, int]],
+)
+@validate_user_verified_middleware
+@validate_org_middleware
+async def get_webhook_metrics(
+    org_id: int,
+    user: UserRead = Depends(user_is_authenticated),
+):
+    try:
+        return {
+            "data": {
+                **metrics.get_metrics(org_id=org_id),
+                "queue_depth": queue_depth(),
+                "deferred_depth": deferred_depth(),
+                "inflight_runs": get_inflight(org_id),
+                **{
+                    f"pending_runs_{lane}": count
+                    for lane, count in pending_runs(org_id).items()
+                },
+            },
+        }
+    except Exception as e:
+        logger.error(e)
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
 @organization_router.post(
     "/{org_id}/invite",
     status_code=status.HTTP_201_CREATED,
@@ -277,20 +316,7 @@ async def get_organization_logs(
             organization_id=org_id, page=page, limit=limit
         )
         logs = [
-            LogOutput(
-                id=str(log["_id"]),
-                agent=log["agent"],
-                type=log["type"],
-                data=log["data"],
-                source=log["source"],
-                source_event=json.loads(
-                    json.dumps(log.get("source_event", [])[0], default=str)
-                )
-                if log.get("source_event")
-                else None,
-                createdAt=log["createdAt"],
-                updatedAt=log["updatedAt"],
-            )
+            LogOutput.from_document(log)
             for log in logs
         ]
         return {
@@ -302,3 +328,33 @@ async def get_organization_logs(
         logger.exception(e)
         logger.error(e)
         raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@organization_router.get(
+    "/{org_id}/logs/{log_id}/payload",
+    response_model=Response[dict],
+)
+@validate_user_verified_middleware
+@validate_org_middleware
+async def get_log_payload(
+    org_id: int,
+    log_id: str,
+    user: UserRead = Depends(user_is_authenticated),
+):
+    log = repository.mongo.logs.find_by_id(log_id) if ObjectId.is_valid(log_id) else None
+    if not log or log.organizationId != org_id:
+        raise HTTPException(status_code=404, detail="Log not found")
+    if not log.payload_ref:
+        raise HTTPException(status_code=404, detail="Log has no stored payload")
+    try:
+        payload = get_payload_store().get(log.payload_ref)
+    except Exception as e:
+        logger.error(f"Error loading payload {log.payload_ref}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e)) from e
+    if payload is None:
+        raise HTTPException(
+            status_code=404, detail="The payload of this log has expired"
+        )
+    return {
+        "data": payload,
+    }
@@ -13,7 +13,10 @@ from middleware.workflow_middleware import validate_workflow_middleware
 from models.mongo.task import TaskCreate, TaskOutput
 from models.mongo.workflow import (
     CreateWorkFlow,
+    CreateWorkflowRule,
     CreateWorkflowTask,
+    EventType,
+    RunWorkflow,
     UpdateWorkflow,
     UpdateWorkflowTask,
     Workflow,
@@ -21,6 +24,10 @@ from models.mongo.workflow import (
 from models.response.api import Response
 from models.user import UserRead
 from repository import repository
+from services.workflows import WorkflowService
+from services.workflows.backpressure import check_admission
+from services.workflows.routing import rebuild_org_routes
+from services.workflows.tasks import validate_task
 from utils.object_id import ObjectId
 
 cache = get_cache()
@@ -62,6 +69,8 @@ async def create_workflow(
                 data={"next_flow": workflow.id},
             )
         cache.delete(f"workflow_last_node_{head_node}")
+        if workflow.is_head:
+            rebuild_org_routes(org_id)
         return {
             "data": workflow,
         }
@@ -80,6 +89,10 @@ async def create_workflow_task(
     head_node: str = None,
     user: UserRead = Depends(user_is_authenticated),
 ):
+    task_template = repository.mongo.task.find_by_id(data.task_template_id)
+    errors = validate_task(task_template) if task_template else ["Task template not found"]
+    if errors:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=errors)
     try:
         last_node = None
         if head_node:
@@ -114,6 +127,51 @@ async def create_workflow_task(
         raise HTTPException(status_code=500, detail=str(e)) from e
 
 
+@workflow_router.post("/{org_id}/workflow/rule", response_model=Response[Workflow])
+@validate_user_verified_middleware
+@validate_org_middleware
+async def create_workflow_rule(
+    org_id: int,
+    data: CreateWorkflowRule,
+    head_node: str = None,
+    user: UserRead = Depends(user_is_authenticated),
+):
+    try:
+        last_node = None
+        if head_node:
+            last_node: ObjectId = repository.mongo.workflow.get_last_node_id(
+                workflow_id=head_node
+            )
+            if not last_node:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="Head node not found"
+                )
+        workflow = repository.mongo.workflow.create(
+            {
+                **data.model_dump(),
+                "is_head": not bool(head_node),
+                "organizationId": org_id,
+                "created_by": user.id,
+                "enabled": True,
+                "next_flow": None,
+            }
+        )
+        if last_node:
+            repository.mongo.workflow.update_by_id(
+                id=last_node,
+                data={"next_flow": workflow.id},
+            )
+        cache.delete(f"workflow_last_node_{head_node}")
+        if workflow.is_head:
+            rebuild_org_routes(org_id)
+        return {
+            "data": workflow,
+        }
+    except Exception as e:
+        logger.error(f"Error creating workflow rule: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
 @workflow_router.post(
     "/task", status_code=status.HTTP_201_CREATED, response_model=Response[TaskOutput]
 )
@@ -123,6 +181,9 @@ async def create_task(
     data: TaskCreate,
     user: UserRead = Depends(user_is_authenticated),
 ):
+    errors = validate_task(data)
+    if errors:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=errors)
     try:
         task = repository.mongo.task.create(data=data)
         return {
@@ -207,7 +268,11 @@ async def update_workflow_node(
     user: UserRead = Depends(user_is_authenticated),
 ):
     try:
-        workflow = repository.mongo.workflow.update_by_id(id=node_id, data=data)
+        repository.mongo.workflow.update_by_id(id=node_id, data=data)
+        repository.mongo.workflow.bump_cache_version([node_id])
+        workflow = repository.mongo.workflow.find_by_id(node_id)
+        if workflow.is_head:
+            rebuild_org_routes(org_id)
         return {
             "data": workflow,
         }
@@ -265,6 +330,8 @@ async def delete_workflow_node(
             )
         repository.mongo.workflow.delete_by_id(id=node_id)
         cache.delete(f"workflow_last_node_{node_id}")
+        if current.is_head:
+            rebuild_org_routes(org_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) from e
 
@@ -293,5 +360,59 @@ async def delete_workflow(
             )
         repository.mongo.workflow.delete_workflow(workflow_id=workflow_id)
         cache.delete(f"workflow_last_node_{workflow_id}")
+        rebuild_org_routes(org_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@workflow_router.delete(
+    "/{org_id}/workflow/{workflow_id}/cache",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+@validate_user_verified_middleware
+@validate_org_middleware
+@validate_workflow_middleware
+async def invalidate_workflow_cache(
+    org_id: int,
+    workflow_id: str,
+    user: UserRead = Depends(user_is_authenticated),
+):
+    try:
+        nodes: list[Workflow] = repository.mongo.workflow.get_workflow_nodes(
+            workflow_id=workflow_id
+        )
+        repository.mongo.workflow.bump_cache_version([node.id for node in nodes])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e)) from e
+
+
+@workflow_router.post(
+    "/{org_id}/run/{workflow_id}",
+    status_code=status.HTTP_202_ACCEPTED,
+)
+@validate_user_verified_middleware
+@validate_org_middleware
+@validate_workflow_middleware
+async def run_workflow(
+    org_id: int,
+    workflow_id: str,
+    data: RunWorkflow,
+    user: UserRead = Depends(user_is_authenticated),
+):
+    admission = check_admission(org_id)
+    if not admission.admitted:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=admission.reason,
+            headers={"Retry-After": str(admission.retry_after)},
+        )
+    try:
+        log_id = WorkflowService(
+            org_id=org_id, event=EventType.MANUAL_PROMPT.value
+        ).trigger(workflow_id, data.payload)
+        return {
+            "data": {"status": "queued", "log_id": log_id},
+        }
     except Exception as e:
+        logger.error(f"Error running workflow {workflow_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e)) from e
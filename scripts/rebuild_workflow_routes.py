@@ -0,0 +1,34 @@
+"""
+Rebuild the Redis webhook routing tables of head workflows.
+
+Run from the project root:
+    python -m scripts.rebuild_workflow_routes [--org-id ORG_ID]
+"""
+
+import argparse
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from services.workflows.routing import (  # noqa: E402
+    rebuild_all_routes,
+    rebuild_org_routes,
+)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild workflow routing tables.")
+    parser.add_argument(
+        "--org-id",
+        type=int,
+        default=None,
+        help="Organization ID to rebuild (optional, defaults to all organizations)",
+    )
+    args = parser.parse_args()
+
+    if args.org_id is not None:
+        routes = rebuild_org_routes(args.org_id)
+        print(f"✅ Rebuilt routes for organization {args.org_id}: {routes}")
+    else:
+        total = rebuild_all_routes()
+        print(f"✅ Rebuilt routes for {total} organizations")
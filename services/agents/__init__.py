@@ -1,67 +1,93 @@
-import importlib
+import asyncio
+import json
 import os
-from datetime import datetime
-from pathlib import Path
+import uuid
 
 from google.adk.agents import LlmAgent
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.genai import types
 from loguru import logger
+from pydantic import BaseModel
 
-from .base import AgentBase
-from .helpers.common import snake_to_camel
+from lib import metrics
+
+from .base import DEFAULT_MODEL, AgentBase
+from .limiter import get_llm_limiter
+from .pool import get_agent_pool
+from .registry import get_agent_class, list_agents, load_agents
+from .sessions import RedisSessionService, get_session_service
 
 APP_NAME = os.getenv("APP_NAME", "roadflow")
 
 
-def get_available_agents(folder: Path = "", exclude: str = "") -> list[str]:
+def get_available_agents(include_orchestrators: bool = True) -> list[str]:
     """
-    Return a list of available agent names (without `_agent.py` suffix) from a folder.
+    Return the names of the registered agents.
 
     Args:
-        folder (Path): The folder path to scan for agent files.
-        exclude (str): Stem name to exclude (default is 'multi_agent').
+        include_orchestrators (bool): Whether to include agents that orchestrate
+            other agents (e.g. 'multi').
 
     Returns:
-        list[str]: List of agent names (without file extension).
+        list[str]: List of agent names.
     """
-    if not folder:
-        folder = Path(__file__).parent
-    return [
-        f.stem.replace("_agent", "")
-        for f in folder.glob("*_agent.py")
-        if f.is_file() and f.stem != exclude
-    ]
+    return [agent.name for agent in list_agents(include_orchestrators)]
 
 
 class AgentCaller:
-    def __init__(self, org_id: int, agent: LlmAgent = None):
+    def __init__(
+        self,
+        org_id: int,
+        agent: LlmAgent = None,
+        session_id: str | None = None,
+        session_service: RedisSessionService = None,
+        agent_name: str | None = None,
+        ephemeral: bool = False,
+    ):
         self.agent = agent
         self.org_id = org_id
-        self.session_service = InMemorySessionService()
-        self.id = self.__get_id()
+        # Name of the pooled agent, so that derived copies are pooled too.
+        self.agent_name = (agent_name or "").lower() or None
+        self.session_service = session_service or get_session_service()
+        # Calls with the same session id continue the same conversation.
+        self.id = session_id or self.__new_id()
+        # One-shot callers do not keep their session once a call is done.
+        self.ephemeral = ephemeral
         self.session = None
 
     @staticmethod
-    def create(org_id: int, agent: str):
+    def create(
+        org_id: int, agent: str, session_id: str | None = None, ephemeral: bool = False
+    ):
         agent_instance: LlmAgent = AgentCaller.get_llm_agent(org_id, agent)
         if not agent_instance:
             logger.error(f"Agent {agent} not found for org_id {org_id}")
             return None
-        return AgentCaller(org_id=org_id, agent=agent_instance)
+        return AgentCaller(
+            org_id=org_id,
+            agent=agent_instance,
+            session_id=session_id,
+            agent_name=agent,
+            ephemeral=ephemeral,
+        )
 
     @staticmethod
     def get_llm_agent(org_id: int, agent_name: str) -> LlmAgent:
         """
-        Get an LlmAgent instance by org_id and agent_name.
+        Get an LlmAgent instance by org_id and agent_name. Agents are built
+        once per configuration version and reused from the agent pool.
         """
-        agent: AgentBase = AgentCaller.get_agent(org_id, agent_name)
-        if not isinstance(agent, AgentBase):
-            raise TypeError(
-                f"Expected an instance of AgentBase, got {type(agent).__name__}"
-            )
-        return agent.build()
+
+        def build() -> LlmAgent:
+            agent: AgentBase = AgentCaller.get_agent(org_id, agent_name)
+            if not isinstance(agent, AgentBase):
+                raise TypeError(
+                    f"Expected an instance of AgentBase, got {type(agent).__name__}"
+                )
+            return agent.build()
+
+        return get_agent_pool().get(org_id, (agent_name or "").lower(), build)
 
     @staticmethod
     def get_agent(org_id: int, agent_name: str) -> AgentBase:
@@ -70,52 +96,213 @@ class AgentCaller:
         """
         if not agent_name:
             raise ValueError("Agent name cannot be None or empty")
-        agent_name = agent_name.lower()
-        available_agents = get_available_agents()
-        if agent_name not in available_agents:
+        agent_class = get_agent_class(agent_name.lower())
+        if agent_class is None:
             raise ValueError(
-                f"Agent '{agent_name}' is not available. Available agents: {available_agents}"
-            )
-        agent_module = importlib.import_module(f"services.agents.{agent_name}_agent")
-        agent_class: AgentBase = getattr(
-            agent_module, f"{snake_to_camel(agent_name)}Agent"
-        )
-        if not issubclass(agent_class, AgentBase):
-            raise TypeError(
-                f"Agent class {agent_class.__name__} is not a subclass of AgentBase"
+                f"Agent '{agent_name}' is not available. Available agents: {get_available_agents()}"
             )
         return agent_class(org_id=org_id)
 
-    def init_runner(self):
+    def init_runner(self, agent: LlmAgent = None):
         self.runner = Runner(
-            agent=self.agent,
+            agent=agent or self.agent,
             app_name=APP_NAME,
             session_service=self.session_service,
         )
 
-    async def generate(self, text: str):
-        await self.__get_session()
+    def structured_agent(self, output_schema: type[BaseModel]) -> LlmAgent:
+        """
+        Copy of the agent whose responses are constrained to the JSON schema
+        of `output_schema`. The copy keeps the callbacks, planner and
+        generation config of the agent, but the ADK rejects tools and
+        sub-agents on agents with an output schema, so it has none.
+        Copies of pooled agents are pooled per schema.
+        """
+
+        def build() -> LlmAgent:
+            return self.agent.model_copy(
+                update={
+                    "output_schema": output_schema,
+                    "tools": [],
+                    "sub_agents": [],
+                    "disallow_transfer_to_parent": True,
+                    "disallow_transfer_to_peers": True,
+                }
+            )
+
+        if not self.agent_name:
+            return build()
+        variant = json.dumps(output_schema.model_json_schema(), sort_keys=True)
+        return get_agent_pool().get(self.org_id, self.agent_name, build, variant=variant)
+
+    async def generate(
+        self,
+        text: str,
+        timeout: float | None = None,
+        hedge: bool = False,
+        output_schema: type[BaseModel] | None = None,
+    ):
+        """
+        Generate a response for `text`.
+
+        The call is cancelled after `timeout` seconds. With `hedge`, a
+        duplicate request is sent once the call is slower than the model's
+        recent p95 latency (if the limiter has budget for it) and the first
+        answer wins. With `output_schema`, the model answers with JSON
+        matching the schema. The session of ephemeral callers is deleted
+        once the call is done.
+        """
+        self.init_runner(self.structured_agent(output_schema) if output_schema else None)
+        call = self._generate_hedged(text) if hedge else self._generate(text, self.id)
+        try:
+            if timeout is None:
+                return await call
+            return await asyncio.wait_for(call, timeout=timeout)
+        finally:
+            if self.ephemeral:
+                await self._delete_session()
+
+    async def _delete_session(self):
+        try:
+            await self.session_service.delete_session(
+                app_name=APP_NAME, user_id=str(self.org_id), session_id=self.id
+            )
+        except Exception as e:
+            logger.error(f"Error deleting session {self.id}: {e}")
+
+    async def stream(self, text: str):
+        """
+        Generate a response for `text`, yielding its progress as it happens:
+        `text` chunks of the answer, `tool_call` and `tool_result` events
+        for the tools the agent uses and a last `final` event with the full
+        answer. Closing the generator (e.g. when the client disconnects)
+        cancels the run and releases its model call slot.
+        """
         self.init_runner()
+        await self.__get_session(self.id)
+        message_content = types.Content(
+            parts=[types.Part.from_text(text=text)],
+            role="user",
+        )
+        async with get_llm_limiter().slot(model=self.model_name, org_id=self.org_id):
+            events = self.runner.run_async(
+                user_id=str(self.org_id),
+                new_message=message_content,
+                session_id=self.id,
+                run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+            )
+            try:
+                async for event in events:
+                    for chunk in AgentCaller._describe_event(event):
+                        yield chunk
+                    if event.is_final_response():
+                        response = event.content.parts[0].text if event.content else ""
+                        yield {
+                            "type": "final",
+                            "text": (response or "").strip(),
+                            "conversation_id": self.id,
+                        }
+                        break
+            finally:
+                await events.aclose()
+
+    @staticmethod
+    def _describe_event(event) -> list[dict]:
+        """Progress chunks of a runner event, for streaming."""
+        if event.partial:
+            text = "".join(
+                part.text for part in (event.content.parts if event.content else []) if part.text
+            )
+            return [{"type": "text", "text": text, "author": event.author}] if text else []
+        chunks = [
+            {"type": "tool_call", "name": call.name, "author": event.author}
+            for call in event.get_function_calls()
+        ]
+        chunks += [
+            {"type": "tool_result", "name": result.name, "author": event.author}
+            for result in event.get_function_responses()
+        ]
+        return chunks
+
+    async def _generate(self, text: str, session_id: str, lease: str | None = None):
+        await self.__get_session(session_id)
         logger.info(
-            f"Generating response for org_id {self.org_id} with session {self.id}"
+            f"Generating response for org_id {self.org_id} with session {session_id}"
         )
         message_content = types.Content(
             parts=[types.Part.from_text(text=text)],
             role="user",
         )
-        events = self.runner.run_async(
-            user_id=str(self.org_id),
-            new_message=message_content,
-            session_id=self.id,
-        )
         response = ""
-        async for event in events:
-            if event.is_final_response():
-                logger.info(f"Final response: {event.content}")
-                response = event.content.parts[0].text if event.content else ""
-                break
+        async with get_llm_limiter().slot(
+            model=self.model_name, org_id=self.org_id, lease=lease
+        ):
+            events = self.runner.run_async(
+                user_id=str(self.org_id),
+                new_message=message_content,
+                session_id=session_id,
+            )
+            async for event in events:
+                if event.is_final_response():
+                    logger.info(f"Final response: {event.content}")
+                    response = event.content.parts[0].text if event.content else ""
+                    break
         return response.strip()
 
+    async def _generate_hedged(self, text: str):
+        limiter = get_llm_limiter()
+        delay = limiter.hedge_delay(self.model_name)
+        if delay is None:
+            return await self._generate(text, self.id)
+        # The hedge continues the conversation from a copy taken before the
+        # primary call adds the new message to it.
+        hedge_id = f"{self.id}_hedge_{uuid.uuid4().hex[:8]}"
+        self.session_service.copy_session(APP_NAME, str(self.org_id), self.id, hedge_id)
+        primary = asyncio.create_task(self._generate(text, self.id))
+        tasks = {primary}
+        hedge = winner = None
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+            lease = limiter.try_acquire(self.model_name, self.org_id)
+            if not lease:
+                logger.info(f"No budget to hedge the call of org_id {self.org_id}")
+                return await primary
+            logger.info(f"Hedging call of org_id {self.org_id} after {delay:.2f}s")
+            metrics.increment("llm_hedges_sent", org_id=self.org_id)
+            hedge = asyncio.create_task(self._generate(text, hedge_id, lease))
+            tasks.add(hedge)
+            error = None
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        winner = task
+                        if task is hedge:
+                            metrics.increment("llm_hedges_won", org_id=self.org_id)
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+            if winner is not None and winner is hedge:
+                self.session_service.copy_session(
+                    APP_NAME, str(self.org_id), hedge_id, self.id
+                )
+            await self.session_service.delete_session(
+                app_name=APP_NAME, user_id=str(self.org_id), session_id=hedge_id
+            )
+
+    @property
+    def model_name(self) -> str:
+        """Name of the model behind the agent, used to scope call limits."""
+        model = getattr(self.agent, "model", None) or DEFAULT_MODEL
+        return model if isinstance(model, str) else getattr(model, "model", DEFAULT_MODEL)
+
     async def stop(self):
         logger.info(f"Stopping session for org_id {self.org_id}")
         try:
@@ -123,13 +310,13 @@ class AgentCaller:
         except Exception as e:
             logger.error(f"Error stopping session: {e}")
 
-    async def __get_session(self):
+    async def __get_session(self, session_id: str):
         logger.info(f"Getting session for org_id {self.org_id}")
         try:
             session = await self.session_service.get_session(
                 app_name=APP_NAME,
                 user_id=str(self.org_id),
-                session_id=self.id,
+                session_id=session_id,
             )
             if session:
                 logger.info(
@@ -139,15 +326,17 @@ class AgentCaller:
         except Exception as e:
             logger.error(f"Error getting session: {e}")
         logger.info(
-            f"Creating new session for org_id {self.org_id}, session_id {self.id}"
+            f"Creating new session for org_id {self.org_id}, session_id {session_id}"
         )
         self.session = await self.session_service.create_session(
             app_name=APP_NAME,
             user_id=str(self.org_id),
-            session_id=self.id,
+            session_id=session_id,
         )
         return self.session
 
-    def __get_id(self):
-        today = datetime.now().strftime("%Y%m%d")
-        return f"{self.org_id}_{today}"
+    def __new_id(self):
+        return f"{self.org_id}_{uuid.uuid4().hex}"
+
+
+load_agents()
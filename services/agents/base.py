@@ -14,6 +14,7 @@ from models.inputs.agent import ContentConfig
 from models.mongo.agents import AgentBase as MongoAgent
 from repository import repository
 
+from .registry import register_agent
 from .tools import out_docs
 
 DEFAULT_MODEL = os.getenv("DEFAULT_MODEL", "gemini-2.0-flash")
@@ -110,15 +111,21 @@ class AgentFactory:
         """
         Returns the global prompt for the agent.
         """
-        today = datetime.now(ZoneInfo("America/Mexico_City")).strftime("%Y-%m-%d")
         return f"""
         ## Internal utils
-        Today is: {today} (America/Mexico_City timezone)
+        Today is: {AgentFactory.today()} (America/Mexico_City timezone)
         ## Global Instruction
         - You have a tool named `save_out_doc` that allows you to save relevant text responses as documents in MongoDB, you must use it to save relevant information.
         {custom_prompt}
       """
 
+    @staticmethod
+    def today() -> str:
+        """
+        Returns today's date in the timezone of the global prompt.
+        """
+        return datetime.now(ZoneInfo("America/Mexico_City")).strftime("%Y-%m-%d")
+
     @staticmethod
     def create_output_key(agent_name: str) -> str:
         """
@@ -131,6 +138,16 @@ class AgentFactory:
 
 
 class AgentBase:
+    def __init_subclass__(
+        cls, agent_name: str | None = None, orchestrator: bool = False, **kwargs
+    ):
+        """
+        Registers every agent class when its module is imported, so agents
+        are looked up by name without scanning the package.
+        """
+        super().__init_subclass__(**kwargs)
+        register_agent(cls, name=agent_name, orchestrator=orchestrator)
+
     def __init__(
         self,
         name,
@@ -138,6 +155,7 @@ class AgentBase:
         org_id: int = None,
         sub_agents: list[LlmAgent] = None,
         instructions: str = None,
+        configs: dict[str, MongoAgent] = None,
     ):
         self.agent: LlmAgent = None
         self.name: str = name
@@ -148,7 +166,7 @@ class AgentBase:
         self.content_config: ContentConfig = ContentConfig()
         self.global_instruction: str = None
         self.tools = []
-        self._get_config()
+        self._get_config(configs)
 
     def build(self):
         """
@@ -207,27 +225,39 @@ class AgentBase:
             "content_config": self.content_config.model_dump(),
         }
 
-    def _get_config(self) -> dict[str, str]:
+    def default_config(self) -> MongoAgent:
+        """
+        Returns the configuration stored for the agent when it has none.
+        """
+        return MongoAgent(
+            organizationId=self.org_id,
+            name=self.name,
+            description=self.description,
+            instructions=self.instructions,
+            content_config=self.content_config,
+            global_instruction=self.global_instruction,
+        )
+
+    def _get_config(self, configs: dict[str, MongoAgent] = None) -> dict[str, str]:
         """
-        Returns the agent configuration.
+        Returns the agent configuration. When the configurations of the
+        organization are already loaded in `configs`, they are used instead
+        of querying, and a missing configuration is left to the caller to
+        create.
         """
         if self.org_id is None:
             raise ValueError("org_id is not set for the agent.")
-        config_agent = repository.mongo.agent.get_agent_config(
-            org_id=self.org_id, name=self.name
-        )
-        if config_agent is None:
-            repository.mongo.agent.create(
-                MongoAgent(
-                    organizationId=self.org_id,
-                    name=self.name,
-                    description=self.description,
-                    instructions=self.instructions,
-                    content_config=self.content_config,
-                    global_instruction=self.global_instruction,
-                )
+        if configs is not None:
+            config_agent = configs.get(self.name)
+            if config_agent is None:
+                return
+        else:
+            config_agent = repository.mongo.agent.get_agent_config(
+                org_id=self.org_id, name=self.name
             )
-            return
+            if config_agent is None:
+                repository.mongo.agent.create(self.default_config())
+                return
         self.instructions = (
             config_agent.instructions
             if config_agent.instructions
@@ -1,14 +1,17 @@
+from models.mongo.agents import AgentBase as MongoAgent
+
 from .base import AgentBase
 from .tools import changelog
 
 
 class EngineerAgent(AgentBase):
-    def __init__(self, org_id: int = None):
+    def __init__(self, org_id: int = None, configs: dict[str, MongoAgent] = None):
         super().__init__(
             name="EngineerAgent",
             description="An agent that can perform engineering tasks using tools.",
             instructions="You are an engineer agent. Use your tools to solve engineering problems efficiently.You should create the changelog for the organization and manage it effectively. Also you should create documentation for the organization.",
             org_id=org_id,
+            configs=configs,
         )
         self.tools = [
             {
@@ -0,0 +1,254 @@
+import asyncio
+import hashlib
+import hmac
+import ipaddress
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+import requests
+from loguru import logger
+from requests.adapters import HTTPAdapter
+
+from lib import metrics
+from lib.cache import get_cache
+from models.agent_job import AgentJob, AgentJobStatus
+from models.inputs.agent import AgentProcess
+from models.mongo.mongo_base import tz_zone
+
+# Jobs and their results are kept this long after their last update.
+JOB_TTL = int(os.getenv("AGENT_JOB_TTL_SECONDS", 60 * 60 * 24))
+# Agent runs of a job are cancelled after this long.
+JOB_TIMEOUT = float(os.getenv("AGENT_JOB_TIMEOUT_SECONDS", 60 * 15))
+# Running jobs are reported failed when their worker has not stored a result
+# this long after their timeout, e.g. because the worker died.
+STALE_GRACE = 60
+CALLBACK_TIMEOUT = float(os.getenv("AGENT_JOB_CALLBACK_TIMEOUT_SECONDS", 10))
+# When set, callbacks are signed with HMAC-SHA256 of the body.
+CALLBACK_SECRET = os.getenv("AGENT_JOB_CALLBACK_SECRET")
+# Callbacks to private and loopback addresses are refused unless allowed.
+ALLOW_PRIVATE_CALLBACKS = os.getenv("AGENT_JOB_ALLOW_PRIVATE_CALLBACKS", "false") == "true"
+
+SIGNATURE_HEADER = "X-Roadflow-Signature"
+
+
+def _job_key(job_id: str) -> str:
+    return f"agent_job_{job_id}"
+
+
+def _input_key(job_id: str) -> str:
+    return f"agent_job_input_{job_id}"
+
+
+def _claim_key(job_id: str) -> str:
+    return f"agent_job_claim_{job_id}"
+
+
+def _save(job: AgentJob) -> AgentJob:
+    job.updated_at = datetime.now(tz_zone)
+    get_cache().set(_job_key(job.id), job.model_dump_json(), ex=JOB_TTL)
+    return job
+
+
+def _load(job_id: str) -> AgentJob | None:
+    raw = get_cache().get(_job_key(job_id))
+    if raw is None:
+        return None
+    return AgentJob.model_validate_json(raw)
+
+
+def create_job(org_id: int, data: AgentProcess) -> AgentJob:
+    """
+    Store a queued job for an agent request and hand it to a worker.
+    The job continues the conversation of `data.conversation_id`, or starts
+    a new one whose id is returned with the job.
+    """
+    from services.celery_jobs.tasks import run_agent_job
+
+    now = datetime.now(tz_zone)
+    job = AgentJob(
+        id=uuid.uuid4().hex,
+        org_id=org_id,
+        agent=data.agent,
+        conversation_id=data.conversation_id or f"{org_id}_{uuid.uuid4().hex}",
+        callback_url=data.callback_url,
+        created_at=now,
+        updated_at=now,
+    )
+    pipeline = get_cache().pipeline()
+    pipeline.set(_input_key(job.id), data.text, ex=JOB_TTL)
+    pipeline.set(_job_key(job.id), job.model_dump_json(), ex=JOB_TTL)
+    pipeline.execute()
+    try:
+        run_agent_job.delay(job.id)
+    except Exception as e:
+        logger.error(f"Could not enqueue agent job {job.id}: {e}")
+        _finish(job, error=f"Could not enqueue the job: {e}")
+        raise
+    metrics.increment("agent_jobs_queued", org_id=org_id)
+    return job
+
+
+def get_job(org_id: int, job_id: str) -> AgentJob | None:
+    """Job of the organization with id `job_id`, None if missing or expired."""
+    job = _load(job_id)
+    if job is None or job.org_id != org_id:
+        return None
+    if job.status == AgentJobStatus.RUNNING and job.started_at:
+        deadline = job.started_at + timedelta(seconds=JOB_TIMEOUT + STALE_GRACE)
+        if datetime.now(tz_zone) > deadline:
+            job.status = AgentJobStatus.FAILED
+            job.error = f"The job did not finish within {JOB_TIMEOUT:g} seconds"
+    return job
+
+
+def run_job(job_id: str) -> AgentJob | None:
+    """
+    Run the agent of a queued job and store its result. Jobs that are
+    missing, expired or already picked up by another worker are skipped;
+    workers claim a job atomically, so redelivered tasks never run it twice.
+    """
+    from services.agents import AgentCaller
+
+    job = _load(job_id)
+    if job is None or job.status != AgentJobStatus.QUEUED:
+        logger.warning(f"Agent job {job_id} is not queued, skipping")
+        return None
+    if not get_cache().set(_claim_key(job_id), "1", nx=True, ex=JOB_TTL):
+        logger.warning(f"Agent job {job_id} was claimed by another worker, skipping")
+        return None
+    text = get_cache().get(_input_key(job_id))
+    if text is None:
+        return _finish(job, error="The job input has expired")
+    job.status = AgentJobStatus.RUNNING
+    job.started_at = datetime.now(tz_zone)
+    _save(job)
+    try:
+        caller = AgentCaller.create(
+            org_id=job.org_id, agent=job.agent, session_id=job.conversation_id
+        )
+        if not caller:
+            return _finish(job, error=f"Agent {job.agent} not found")
+        text = text.decode("utf-8") if isinstance(text, bytes) else text
+        response = asyncio.run(caller.generate(text, timeout=JOB_TIMEOUT))
+        if not response:
+            return _finish(job, error="No response generated by the agent.")
+        return _finish(job, response=response)
+    except TimeoutError:
+        return _finish(job, error=f"The agent did not answer within {JOB_TIMEOUT:g} seconds")
+    except Exception as e:
+        logger.error(f"Error running agent job {job_id}: {e}")
+        return _finish(job, error=str(e))
+
+
+def _finish(job: AgentJob, response: str | None = None, error: str | None = None) -> AgentJob:
+    from services.celery_jobs.tasks import deliver_agent_job_callback
+
+    job.status = AgentJobStatus.FAILED if error else AgentJobStatus.SUCCEEDED
+    job.response = response
+    job.error = error
+    _save(job)
+    get_cache().delete(_input_key(job.id))
+    metrics.increment(f"agent_jobs_{job.status.value}", org_id=job.org_id)
+    if job.callback_url:
+        try:
+            deliver_agent_job_callback.delay(job.id)
+        except Exception as e:
+            logger.error(f"Could not schedule the callback of agent job {job.id}: {e}")
+    return job
+
+
+def resolve_public_address(url: str) -> str | None:
+    """
+    An address of the host of `url`, or None unless every address it
+    resolves to is public.
+    """
+    host = urlparse(url).hostname
+    if not host:
+        return None
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(host, None)}
+    except socket.gaierror:
+        return None
+    if not addresses or not all(ipaddress.ip_address(a).is_global for a in addresses):
+        return None
+    return sorted(addresses)[0]
+
+
+class PinnedAdapter(HTTPAdapter):
+    """
+    Adapter connecting to an address resolved beforehand, so that the host
+    cannot resolve to another address between the check and the request.
+    The hostname is still used for SNI and to verify the certificate.
+    """
+
+    def __init__(self, address: str, **kwargs):
+        self.address = address
+        super().__init__(**kwargs)
+
+    def build_connection_pool_key_attributes(self, request, verify, cert=None):
+        host_params, pool_kwargs = super().build_connection_pool_key_attributes(
+            request, verify, cert
+        )
+        hostname = host_params["host"]
+        host_params["host"] = self.address
+        if host_params["scheme"] == "https":
+            pool_kwargs["server_hostname"] = hostname
+            pool_kwargs["assert_hostname"] = hostname
+        return host_params, pool_kwargs
+
+
+def sign(body: bytes) -> str:
+    digest = hmac.new(CALLBACK_SECRET.encode("utf-8"), body, hashlib.sha256).hexdigest()
+    return f"sha256={digest}"
+
+
+def _host_header(url: str) -> str:
+    parsed = urlparse(url)
+    host = f"[{parsed.hostname}]" if ":" in parsed.hostname else parsed.hostname
+    return f"{host}:{parsed.port}" if parsed.port else host
+
+
+def deliver_callback(job_id: str) -> bool:
+    """
+    POST a finished job to its callback URL. The request is sent to the
+    public address the URL was checked against. Network errors and 5xx or
+    429 responses raise so that the task is retried; other client errors
+    are logged and dropped.
+    """
+    job = _load(job_id)
+    if job is None or not job.callback_url:
+        return False
+    body = job.model_dump_json().encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    if CALLBACK_SECRET:
+        headers[SIGNATURE_HEADER] = sign(body)
+    adapter = None
+    if not ALLOW_PRIVATE_CALLBACKS:
+        address = resolve_public_address(job.callback_url)
+        if address is None:
+            logger.warning(f"Refusing callback of agent job {job_id} to a non-public address")
+            return False
+        adapter = PinnedAdapter(address)
+        headers["Host"] = _host_header(job.callback_url)
+    with requests.Session() as session:
+        if adapter is not None:
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        response = session.post(
+            job.callback_url,
+            data=body,
+            headers=headers,
+            timeout=CALLBACK_TIMEOUT,
+            allow_redirects=False,
+        )
+    if response.status_code == 429 or response.status_code >= 500:
+        response.raise_for_status()
+    if not response.ok:
+        logger.warning(
+            f"Callback of agent job {job_id} was rejected with status {response.status_code}"
+        )
+        return False
+    return True
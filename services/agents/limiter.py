@@ -0,0 +1,280 @@
+import asyncio
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from loguru import logger
+
+from lib.cache import get_cache
+
+MODEL_MIN_LIMIT = float(os.getenv("LLM_MODEL_MIN_CONCURRENCY", 1))
+MODEL_INITIAL_LIMIT = float(os.getenv("LLM_MODEL_INITIAL_CONCURRENCY", 8))
+MODEL_MAX_LIMIT = float(os.getenv("LLM_MODEL_MAX_CONCURRENCY", 64))
+ORG_MIN_LIMIT = float(os.getenv("LLM_ORG_MIN_CONCURRENCY", 1))
+ORG_INITIAL_LIMIT = float(os.getenv("LLM_ORG_INITIAL_CONCURRENCY", 4))
+ORG_MAX_LIMIT = float(os.getenv("LLM_ORG_MAX_CONCURRENCY", 16))
+
+# Additive increase per window of successful calls, multiplicative decrease on overload.
+INCREASE = float(os.getenv("LLM_LIMIT_INCREASE", 1))
+DECREASE_FACTOR = float(os.getenv("LLM_LIMIT_DECREASE_FACTOR", 0.5))
+# Calls slower than this count as an overload signal.
+LATENCY_TARGET = float(os.getenv("LLM_LATENCY_TARGET_SECONDS", 30))
+# Concurrent failures of the same burst only decrease the limit once.
+DECREASE_COOLDOWN = float(os.getenv("LLM_LIMIT_DECREASE_COOLDOWN_SECONDS", 5))
+# Leases of crashed processes are dropped after this. Leases of running calls
+# are renewed every third of it, so calls may outlast it.
+LEASE_TTL = int(os.getenv("LLM_LEASE_TTL_SECONDS", 300))
+ACQUIRE_TIMEOUT = float(os.getenv("LLM_ACQUIRE_TIMEOUT_SECONDS", 120))
+# Latency samples kept per model to derive the hedging delay.
+LATENCY_WINDOW = int(os.getenv("LLM_LATENCY_WINDOW", 200))
+HEDGE_PERCENTILE = float(os.getenv("LLM_HEDGE_PERCENTILE", 0.95))
+HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", 20))
+HEDGE_MIN_DELAY = float(os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", 1))
+
+OK = "ok"
+OVERLOAD = "overload"
+NEUTRAL = "neutral"
+
+MODELS_KEY = "llm_limit_models"
+
+# KEYS: (inflight zset, limit hash) per scope.
+# ARGV: now, lease expiry, lease id, key ttl, then the initial limit per scope.
+_ACQUIRE = """
+local now = tonumber(ARGV[1])
+local scopes = #KEYS / 2
+for i = 1, scopes do
+    local inflight = KEYS[2 * i - 1]
+    redis.call('zremrangebyscore', inflight, '-inf', now)
+    local limit = tonumber(redis.call('hget', KEYS[2 * i], 'limit') or ARGV[4 + i])
+    if redis.call('zcard', inflight) >= math.max(math.floor(limit), 1) then
+        return 0
+    end
+end
+for i = 1, scopes do
+    redis.call('zadd', KEYS[2 * i - 1], ARGV[2], ARGV[3])
+    redis.call('expire', KEYS[2 * i - 1], ARGV[4])
+end
+return 1
+"""
+
+# KEYS: (inflight zset, limit hash) per scope.
+# ARGV: lease id, signal, now, increase, decrease factor, cooldown, key ttl,
+# then (min, initial, max) per scope.
+_RELEASE = """
+local now = tonumber(ARGV[3])
+local scopes = #KEYS / 2
+for i = 1, scopes do
+    redis.call('zrem', KEYS[2 * i - 1], ARGV[1])
+    local state = KEYS[2 * i]
+    local base = 7 + 3 * (i - 1)
+    local min_limit = tonumber(ARGV[base + 1])
+    local max_limit = tonumber(ARGV[base + 3])
+    local limit = tonumber(redis.call('hget', state, 'limit') or ARGV[base + 2])
+    if ARGV[2] == 'ok' then
+        limit = math.min(limit + tonumber(ARGV[4]) / limit, max_limit)
+    elseif ARGV[2] == 'overload' then
+        local last = tonumber(redis.call('hget', state, 'decreased_at') or 0)
+        if now - last >= tonumber(ARGV[6]) then
+            limit = math.max(limit * tonumber(ARGV[5]), min_limit)
+            redis.call('hset', state, 'decreased_at', now)
+        end
+    end
+    redis.call('hset', state, 'limit', limit)
+    redis.call('expire', state, ARGV[7])
+end
+return 1
+"""
+
+
+class LimiterTimeout(Exception):
+    """Raised when no model call slot frees up in time."""
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Rate limits and server errors of the provider are overload signals, and
+    so are calls that timed out or were cancelled for being too slow.
+    """
+    if isinstance(error, TimeoutError | asyncio.CancelledError):
+        return OVERLOAD
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    if isinstance(code, int) and (code == 429 or 500 <= code < 600):
+        return OVERLOAD
+    return NEUTRAL
+
+
+class AdaptiveLimiter:
+    """
+    Distributed AIMD concurrency limiter for model calls, shared through
+    Redis by the API processes and the Celery workers.
+
+    Every call holds a lease on two scopes, its model and its organization.
+    Successful calls raise the limits additively; provider rate limits,
+    server errors and slow calls cut them multiplicatively.
+    """
+
+    def __init__(self):
+        self.cache = get_cache()
+
+    @staticmethod
+    def _scopes(model: str, org_id: int) -> list[tuple[str, tuple[float, float, float]]]:
+        return [
+            (f"model_{model}", (MODEL_MIN_LIMIT, MODEL_INITIAL_LIMIT, MODEL_MAX_LIMIT)),
+            (f"org_{org_id}", (ORG_MIN_LIMIT, ORG_INITIAL_LIMIT, ORG_MAX_LIMIT)),
+        ]
+
+    @staticmethod
+    def _keys(scope: str) -> tuple[str, str]:
+        return f"llm_inflight_{scope}", f"llm_limit_{scope}"
+
+    def try_acquire(self, model: str, org_id: int) -> str | None:
+        """Take a slot without waiting. Returns the lease id, or None."""
+        scopes = self._scopes(model, org_id)
+        keys = [key for scope, _ in scopes for key in self._keys(scope)]
+        lease = uuid.uuid4().hex
+        now = time.time()
+        acquired = self.cache.eval(
+            _ACQUIRE,
+            len(keys),
+            *keys,
+            now,
+            now + LEASE_TTL,
+            lease,
+            LEASE_TTL * 2,
+            *[config[1] for _, config in scopes],
+        )
+        if not acquired:
+            return None
+        self.cache.sadd(MODELS_KEY, model)
+        return lease
+
+    async def acquire(
+        self, model: str, org_id: int, timeout: float = ACQUIRE_TIMEOUT
+    ) -> str:
+        """Wait for a slot, backing off between attempts."""
+        deadline = time.monotonic() + timeout
+        delay = 0.05
+        while True:
+            lease = self.try_acquire(model, org_id)
+            if lease:
+                return lease
+            if time.monotonic() + delay > deadline:
+                raise LimiterTimeout(
+                    f"No model call slot for {model} (org {org_id}) after {timeout}s"
+                )
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 1)
+
+    def release(self, lease: str, model: str, org_id: int, signal: str = NEUTRAL) -> None:
+        """Free a slot and feed the outcome of the call back into the limits."""
+        scopes = self._scopes(model, org_id)
+        keys = [key for scope, _ in scopes for key in self._keys(scope)]
+        self.cache.eval(
+            _RELEASE,
+            len(keys),
+            *keys,
+            lease,
+            signal,
+            time.time(),
+            INCREASE,
+            DECREASE_FACTOR,
+            DECREASE_COOLDOWN,
+            LEASE_TTL * 2,
+            *[value for _, config in scopes for value in config],
+        )
+
+    def renew(self, lease: str, model: str, org_id: int) -> None:
+        """Push back the expiry of the lease of a call that is still running."""
+        expiry = time.time() + LEASE_TTL
+        pipeline = self.cache.pipeline()
+        for scope, _ in self._scopes(model, org_id):
+            inflight_key = self._keys(scope)[0]
+            pipeline.zadd(inflight_key, {lease: expiry}, xx=True)
+            pipeline.expire(inflight_key, LEASE_TTL * 2)
+        pipeline.execute()
+
+    async def _keep_alive(self, lease: str, model: str, org_id: int) -> None:
+        while True:
+            await asyncio.sleep(LEASE_TTL / 3)
+            try:
+                self.renew(lease, model, org_id)
+            except Exception as e:
+                logger.error(f"Could not renew model call lease {lease}: {e}")
+
+    @asynccontextmanager
+    async def slot(self, model: str, org_id: int, lease: str | None = None):
+        """
+        Hold a model call slot for the duration of the block. A lease taken
+        with `try_acquire` can be passed in instead of waiting for one. The
+        lease is renewed while the block runs, however long the call takes.
+        """
+        if lease is None:
+            lease = await self.acquire(model, org_id)
+        keep_alive = asyncio.create_task(self._keep_alive(lease, model, org_id))
+        started = time.monotonic()
+        signal = NEUTRAL
+        try:
+            yield lease
+            latency = time.monotonic() - started
+            signal = OK if latency <= LATENCY_TARGET else OVERLOAD
+            self.record_latency(model, latency)
+        except (Exception, asyncio.CancelledError) as e:
+            signal = classify_error(e)
+            raise
+        finally:
+            keep_alive.cancel()
+            if signal == OVERLOAD:
+                logger.warning(f"Model {model} overloaded, reducing concurrency limits")
+            self.release(lease, model, org_id, signal)
+
+    @staticmethod
+    def _latency_key(model: str) -> str:
+        return f"llm_latency_{model}"
+
+    def record_latency(self, model: str, latency: float) -> None:
+        """Keep the latency of a successful call in the window of its model."""
+        pipeline = self.cache.pipeline()
+        pipeline.lpush(self._latency_key(model), round(latency, 3))
+        pipeline.ltrim(self._latency_key(model), 0, LATENCY_WINDOW - 1)
+        pipeline.execute()
+
+    def hedge_delay(self, model: str) -> float | None:
+        """
+        Delay after which a call to a model is hedged: the configured
+        percentile of its recent latencies. None until enough samples exist.
+        """
+        samples = sorted(float(v) for v in self.cache.lrange(self._latency_key(model), 0, -1))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        index = min(int(len(samples) * HEDGE_PERCENTILE), len(samples) - 1)
+        return max(samples[index], HEDGE_MIN_DELAY)
+
+    def _scope_state(self, scope: str, initial: float) -> dict:
+        inflight_key, limit_key = self._keys(scope)
+        pipeline = self.cache.pipeline()
+        pipeline.zcount(inflight_key, time.time(), "+inf")
+        pipeline.hget(limit_key, "limit")
+        inflight, limit = pipeline.execute()
+        return {
+            "limit": int(float(limit)) if limit else int(initial),
+            "inflight": inflight,
+        }
+
+    def get_limits(self, org_id: int) -> dict:
+        """Current limits and in-flight calls per model and for an organization."""
+        models = sorted(m.decode("utf-8") for m in self.cache.smembers(MODELS_KEY))
+        return {
+            "models": {
+                model: self._scope_state(f"model_{model}", MODEL_INITIAL_LIMIT)
+                for model in models
+            },
+            "organization": self._scope_state(f"org_{org_id}", ORG_INITIAL_LIMIT),
+        }
+
+
+@lru_cache(maxsize=1)
+def get_llm_limiter() -> AdaptiveLimiter:
+    """Return the process-wide model call limiter."""
+    return AdaptiveLimiter()
@@ -1,25 +1,33 @@
-import importlib
-from datetime import datetime
-from pathlib import Path
-from zoneinfo import ZoneInfo
-
 from loguru import logger
 
-from .base import AgentBase
-from .helpers.common import snake_to_camel
+from models.mongo.agents import AgentBase as MongoAgent
+from repository import repository
 
-mex_tz = ZoneInfo("America/Mexico_City")
+from .base import AgentBase
+from .registry import list_agents
 
 
-class MultiAgent(AgentBase):
+class MultiAgent(AgentBase, orchestrator=True):
     def __init__(self, org_id: int = None):
-        self.sub_agents = self.__get_agents__(org_id)
+        # The configurations of every agent are loaded at once and the
+        # missing ones are created together once all agents are built.
+        configs = repository.mongo.agent.get_agent_configs(org_id)
+        agents = self.__get_agents__(org_id, configs)
+        self.sub_agents = [agent.agent for agent in agents]
         super().__init__(
             name="MultiAgent",
             description="An agent that can perform multiple tasks using various tools. It can switch between different roles and handle diverse requests efficiently using sub agents.",
             instructions=self._instructions_,
             org_id=org_id,
             sub_agents=self.sub_agents,
+            configs=configs,
+        )
+        repository.mongo.agent.create_defaults(
+            [
+                agent.default_config()
+                for agent in [*agents, self]
+                if agent.name not in configs
+            ]
         )
 
     @property
@@ -52,12 +60,6 @@ class MultiAgent(AgentBase):
 
         ---
 
-        ### Metadata
-        Use the following metadata to assist orchestration:
-        - Current date and time: **{datetime}** (YYYY-MM-DD HH:MM:SS)
-
-        ---
-
         ### Output Format
         Return **only** the final text to be shown to the user.
         """
@@ -66,35 +68,21 @@ class MultiAgent(AgentBase):
         ]
         catalog = "\n".join(agent_catalog_lines)
 
-        return PROMPT_TEMPLATE.format(
-            agent_catalog=catalog,
-            datetime=datetime.now(mex_tz).strftime("%Y-%m-%d %H:%M:%S"),
-        )
+        return PROMPT_TEMPLATE.format(agent_catalog=catalog)
 
-    def __get_agents__(self, org_id: int = None):
+    def __get_agents__(
+        self, org_id: int = None, configs: dict[str, MongoAgent] = None
+    ) -> list[AgentBase]:
         """
-        Discover and return the list of sub-agents available for this multi-agent.
+        Build and return the registered sub-agents available for this multi-agent.
         """
-        agents_path = Path(__file__).parent
-        agents_files = [
-            f.stem
-            for f in agents_path.glob("*_agent.py")
-            if f.is_file() and f.stem != "multi_agent"
-        ]
         agents = []
-
-        for agent_file in agents_files:
+        for registered in list_agents(include_orchestrators=False):
             try:
-                logger.info(f"Importing agent: {agent_file}")
-                module = importlib.import_module(f"services.agents.{agent_file}")
-                class_name = f"{snake_to_camel(agent_file)}"
-                agent_class = getattr(module, class_name)
-                if issubclass(agent_class, AgentBase):
-                    agent_instance = agent_class(org_id=org_id)
-                    agents.append(agent_instance.build())
-                else:
-                    logger.warning(f"{class_name} is not a subclass of AgentBase")
-            except (ImportError, AttributeError, TypeError) as e:
-                logger.error(f"Error importing agent '{agent_file}': {e}")
+                agent_instance = registered.agent_class(org_id=org_id, configs=configs)
+                agent_instance.build()
+                agents.append(agent_instance)
+            except TypeError as e:
+                logger.error(f"Error building agent '{registered.name}': {e}")
 
         return agents
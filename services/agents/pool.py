@@ -0,0 +1,133 @@
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import lru_cache
+
+from google.adk.agents import LlmAgent
+from loguru import logger
+
+from lib import metrics
+from lib.cache import get_cache
+
+from .base import AgentFactory
+from .registry import AGENTS, list_agents
+
+POOL_SIZE = int(os.getenv("AGENT_POOL_SIZE", 128))
+
+
+def _version_key(org_id: int, agent_name: str) -> str:
+    return f"agent_config_version_{org_id}_{agent_name}"
+
+
+def config_version(org_id: int, agent_name: str) -> int:
+    """Version of the configuration of an agent, bumped on every change."""
+    version = get_cache().get(_version_key(org_id, agent_name))
+    return int(version) if version else 0
+
+
+def invalidate_agent(org_id: int, agent_name: str) -> int:
+    """
+    Bump the configuration version of an agent so that every process
+    rebuilds it on its next call. Orchestrators embed the other agents as
+    sub-agents, so they are invalidated along with any of them.
+    Returns the new version of the agent.
+    """
+    agent_name = agent_name.lower()
+    names = [agent_name]
+    registered = AGENTS.get(agent_name)
+    if registered is None or not registered.orchestrator:
+        names += [a.name for a in list_agents() if a.orchestrator and a.name != agent_name]
+    pipeline = get_cache().pipeline()
+    for name in names:
+        pipeline.incr(_version_key(org_id, name))
+    version = pipeline.execute()[0]
+    pool = get_agent_pool()
+    for name in names:
+        pool.discard(org_id, name)
+    return version
+
+
+class AgentPool:
+    """
+    Process-wide LRU pool of built agents, keyed by organization, agent and
+    configuration version. Agents embed today's date in their instructions,
+    so agents built on a previous day are not reused either.
+    """
+
+    def __init__(self, max_size: int = POOL_SIZE):
+        self.max_size = max_size
+        self._agents: OrderedDict[tuple, LlmAgent] = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(
+        self,
+        org_id: int,
+        agent_name: str,
+        build: Callable[[], LlmAgent],
+        variant: str | None = None,
+    ) -> LlmAgent:
+        """
+        Pooled agent, built with `build` when missing. `variant` tells apart
+        derived copies of the same agent, e.g. one per output schema.
+        """
+        key = (
+            org_id,
+            agent_name,
+            config_version(org_id, agent_name),
+            AgentFactory.today(),
+            variant,
+        )
+        with self._lock:
+            agent = self._agents.get(key)
+            if agent is not None:
+                self._agents.move_to_end(key)
+        if agent is not None:
+            metrics.increment("agent_pool_hits", org_id=org_id)
+            return agent
+        agent = build()
+        with self._lock:
+            self._agents[key] = agent
+            self._agents.move_to_end(key)
+            while len(self._agents) > self.max_size:
+                self._agents.popitem(last=False)
+                self.evictions += 1
+        metrics.increment("agent_pool_builds", org_id=org_id)
+        logger.info(f"Built agent {agent_name} for org_id {org_id}")
+        return agent
+
+    def discard(self, org_id: int, agent_name: str) -> None:
+        """Drop every pooled version of an agent."""
+        with self._lock:
+            for key in [k for k in self._agents if k[:2] == (org_id, agent_name)]:
+                del self._agents[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._agents.clear()
+
+    def get_stats(self, org_id: int | None = None) -> dict:
+        """
+        Builds and hits across all processes (of an organization, when
+        given) and the state of this process' pool.
+        """
+        counters = metrics.get_metrics(org_id=org_id)
+        hits = counters.get("agent_pool_hits", 0)
+        builds = counters.get("agent_pool_builds", 0)
+        with self._lock:
+            size = len(self._agents)
+        return {
+            "hits": hits,
+            "builds": builds,
+            "hit_rate": round(hits / (hits + builds), 4) if hits + builds else 0.0,
+            "size": size,
+            "max_size": self.max_size,
+            "evictions": self.evictions,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_agent_pool() -> AgentPool:
+    """Return the process-wide agent pool."""
+    return AgentPool()
@@ -1,14 +1,17 @@
+from models.mongo.agents import AgentBase as MongoAgent
+
 from .base import AgentBase
 from .tools import changelog
 
 
 class ProductAgent(AgentBase):
-    def __init__(self, org_id: int = None):
+    def __init__(self, org_id: int = None, configs: dict[str, MongoAgent] = None):
         super().__init__(
             name="ProductAgent",
             description="An agent that can perform product management tasks using tools.",
             instructions="You are a product agent. Use your tools to solve product management problems efficiently. You should manage product roadmaps, feature specifications, user feedback analysis, and product documentation for the organization.",
             org_id=org_id,
+            configs=configs,
         )
         self.tools = [
             {
@@ -0,0 +1,64 @@
+import importlib
+import pkgutil
+import re
+from pathlib import Path
+
+from pydantic import BaseModel
+
+AGENT_MODULE_SUFFIX = "_agent"
+
+_CAMEL_BOUNDARY = re.compile(r"(?<!^)(?=[A-Z])")
+
+
+class RegisteredAgent(BaseModel):
+    name: str
+    agent_class: type
+    class_name: str
+    module: str
+    orchestrator: bool = False
+
+
+AGENTS: dict[str, RegisteredAgent] = {}
+
+
+def agent_key(class_name: str) -> str:
+    """Name an agent class is looked up by, e.g. EngineerAgent -> engineer."""
+    return _CAMEL_BOUNDARY.sub("_", class_name.removesuffix("Agent")).lower()
+
+
+def register_agent(agent_class: type, name: str | None = None, orchestrator: bool = False):
+    """Register an agent class under `name`, derived from its class name by default."""
+    name = name or agent_key(agent_class.__name__)
+    registered = AGENTS.get(name)
+    if registered is not None and registered.agent_class.__qualname__ != agent_class.__qualname__:
+        raise ValueError(f"Agent {name} is already registered")
+    AGENTS[name] = RegisteredAgent(
+        name=name,
+        agent_class=agent_class,
+        class_name=agent_class.__name__,
+        module=agent_class.__module__,
+        orchestrator=orchestrator,
+    )
+    return agent_class
+
+
+def load_agents() -> dict[str, RegisteredAgent]:
+    """Import every agent module of the package so that their classes register."""
+    package = Path(__file__).parent
+    for module in pkgutil.iter_modules([str(package)]):
+        if module.name.endswith(AGENT_MODULE_SUFFIX):
+            importlib.import_module(f"{__package__}.{module.name}")
+    return AGENTS
+
+
+def get_agent_class(name: str) -> type | None:
+    registered = AGENTS.get(name)
+    return registered.agent_class if registered else None
+
+
+def list_agents(include_orchestrators: bool = True) -> list[RegisteredAgent]:
+    return [
+        agent
+        for agent in AGENTS.values()
+        if include_orchestrators or not agent.orchestrator
+    ]
@@ -0,0 +1,252 @@
+import json
+import os
+import time
+import uuid
+from functools import lru_cache
+from typing import Any
+
+from google.adk.events import Event
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import (
+    GetSessionConfig,
+    ListSessionsResponse,
+)
+from google.adk.sessions.state import State
+
+from lib.cache import get_cache
+
+# Sessions expire after this long without activity.
+SESSION_TTL = int(os.getenv("AGENT_SESSION_TTL_SECONDS", 60 * 60 * 24))
+# Events kept per session in Redis.
+MAX_EVENTS = int(os.getenv("AGENT_SESSION_MAX_EVENTS", 200))
+# Most recent events sent back to the model with each new message.
+HISTORY_EVENTS = int(os.getenv("AGENT_SESSION_HISTORY_EVENTS", 30))
+
+
+def _session_key(app_name: str, user_id: str, session_id: str) -> str:
+    return f"agent_session_{app_name}_{user_id}_{session_id}"
+
+
+def _state_key(app_name: str, user_id: str, session_id: str) -> str:
+    return f"agent_session_state_{app_name}_{user_id}_{session_id}"
+
+
+def _events_key(app_name: str, user_id: str, session_id: str) -> str:
+    return f"agent_session_events_{app_name}_{user_id}_{session_id}"
+
+
+def _index_key(app_name: str, user_id: str) -> str:
+    return f"agent_sessions_{app_name}_{user_id}"
+
+
+def _app_state_key(app_name: str) -> str:
+    return f"agent_app_state_{app_name}"
+
+
+def _user_state_key(app_name: str, user_id: str) -> str:
+    return f"agent_user_state_{app_name}_{user_id}"
+
+
+def _decode_hash(raw: dict) -> dict[str, Any]:
+    return {
+        (k.decode("utf-8") if isinstance(k, bytes) else k): json.loads(v)
+        for k, v in raw.items()
+    }
+
+
+def window_events(events: list[Event], size: int) -> list[Event]:
+    """
+    Most recent `size` events, starting at a user message so that the
+    history never opens with a tool response whose call was cut off.
+    """
+    events = events[-size:] if size else list(events)
+    for i, event in enumerate(events):
+        if event.author == "user" and not event.get_function_responses():
+            return events[i:]
+    return []
+
+
+class RedisSessionService(BaseSessionService):
+    """
+    Session service storing agent conversations in Redis, so that they are
+    shared by the API and the workers. Sessions expire after SESSION_TTL
+    seconds of inactivity, at most MAX_EVENTS events are kept per session
+    and only the last HISTORY_EVENTS are returned to the runner.
+    """
+
+    def __init__(
+        self,
+        ttl: int = SESSION_TTL,
+        max_events: int = MAX_EVENTS,
+        history_events: int = HISTORY_EVENTS,
+    ):
+        self.ttl = ttl
+        self.max_events = max_events
+        self.history_events = history_events
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: dict[str, Any] | None = None,
+        session_id: str | None = None,
+    ) -> Session:
+        session_id = (session_id or "").strip() or str(uuid.uuid4())
+        now = time.time()
+        keys = self._keys(app_name, user_id, session_id)
+        pipeline = get_cache().pipeline()
+        pipeline.delete(*keys)
+        pipeline.hset(keys[0], "last_update_time", now)
+        if state:
+            pipeline.hset(
+                keys[1], mapping={k: json.dumps(v) for k, v in state.items()}
+            )
+        pipeline.sadd(_index_key(app_name, user_id), session_id)
+        self._expire(pipeline, app_name, user_id, session_id)
+        pipeline.execute()
+        return Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=dict(state or {}),
+            last_update_time=now,
+        )
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: GetSessionConfig | None = None,
+    ) -> Session | None:
+        keys = self._keys(app_name, user_id, session_id)
+        window = self.history_events
+        if config and config.num_recent_events:
+            window = min(window, config.num_recent_events)
+        pipeline = get_cache().pipeline()
+        pipeline.hgetall(keys[0])
+        pipeline.hgetall(keys[1])
+        pipeline.lrange(keys[2], -window, -1)
+        pipeline.hgetall(_app_state_key(app_name))
+        pipeline.hgetall(_user_state_key(app_name, user_id))
+        meta, state, raw_events, app_state, user_state = pipeline.execute()
+        if not meta:
+            return None
+        events = [Event.model_validate_json(raw) for raw in raw_events]
+        if config and config.after_timestamp:
+            events = [e for e in events if e.timestamp >= config.after_timestamp]
+        state = _decode_hash(state)
+        state.update({State.APP_PREFIX + k: v for k, v in _decode_hash(app_state).items()})
+        state.update({State.USER_PREFIX + k: v for k, v in _decode_hash(user_state).items()})
+        pipeline = get_cache().pipeline()
+        self._expire(pipeline, app_name, user_id, session_id)
+        pipeline.execute()
+        return Session(
+            id=session_id,
+            app_name=app_name,
+            user_id=user_id,
+            state=state,
+            events=window_events(events, window),
+            last_update_time=float(meta.get(b"last_update_time", 0)),
+        )
+
+    async def list_sessions(self, *, app_name: str, user_id: str) -> ListSessionsResponse:
+        cache = get_cache()
+        index = _index_key(app_name, user_id)
+        session_ids = [
+            s.decode("utf-8") if isinstance(s, bytes) else s for s in cache.smembers(index)
+        ]
+        pipeline = cache.pipeline()
+        for session_id in session_ids:
+            pipeline.hget(_session_key(app_name, user_id, session_id), "last_update_time")
+        sessions, expired = [], []
+        for session_id, last_update in zip(session_ids, pipeline.execute(), strict=True):
+            if last_update is None:
+                expired.append(session_id)
+                continue
+            sessions.append(
+                Session(
+                    id=session_id,
+                    app_name=app_name,
+                    user_id=user_id,
+                    last_update_time=float(last_update),
+                )
+            )
+        if expired:
+            cache.srem(index, *expired)
+        return ListSessionsResponse(sessions=sessions)
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        pipeline = get_cache().pipeline()
+        pipeline.delete(*self._keys(app_name, user_id, session_id))
+        pipeline.srem(_index_key(app_name, user_id), session_id)
+        pipeline.execute()
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+        app_name, user_id = session.app_name, session.user_id
+        keys = self._keys(app_name, user_id, session.id)
+        pipeline = get_cache().pipeline()
+        pipeline.rpush(keys[2], event.model_dump_json(exclude_none=True))
+        pipeline.ltrim(keys[2], -self.max_events, -1)
+        pipeline.hset(keys[0], "last_update_time", event.timestamp)
+        delta = event.actions.state_delta if event.actions else None
+        for key, value in (delta or {}).items():
+            if key.startswith(State.TEMP_PREFIX):
+                continue
+            if key.startswith(State.APP_PREFIX):
+                pipeline.hset(
+                    _app_state_key(app_name), key.removeprefix(State.APP_PREFIX), json.dumps(value)
+                )
+            elif key.startswith(State.USER_PREFIX):
+                pipeline.hset(
+                    _user_state_key(app_name, user_id),
+                    key.removeprefix(State.USER_PREFIX),
+                    json.dumps(value),
+                )
+            else:
+                pipeline.hset(keys[1], key, json.dumps(value))
+        self._expire(pipeline, app_name, user_id, session.id)
+        pipeline.execute()
+        return event
+
+    def copy_session(
+        self, app_name: str, user_id: str, source_id: str, target_id: str
+    ) -> None:
+        """Copy a session, replacing the target session if it exists."""
+        pipeline = get_cache().pipeline()
+        for source, target in zip(
+            self._keys(app_name, user_id, source_id),
+            self._keys(app_name, user_id, target_id),
+            strict=True,
+        ):
+            pipeline.delete(target)
+            pipeline.copy(source, target)
+        pipeline.sadd(_index_key(app_name, user_id), target_id)
+        self._expire(pipeline, app_name, user_id, target_id)
+        pipeline.execute()
+
+    def _keys(self, app_name: str, user_id: str, session_id: str) -> tuple[str, str, str]:
+        return (
+            _session_key(app_name, user_id, session_id),
+            _state_key(app_name, user_id, session_id),
+            _events_key(app_name, user_id, session_id),
+        )
+
+    def _expire(self, pipeline, app_name: str, user_id: str, session_id: str) -> None:
+        for key in self._keys(app_name, user_id, session_id):
+            pipeline.expire(key, self.ttl)
+        pipeline.expire(_index_key(app_name, user_id), self.ttl)
+        pipeline.expire(_user_state_key(app_name, user_id), self.ttl)
+        pipeline.expire(_app_state_key(app_name), self.ttl)
+
+
+@lru_cache(maxsize=1)
+def get_session_service() -> RedisSessionService:
+    """Return the process-wide agent session service."""
+    return RedisSessionService()
@@ -1,9 +1,19 @@
 
+import requests
+from celery.signals import worker_ready
 from loguru import logger
 
+from helpers.payload import project_payload
 from lib.celery import celery_app
+from lib.payload_store import get_payload_store
 from repository import repository
+from services.agents.jobs import deliver_callback, run_job
+from services.email.outbox import deliver_pending
+from services.webhook_service.stream import requeue_deferred
 from services.workflows import WorkflowService
+from services.workflows.backpressure import release_run
+from services.workflows.coalesce import drain_events, merge_payloads
+from services.workflows.scheduler import enqueue_run, schedule
 
 
 @celery_app.task(bind=True, name="agents.hello")
@@ -11,6 +21,30 @@ def hello(self):
     print("hello world")
 
 
+@celery_app.task(bind=True, name="agents.run_job")
+def run_agent_job(self, job_id: str):
+    """
+    Run a background agent job and store its result.
+    """
+    job = run_job(job_id)
+    return job.status.value if job else None
+
+
+@celery_app.task(
+    bind=True,
+    name="agents.deliver_callback",
+    autoretry_for=(requests.RequestException,),
+    retry_backoff=True,
+    retry_backoff_max=600,
+    max_retries=5,
+)
+def deliver_agent_job_callback(self, job_id: str):
+    """
+    Post the result of a finished agent job to its callback URL.
+    """
+    return deliver_callback(job_id)
+
+
 @celery_app.task(bind=True, name="workflows.run")
 def run_workflow(
     self,
@@ -18,16 +52,137 @@ def run_workflow(
     payload: dict = None,
     source: str = "",
     source_log_id: str = None,
+    payload_ref: str = None,
+    org_id: int = None,
+    projected: bool = False,
 ):
     """
     Run a specific workflow by its ID.
-    This is a placeholder for the actual workflow execution logic.
+    The payload is either passed inline or loaded from the payload store by
+    `payload_ref` and projected to the workflow's `payload_fields`, unless
+    it is `projected` already.
+    When `org_id` is given, the in-flight run of the organization is released
+    and the next queued runs are scheduled.
     """
+    try:
+        return _run_workflow(
+            workflow_id, payload, source, source_log_id, payload_ref, projected
+        )
+    finally:
+        if org_id is not None:
+            release_run(org_id)
+            try:
+                schedule()
+            except Exception as e:
+                logger.error(f"Error scheduling workflow runs: {e}")
+
+
+def _run_workflow(
+    workflow_id: str,
+    payload: dict,
+    source: str,
+    source_log_id: str | None,
+    payload_ref: str | None,
+    projected: bool = False,
+):
     workflow = repository.mongo.workflow.find_by_id(workflow_id)
     if not workflow:
         logger.error(f"Workflow with ID {workflow_id} not found.")
         return
+    if payload_ref:
+        payload = get_payload_store().get(payload_ref)
+        if payload is None:
+            logger.error(f"Payload {payload_ref} for workflow {workflow_id} not found.")
+            return
+        if not projected:
+            payload = project_payload(payload, workflow.payload_fields)
     WorkflowService.run_workflow(
         workflow, payload, context={}, source=source, source_log_id=source_log_id
     )
     return
+
+
+@celery_app.task(bind=True, name="workflows.flush_coalesced")
+def flush_coalesced_workflow(self, workflow_id: str, source: str = ""):
+    """
+    Run a workflow once with the events buffered during its coalescing window.
+    The batched run is queued in the fair scheduler like any other run.
+    """
+    events = drain_events(workflow_id)
+    if not events:
+        logger.info(f"No coalesced events to flush for workflow {workflow_id}.")
+        return
+    workflow = repository.mongo.workflow.find_by_id(workflow_id)
+    if not workflow:
+        logger.error(f"Workflow with ID {workflow_id} not found.")
+        return
+    store = get_payload_store()
+    payloads = []
+    for event in events:
+        payload = store.get(event["payload_ref"])
+        if payload is None:
+            logger.error(
+                f"Payload {event['payload_ref']} for workflow {workflow_id} not found."
+            )
+            continue
+        payloads.append(project_payload(payload, workflow.payload_fields))
+    if not payloads:
+        return
+    logger.info(f"Flushing {len(payloads)} coalesced events for workflow {workflow_id}")
+    enqueue_run(
+        workflow.organizationId,
+        source,
+        workflow_id=workflow_id,
+        payload_ref=store.put(merge_payloads(payloads)),
+        projected=True,
+        source=source,
+        source_log_id=events[0].get("source_log_id"),
+    )
+    return len(payloads)
+
+
+@celery_app.task(bind=True, name="workflows.schedule")
+def schedule_workflow_runs(self):
+    """
+    Release queued workflow runs to the workers (safety net for runs queued
+    while no run finished).
+    """
+    return schedule()
+
+
+@celery_app.task(bind=True, name="webhooks.requeue_deferred")
+def requeue_deferred_webhooks(self):
+    """
+    Move deferred webhook deliveries back to the ingest stream once the
+    workflow queue has room again.
+    """
+    return requeue_deferred()
+
+
+@celery_app.task(bind=True, name="payloads.purge")
+def purge_expired_payloads(self):
+    """
+    Remove expired entries from the payload store.
+    """
+    removed = get_payload_store().purge_expired()
+    logger.info(f"Purged {removed} expired payloads.")
+    return removed
+
+
+@celery_app.task(bind=True, name="emails.deliver_outbox")
+def deliver_email_outbox(self):
+    """
+    Send the emails waiting in the outbox.
+    """
+    return deliver_pending()
+
+
+@worker_ready.connect
+def ensure_indexes(**kwargs):
+    """
+    Create the indexes of the collections polled by the periodic tasks.
+    """
+    try:
+        repository.mongo.email_outbox.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Could not create the email outbox indexes: {e}")
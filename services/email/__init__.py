@@ -1,8 +1,30 @@
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
+import requests
 import resend
+from loguru import logger
+from pydantic import BaseModel
 
 DEFAULT_FROM_EMAIL = os.getenv("DEFAULT_FROM_EMAIL")
+# The provider accepts up to 100 emails per batch request.
+BATCH_SIZE = min(int(os.getenv("EMAIL_BATCH_SIZE", 100)), 100)
+BATCH_CONCURRENCY = int(os.getenv("EMAIL_BATCH_CONCURRENCY", 4))
+SEND_RETRIES = int(os.getenv("EMAIL_SEND_RETRIES", 3))
+RETRY_BACKOFF = float(os.getenv("EMAIL_RETRY_BACKOFF_SECONDS", 0.5))
+
+RETRYABLE_CODES = {"429", "500", "502", "503", "504"}
+
+
+class EmailResult(BaseModel):
+    to: str | list[str]
+    success: bool
+    id: str | None = None
+    error: str | None = None
+    attempts: int = 0
 
 
 def send_email(
@@ -28,3 +50,91 @@ def send_email(
     return resend.Emails.send(
         {"from": from_email, "to": to, "subject": subject, "html": html, "text": text}
     )
+
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, server errors and network failures are worth retrying."""
+    if isinstance(error, requests.ConnectionError | requests.Timeout):
+        return True
+    return str(getattr(error, "code", "")) in RETRYABLE_CODES
+
+
+def _with_retries(send, retries: int):
+    """Call `send` until it succeeds or fails with a non-retryable error."""
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return send(), attempt, None
+        except Exception as e:
+            if attempt > retries or not is_retryable(e):
+                return None, attempt, e
+            time.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+
+
+def _idempotency_key(messages: list[dict], key: str | None) -> str:
+    digest = hashlib.sha256(
+        json.dumps(messages, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+    return f"{key}-{digest[:32]}" if key else digest[:48]
+
+
+def _send_chunk(messages: list[dict], retries: int, key: str | None) -> list[EmailResult]:
+    response, attempts, error = _with_retries(
+        lambda: resend.Batch.send(
+            messages, {"idempotency_key": _idempotency_key(messages, key)}
+        ),
+        retries,
+    )
+    if error is None:
+        ids = [item.get("id") for item in (response or {}).get("data", [])]
+        ids += [None] * (len(messages) - len(ids))
+        return [
+            EmailResult(to=message["to"], success=True, id=email_id, attempts=attempts)
+            for message, email_id in zip(messages, ids, strict=False)
+        ]
+    if len(messages) == 1 or is_retryable(error):
+        # Retries are exhausted: splitting the batch would only multiply the
+        # requests to a throttled provider, fail the chunk and let the
+        # caller back off.
+        return [
+            EmailResult(to=message["to"], success=False, error=str(error), attempts=attempts)
+            for message in messages
+        ]
+    # One invalid message fails the whole batch: send them one by one to
+    # find out which recipients failed.
+    logger.warning(f"Batch of {len(messages)} emails failed ({error}), sending individually")
+    return [
+        result
+        for message in messages
+        for result in _send_chunk([message], retries, key)
+    ]
+
+
+def send_batch(
+    messages: list[dict],
+    concurrency: int = BATCH_CONCURRENCY,
+    retries: int = SEND_RETRIES,
+    idempotency_key: str | None = None,
+) -> list[EmailResult]:
+    """
+    Send emails through the batch endpoint of the Resend API.
+
+    Args:
+        messages (list[dict]): Emails with `to`, `subject`, `html` and/or `text`.
+            `from` defaults to DEFAULT_FROM_EMAIL.
+        concurrency (int): Batch requests in flight at once.
+        retries (int): Retries of a batch on rate limits, server and network errors.
+        idempotency_key (str): Prefix of the idempotency keys, so retried runs
+            do not send the same batch twice.
+
+    Returns:
+        list[EmailResult]: One result per message, in order.
+    """
+    messages = [{"from": DEFAULT_FROM_EMAIL, **message} for message in messages]
+    chunks = [messages[i : i + BATCH_SIZE] for i in range(0, len(messages), BATCH_SIZE)]
+    if not chunks:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as pool:
+        results = pool.map(lambda chunk: _send_chunk(chunk, retries, idempotency_key), chunks)
+        return [result for chunk_results in results for result in chunk_results]
@@ -0,0 +1,139 @@
+import hashlib
+import os
+import time
+from datetime import datetime, timedelta
+
+from loguru import logger
+
+from lib.cache import get_cache
+from models.mongo.email_outbox import EmailOutboxBase
+from models.mongo.mongo_base import tz_zone
+from repository import repository
+from services.email import BATCH_SIZE, DEFAULT_FROM_EMAIL, send_batch
+
+# Emails handed to the provider per minute, across all workers.
+RATE_LIMIT = int(os.getenv("EMAIL_OUTBOX_RATE_PER_MINUTE", 600))
+MAX_ATTEMPTS = int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", 5))
+RETRY_BASE = int(os.getenv("EMAIL_OUTBOX_RETRY_BASE_SECONDS", 60))
+MAX_RETRY_DELAY = int(os.getenv("EMAIL_OUTBOX_MAX_RETRY_DELAY_SECONDS", 60 * 60))
+# Emails claimed by a worker are claimed again if not sent within this time.
+LEASE_SECONDS = int(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", 300))
+
+
+def enqueue_email(
+    to: str,
+    subject: str = "",
+    html: str = "",
+    text: str = "",
+    kind: str | None = None,
+    from_email: str = DEFAULT_FROM_EMAIL,
+) -> str:
+    """
+    Store an email in the outbox and wake up a worker to deliver it.
+    If the worker cannot be reached, the periodic delivery picks it up.
+    Returns the id of the outbox entry.
+    """
+    from services.celery_jobs.tasks import deliver_email_outbox
+
+    if not to:
+        raise ValueError("Recipient email address is required.")
+    email = repository.mongo.email_outbox.create(
+        EmailOutboxBase(
+            to=to,
+            subject=subject,
+            html=html,
+            text=text,
+            kind=kind,
+            from_email=from_email,
+        )
+    )
+    try:
+        deliver_email_outbox.delay()
+    except Exception as e:
+        logger.warning(f"Could not schedule delivery of email {email.id}: {e}")
+    return str(email.id)
+
+
+def _budget_key() -> str:
+    return f"email_outbox_budget_{int(time.time() // 60)}"
+
+
+def _take_budget(count: int) -> int:
+    """Reserve up to `count` emails of the current minute's rate limit."""
+    cache = get_cache()
+    key = _budget_key()
+    pipeline = cache.pipeline()
+    pipeline.incrby(key, count)
+    pipeline.expire(key, 120)
+    used = pipeline.execute()[0]
+    granted = max(0, min(count, RATE_LIMIT - (used - count)))
+    if granted < count:
+        cache.decrby(key, count - granted)
+    return granted
+
+
+def _return_budget(count: int) -> None:
+    if count > 0:
+        get_cache().decrby(_budget_key(), count)
+
+
+def retry_delay(attempts: int) -> int:
+    return min(RETRY_BASE * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def deliver_pending(batch_size: int = BATCH_SIZE) -> int:
+    """
+    Send the emails due in the outbox, one batch request at a time, within
+    the rate limit. Failed emails are retried with exponential backoff and
+    marked as failed after MAX_ATTEMPTS. Returns the number of emails sent.
+    """
+    outbox = repository.mongo.email_outbox
+    sent = 0
+    while True:
+        budget = _take_budget(batch_size)
+        if not budget:
+            logger.info("Email rate limit reached, delivery continues next minute")
+            return sent
+        emails = outbox.claim_batch(budget, LEASE_SECONDS)
+        if len(emails) < budget:
+            _return_budget(budget - len(emails))
+        if not emails:
+            return sent
+        ids = ",".join(sorted(str(email.id) for email in emails))
+        try:
+            results = send_batch(
+                [
+                    {
+                        "from": email.from_email or DEFAULT_FROM_EMAIL,
+                        "to": email.to,
+                        "subject": email.subject,
+                        "html": email.html,
+                        "text": email.text,
+                    }
+                    for email in emails
+                ],
+                idempotency_key="outbox-" + hashlib.sha256(ids.encode("utf-8")).hexdigest()[:16],
+            )
+        except Exception:
+            # Make the emails due again now instead of after their lease,
+            # without counting an attempt.
+            outbox.release([email.id for email in emails])
+            _return_budget(len(emails))
+            raise
+        if len(results) < len(emails):
+            outbox.release([email.id for email in emails[len(results) :]])
+        now = datetime.now(tz_zone)
+        for email, result in zip(emails, results, strict=False):
+            attempts = email.attempts + 1
+            if result.success:
+                outbox.mark_sent(email.id, result.id, attempts)
+                sent += 1
+                continue
+            retry_at = None
+            if attempts < MAX_ATTEMPTS:
+                retry_at = now + timedelta(seconds=retry_delay(attempts))
+            else:
+                logger.error(f"Giving up on email {email.id} to {email.to}: {result.error}")
+            outbox.mark_failed(email.id, result.error or "", attempts, retry_at)
+        if len(emails) < batch_size:
+            return sent
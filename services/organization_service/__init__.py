@@ -12,7 +12,7 @@ from models.organization_user import (
     OrganizationUserRead,
 )
 from repository import repository
-from services.email import send_email
+from services.email.outbox import enqueue_email
 from templates.email.join_org import join_to_org_email
 
 TZ = os.getenv("TZ", "America/Mexico_City")
@@ -51,13 +51,14 @@ async def send_invite_to_org(
         token = create_invite_token(invitation)
 
         # Send the invitation email
-        send_email(
+        enqueue_email(
             html=join_to_org_email(
                 organization_name=org.name.capitalize(),
                 token=token,
             ),
             subject="Invitation to join RoadFlow Organization",
             to=user.email,
+            kind="org_invite",
         )
 
 
@@ -134,13 +135,14 @@ async def resend_invite_to_org(invitation_id: int) -> InvitationRead:
         {"expiresAt": datetime.now(tz=tz_zone) + timedelta(days=7)},
     )
     # Send the invitation email again
-    send_email(
+    enqueue_email(
         html=join_to_org_email(
             organization_name=invitation.organization.name.capitalize(),
             token=token,
         ),
         subject="Invitation to join RoadFlow Organization",
         to=invitation.email,
+        kind="org_invite",
     )
 
     return invitation
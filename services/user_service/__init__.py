@@ -6,7 +6,7 @@ from models.inputs.api import UserLogin
 from models.organization import OrganizationCreate, OrganizationRead
 from models.user import UserCreate, UserRead
 from repository import repository
-from services.email import send_email
+from services.email.outbox import enqueue_email
 from shared.roles import RoleEnum
 from templates.email.signup import signup_email
 
@@ -76,10 +76,11 @@ def send_validation_email(user: UserRead) -> None:
     if user.verified:
         raise ValueError("Email already verified.")
     validation_token = create_validation_token(user.id)
-    send_email(
+    enqueue_email(
         html=signup_email(name=user.first_name, token=validation_token),
         subject="Welcome to RoadFlow",
         to=user.email,
+        kind="signup_validation",
     )
 
 
@@ -0,0 +1,233 @@
+import json
+import os
+import socket
+import time
+
+from loguru import logger
+from redis.exceptions import ResponseError
+
+from lib import metrics
+from lib.cache import get_cache
+from lib.payload_store import get_payload_store, payload_preview
+from models.mongo.logs import LogBase
+from models.mongo.workflow import EventType
+from repository import repository
+from services.workflows import WorkflowService
+
+from .git_events import normalize_git_event
+from .idempotency import IDEMPOTENCY_TTL
+from .stream import STREAM, decode_entry
+
+GROUP = os.getenv("WEBHOOK_CONSUMER_GROUP", "webhook_consumers")
+BATCH_SIZE = int(os.getenv("WEBHOOK_CONSUMER_BATCH_SIZE", 50))
+BLOCK_MS = int(os.getenv("WEBHOOK_CONSUMER_BLOCK_MS", 5000))
+# Pending entries idle for longer than this are reclaimed from dead consumers.
+MIN_IDLE_MS = int(os.getenv("WEBHOOK_CONSUMER_MIN_IDLE_MS", 60 * 1000))
+MAX_ATTEMPTS = int(os.getenv("WEBHOOK_CONSUMER_MAX_ATTEMPTS", 5))
+
+DEAD_LETTER_STREAM = f"{STREAM}_dead"
+ATTEMPTS_KEY = f"{STREAM}_attempts"
+
+
+def _text(value) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _dispatched_key(delivery_id: str) -> str:
+    return f"webhook_dispatched_{delivery_id}"
+
+
+class WebhookConsumer:
+    """
+    Consumes the webhook ingest stream in batches: stores the payloads,
+    creates the input logs in one round trip and dispatches the workflows.
+
+    Entries are acknowledged once dispatched. Processing an entry again is
+    safe: its input log is keyed by delivery and the workflows it already
+    dispatched are recorded in Redis and skipped. Entries left pending by a
+    crashed consumer are reclaimed after `min_idle_ms`, and entries failing
+    `max_attempts` times are moved to a dead-letter stream.
+    """
+
+    def __init__(
+        self,
+        name: str | None = None,
+        group: str = GROUP,
+        stream: str = STREAM,
+        batch_size: int = BATCH_SIZE,
+        block_ms: int = BLOCK_MS,
+        min_idle_ms: int = MIN_IDLE_MS,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.group = group
+        self.stream = stream
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.min_idle_ms = min_idle_ms
+        self.max_attempts = max_attempts
+        self.cache = get_cache()
+
+    def ensure_group(self) -> None:
+        """Create the consumer group (and the stream) if needed."""
+        try:
+            self.cache.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def claim_stale(self) -> list[tuple]:
+        """Reclaim entries left pending by other consumers."""
+        result = self.cache.xautoclaim(
+            self.stream,
+            self.group,
+            self.name,
+            min_idle_time=self.min_idle_ms,
+            start_id="0-0",
+            count=self.batch_size,
+        )
+        entries = result[1] if result else []
+        deleted = [entry_id for entry_id, fields in entries if not fields]
+        if deleted:
+            self.cache.xack(self.stream, self.group, *deleted)
+        return [(entry_id, fields) for entry_id, fields in entries if fields]
+
+    def read_new(self) -> list[tuple]:
+        """Read new entries, blocking up to `block_ms`."""
+        response = self.cache.xreadgroup(
+            self.group,
+            self.name,
+            {self.stream: ">"},
+            count=self.batch_size,
+            block=self.block_ms,
+        )
+        return [entry for _, entries in response or [] for entry in entries]
+
+    def _dead_letter(self, entry_id, fields: dict, reason: str) -> None:
+        logger.error(f"Dead-lettering webhook entry {_text(entry_id)}: {reason}")
+        pipeline = self.cache.pipeline()
+        pipeline.xadd(DEAD_LETTER_STREAM, {**fields, "error": reason[:1000]})
+        pipeline.xack(self.stream, self.group, entry_id)
+        pipeline.hdel(ATTEMPTS_KEY, entry_id)
+        pipeline.execute()
+        metrics.increment("webhook_deliveries_dead_lettered")
+
+    def _failed(self, entry_id, fields: dict, error: Exception) -> None:
+        attempts = self.cache.hincrby(ATTEMPTS_KEY, entry_id, 1)
+        if attempts >= self.max_attempts:
+            self._dead_letter(entry_id, fields, str(error))
+            return
+        logger.warning(
+            f"Webhook entry {_text(entry_id)} failed (attempt {attempts}): {error}"
+        )
+
+    def _dispatched(self, delivery_id: str) -> set[str]:
+        """Workflows already dispatched for a delivery by an earlier attempt."""
+        return {_text(w) for w in self.cache.smembers(_dispatched_key(delivery_id))}
+
+    def _mark_dispatched(self, delivery_id: str, workflow_id: str) -> None:
+        key = _dispatched_key(delivery_id)
+        pipeline = self.cache.pipeline()
+        pipeline.sadd(key, str(workflow_id))
+        pipeline.expire(key, IDEMPOTENCY_TTL)
+        pipeline.execute()
+
+    @staticmethod
+    def _parse(entry_id, fields: dict) -> tuple[dict, dict]:
+        """Decode an entry and normalize its delivery, raising if it is malformed."""
+        delivery = decode_entry(fields)
+        body = json.loads(delivery["body"] or "{}")
+        if not isinstance(body, dict):
+            raise ValueError(f"body must be a JSON object, got {type(body).__name__}")
+        event = normalize_git_event(body, delivery["headers"])
+        delivery["id"] = f"{delivery['webhook_key']}:{delivery['delivery'] or _text(entry_id)}"
+        return delivery, event
+
+    def process(self, entries: list[tuple]) -> int:
+        """Process a batch of entries and return how many were dispatched."""
+        if not entries:
+            return 0
+        store = get_payload_store()
+        prepared = []
+        for entry_id, fields in entries:
+            try:
+                delivery, event = self._parse(entry_id, fields)
+            except Exception as e:
+                # Malformed deliveries will never succeed; do not retry them.
+                self._dead_letter(entry_id, fields, f"Malformed delivery: {e}")
+                continue
+            try:
+                payload_ref = store.put(event)
+            except Exception as e:
+                self._failed(entry_id, fields, e)
+                continue
+            delivery["preview"] = payload_preview(event)
+            prepared.append((entry_id, fields, delivery, payload_ref))
+        if not prepared:
+            return 0
+
+        try:
+            log_ids = repository.mongo.logs.upsert_by_delivery(
+                [
+                    LogBase(
+                        organizationId=delivery["org_id"],
+                        type="input",
+                        source=EventType.GIT_WEBHOOK.value,
+                        data=delivery["preview"],
+                        payload_ref=payload_ref,
+                        delivery_id=delivery["id"],
+                    )
+                    for _, _, delivery, payload_ref in prepared
+                ]
+            )
+        except Exception as e:
+            for entry_id, fields, _, _ in prepared:
+                self._failed(entry_id, fields, e)
+            return 0
+
+        dispatched = []
+        for (entry_id, fields, delivery, payload_ref), log_id in zip(
+            prepared, log_ids, strict=True
+        ):
+            try:
+                WorkflowService(
+                    org_id=delivery["org_id"], event=EventType.GIT_WEBHOOK.value
+                ).dispatch(
+                    payload_ref,
+                    source_log_id=str(log_id),
+                    skip=self._dispatched(delivery["id"]),
+                    on_dispatched=lambda workflow_id, key=delivery["id"]: (
+                        self._mark_dispatched(key, workflow_id)
+                    ),
+                )
+                dispatched.append(entry_id)
+            except Exception as e:
+                self._failed(entry_id, fields, e)
+        if dispatched:
+            pipeline = self.cache.pipeline()
+            pipeline.xack(self.stream, self.group, *dispatched)
+            pipeline.hdel(ATTEMPTS_KEY, *dispatched)
+            pipeline.execute()
+        logger.info(f"Dispatched {len(dispatched)}/{len(entries)} webhook deliveries")
+        return len(dispatched)
+
+    def run_once(self) -> int:
+        """Process stale entries first, otherwise the next batch of new ones."""
+        entries = self.claim_stale() or self.read_new()
+        return self.process(entries)
+
+    def run_forever(self) -> None:
+        """Consume the stream until interrupted."""
+        self.ensure_group()
+        logger.info(
+            f"Webhook consumer {self.name} listening on {self.stream} ({self.group})"
+        )
+        while True:
+            try:
+                self.run_once()
+            except KeyboardInterrupt:
+                logger.info(f"Webhook consumer {self.name} stopped")
+                return
+            except Exception as e:
+                logger.error(f"Webhook consumer {self.name} error: {e}")
+                time.sleep(1)
@@ -0,0 +1,160 @@
+from collections.abc import Mapping
+
+from helpers.payload import get_path
+
+MAX_COMMITS = 50
+MAX_FILES_PER_COMMIT = 50
+
+PROVIDER_EVENT_HEADERS = {
+    # Gitea also sends X-GitHub-Event for compatibility, so it is checked first.
+    "gitea": "x-gitea-event",
+    "gitlab": "x-gitlab-event",
+    "github": "x-github-event",
+}
+
+
+def detect_provider(payload: dict, headers: Mapping[str, str] | None = None) -> str:
+    """
+    Detect the git provider of a webhook from its headers, falling back to the payload shape.
+    """
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    for provider, header in PROVIDER_EVENT_HEADERS.items():
+        if header in headers:
+            return provider
+    if "object_kind" in payload:
+        return "gitlab"
+    if "compare_url" in payload:
+        return "gitea"
+    if "compare" in payload or "head_commit" in payload:
+        return "github"
+    return "unknown"
+
+
+def detect_event(
+    payload: dict, provider: str, headers: Mapping[str, str] | None = None
+) -> str:
+    """
+    Return the provider event name (`push`, `pull_request`, ...).
+    """
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    header = PROVIDER_EVENT_HEADERS.get(provider)
+    if provider == "gitlab":
+        return payload.get("object_kind") or "push"
+    if header and headers.get(header):
+        return headers[header].lower()
+    if "commits" in payload and "ref" in payload:
+        return "push"
+    return "unknown"
+
+
+def _branch_and_tag(ref: str | None) -> tuple[str | None, str | None]:
+    if not ref:
+        return None, None
+    if ref.startswith("refs/heads/"):
+        return ref.removeprefix("refs/heads/"), None
+    if ref.startswith("refs/tags/"):
+        return None, ref.removeprefix("refs/tags/")
+    return ref, None
+
+
+def _files(files: list | None) -> list[str]:
+    return (files or [])[:MAX_FILES_PER_COMMIT]
+
+
+def _commit(commit: dict) -> dict:
+    author = commit.get("author") or {}
+    return {
+        "id": commit.get("id"),
+        "message": commit.get("message"),
+        "timestamp": commit.get("timestamp"),
+        "url": commit.get("url"),
+        "author": {
+            "name": author.get("name"),
+            "email": author.get("email"),
+            "username": author.get("username"),
+        },
+        "added": _files(commit.get("added")),
+        "removed": _files(commit.get("removed")),
+        "modified": _files(commit.get("modified")),
+    }
+
+
+def _repository(payload: dict, provider: str) -> dict:
+    if provider == "gitlab":
+        project = payload.get("project") or {}
+        return {
+            "name": project.get("name"),
+            "full_name": project.get("path_with_namespace"),
+            "url": project.get("web_url"),
+            "default_branch": project.get("default_branch"),
+        }
+    repository = payload.get("repository") or {}
+    return {
+        "name": repository.get("name"),
+        "full_name": repository.get("full_name"),
+        "url": repository.get("html_url"),
+        "default_branch": repository.get("default_branch"),
+    }
+
+
+def _pusher(payload: dict, provider: str) -> dict:
+    if provider == "gitlab":
+        return {
+            "name": payload.get("user_name"),
+            "email": payload.get("user_email"),
+            "username": payload.get("user_username"),
+        }
+    pusher = payload.get("pusher") or {}
+    return {
+        "name": pusher.get("full_name") or pusher.get("name"),
+        "email": pusher.get("email"),
+        "username": pusher.get("login")
+        or pusher.get("username")
+        or get_path(payload, "sender.login"),
+    }
+
+
+def normalize_git_event(
+    payload: dict, headers: Mapping[str, str] | None = None
+) -> dict:
+    """
+    Turn a GitHub, GitLab or Gitea webhook payload into a compact canonical event.
+
+    Push events keep only the ref, repository, pusher and commit summaries;
+    tag pushes of every provider are `push` events whose `ref_type` is `tag`.
+    Other events keep provider metadata plus the original payload under `data`.
+    """
+    payload = payload or {}
+    provider = detect_provider(payload, headers)
+    event = detect_event(payload, provider, headers)
+    repository = _repository(payload, provider)
+    if event not in ("push", "tag_push"):
+        return {
+            "provider": provider,
+            "event": event,
+            "action": payload.get("action"),
+            "repository": repository,
+            "data": payload,
+        }
+    ref = payload.get("ref")
+    branch, tag = _branch_and_tag(ref)
+    if event == "tag_push" and tag is None:
+        branch, tag = None, branch
+    commits = payload.get("commits") or []
+    return {
+        "provider": provider,
+        "event": "push",
+        "ref": ref,
+        "ref_type": "tag" if tag else "branch" if branch else None,
+        "branch": branch,
+        "tag": tag,
+        "before": payload.get("before"),
+        "after": payload.get("after") or payload.get("checkout_sha"),
+        "compare_url": payload.get("compare") or payload.get("compare_url"),
+        "repository": repository,
+        "pusher": _pusher(payload, provider),
+        "total_commits": payload.get("total_commits_count")
+        or payload.get("total_commits")
+        or len(commits),
+        "commits": [_commit(commit) for commit in commits[:MAX_COMMITS]],
+    }
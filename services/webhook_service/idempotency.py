@@ -0,0 +1,47 @@
+import hashlib
+import os
+from collections.abc import Mapping
+
+from lib.cache import get_cache
+
+IDEMPOTENCY_TTL = int(os.getenv("WEBHOOK_IDEMPOTENCY_TTL_SECONDS", 60 * 60 * 24))
+
+# Headers that identify a delivery; providers keep them on redelivery.
+DELIVERY_ID_HEADERS = (
+    "x-github-delivery",
+    "x-gitea-delivery",
+    "x-gogs-delivery",
+    "x-gitlab-event-uuid",
+)
+
+
+def idempotency_key(headers: Mapping[str, str] | None, body: bytes) -> str:
+    """
+    Return the idempotency key of a delivery: the provider delivery id when
+    present, otherwise the sha256 of the raw body.
+    """
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    for header in DELIVERY_ID_HEADERS:
+        if headers.get(header):
+            return f"{header}:{headers[header]}"
+    return f"sha256:{hashlib.sha256(body).hexdigest()}"
+
+
+def _delivery_key(webhook_key: str, key: str) -> str:
+    return f"webhook_delivery_{webhook_key}_{key}"
+
+
+def claim_delivery(webhook_key: str, key: str, ttl: int = IDEMPOTENCY_TTL) -> bool:
+    """
+    Claim a delivery for processing. Returns False if it was already seen
+    within the TTL window.
+    """
+    return bool(get_cache().set(_delivery_key(webhook_key, key), "1", nx=True, ex=ttl))
+
+
+def release_delivery(webhook_key: str, key: str) -> None:
+    """
+    Forget a claimed delivery so that a redelivery is processed again
+    (used when processing fails).
+    """
+    get_cache().delete(_delivery_key(webhook_key, key))
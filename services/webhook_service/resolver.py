@@ -0,0 +1,61 @@
+import os
+
+from lib.cache import get_cache
+from lib.ttl_cache import TTLCache
+from repository import repository
+
+RESOLVER_TTL = int(os.getenv("WEBHOOK_RESOLVER_TTL_SECONDS", 60 * 60))
+# Unknown keys are cached for a shorter time so spam does not reach Postgres.
+RESOLVER_NEGATIVE_TTL = int(os.getenv("WEBHOOK_RESOLVER_NEGATIVE_TTL_SECONDS", 5 * 60))
+# The in-process tier cannot be invalidated from other processes; keep it short.
+RESOLVER_LOCAL_TTL = int(os.getenv("WEBHOOK_RESOLVER_LOCAL_TTL_SECONDS", 30))
+RESOLVER_LOCAL_SIZE = int(os.getenv("WEBHOOK_RESOLVER_LOCAL_SIZE", 10_000))
+
+# Cached value of keys that do not belong to any webhook.
+UNKNOWN = "unknown"
+_MISSING = object()
+
+_local = TTLCache(maxsize=RESOLVER_LOCAL_SIZE, ttl=RESOLVER_LOCAL_TTL)
+
+
+def _resolver_key(webhook_key: str) -> str:
+    return f"webhook_org_{webhook_key}"
+
+
+def _decode(value) -> int | None:
+    value = value.decode("utf-8") if isinstance(value, bytes) else str(value)
+    return None if value == UNKNOWN else int(value)
+
+
+async def resolve_org_id(webhook_key: str) -> int | None:
+    """
+    Resolve the organization of an input webhook key. Returns None for
+    unknown keys.
+
+    Lookups go through an in-process tier, then Redis, then Postgres; both
+    known and unknown keys are cached.
+    """
+    org_id = _local.get(webhook_key, _MISSING)
+    if org_id is not _MISSING:
+        return org_id
+    cache = get_cache()
+    cached = cache.get(_resolver_key(webhook_key))
+    if cached is not None:
+        org_id = _decode(cached)
+        _local.set(webhook_key, org_id)
+        return org_id
+    webhook = await repository.sql.input_webhook.get_by_key(webhook_key)
+    org_id = webhook.org_id if webhook else None
+    cache.set(
+        _resolver_key(webhook_key),
+        UNKNOWN if org_id is None else org_id,
+        ex=RESOLVER_TTL if org_id is not None else RESOLVER_NEGATIVE_TTL,
+    )
+    _local.set(webhook_key, org_id)
+    return org_id
+
+
+def invalidate_webhook_key(webhook_key: str) -> None:
+    """Forget the cached resolution of a webhook key."""
+    _local.delete(webhook_key)
+    get_cache().delete(_resolver_key(webhook_key))
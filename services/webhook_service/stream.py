@@ -0,0 +1,135 @@
+import json
+import os
+from collections.abc import Mapping
+
+from loguru import logger
+
+from lib.cache import get_cache
+from services.workflows.backpressure import check_admission
+
+STREAM = os.getenv("WEBHOOK_STREAM", "webhooks_ingest")
+STREAM_MAXLEN = int(os.getenv("WEBHOOK_STREAM_MAXLEN", 100_000))
+# Deliveries shed while the workflow queue is saturated wait here.
+DEFERRED_STREAM = f"{STREAM}_deferred"
+# Entry id where the previous requeue run stopped scanning.
+DEFERRED_CURSOR_KEY = f"{DEFERRED_STREAM}_cursor"
+
+# Headers the consumer needs to detect the provider and the event.
+FORWARDED_HEADER_PREFIXES = ("x-", "user-agent", "content-type")
+
+
+def forwarded_headers(headers: Mapping[str, str] | None) -> dict[str, str]:
+    """Keep the headers of a delivery that are relevant for normalization."""
+    return {
+        k.lower(): v
+        for k, v in (headers or {}).items()
+        if k.lower().startswith(FORWARDED_HEADER_PREFIXES)
+    }
+
+
+def enqueue_delivery(
+    webhook_key: str,
+    org_id: int,
+    delivery: str,
+    headers: Mapping[str, str] | None,
+    body: bytes,
+    stream: str = STREAM,
+) -> str:
+    """
+    Append a raw webhook delivery to the ingest stream (or the deferred
+    stream) and return its entry id.
+    """
+    entry_id = get_cache().xadd(
+        stream,
+        {
+            "webhook_key": webhook_key,
+            "org_id": org_id,
+            "delivery": delivery,
+            "headers": json.dumps(forwarded_headers(headers)),
+            "body": body or b"{}",
+        },
+        maxlen=STREAM_MAXLEN,
+        approximate=True,
+    )
+    return entry_id.decode("utf-8") if isinstance(entry_id, bytes) else entry_id
+
+
+def decode_entry(fields: Mapping) -> dict:
+    """Decode the fields of a stream entry written by `enqueue_delivery`."""
+    fields = {
+        (k.decode("utf-8") if isinstance(k, bytes) else k): v
+        for k, v in fields.items()
+    }
+
+    def text(name: str) -> str:
+        value = fields.get(name, b"")
+        return value.decode("utf-8") if isinstance(value, bytes) else value
+
+    return {
+        "webhook_key": text("webhook_key"),
+        "org_id": int(text("org_id")),
+        "delivery": text("delivery"),
+        "headers": json.loads(text("headers") or "{}"),
+        "body": text("body"),
+    }
+
+
+def deferred_depth() -> int:
+    """Number of deliveries waiting in the deferred stream."""
+    return get_cache().xlen(DEFERRED_STREAM)
+
+
+def _entry_id(entry_id: bytes | str) -> str:
+    return entry_id.decode("utf-8") if isinstance(entry_id, bytes) else entry_id
+
+
+def requeue_deferred(limit: int = 100, scan: int = 1000) -> int:
+    """
+    Move deferred deliveries back to the ingest stream, oldest first, for
+    the organizations that are admitted again. Entries are read `limit` at a
+    time; a run scans up to `scan` of them after where the previous run
+    stopped, wrapping around at the end of the stream, so deliveries behind
+    a backlog of rejected organizations are reached too.
+    Returns how many were moved.
+    """
+    cache = get_cache()
+    cursor = cache.get(DEFERRED_CURSOR_KEY)
+    if cursor is not None:
+        cursor = _entry_id(cursor)
+        ranges = [(f"({cursor}", "+"), ("-", cursor)]
+    else:
+        ranges = [("-", "+")]
+    moved = 0
+    scanned = 0
+    last_id = None
+    rejected: set[int] = set()
+    for start, end in ranges:
+        while scanned < scan:
+            entries = cache.xrange(
+                DEFERRED_STREAM, min=start, max=end, count=min(limit, scan - scanned)
+            )
+            if not entries:
+                break
+            scanned += len(entries)
+            for entry_id, fields in entries:
+                last_id = _entry_id(entry_id)
+                org_id = decode_entry(fields)["org_id"]
+                if org_id in rejected:
+                    continue
+                if not check_admission(org_id).admitted:
+                    rejected.add(org_id)
+                    continue
+                pipeline = cache.pipeline()
+                pipeline.xadd(STREAM, fields, maxlen=STREAM_MAXLEN, approximate=True)
+                pipeline.xdel(DEFERRED_STREAM, entry_id)
+                pipeline.execute()
+                moved += 1
+            start = f"({last_id}"
+    if scanned < scan:
+        # The whole stream was scanned: start from the oldest entry next time.
+        cache.delete(DEFERRED_CURSOR_KEY)
+    else:
+        cache.set(DEFERRED_CURSOR_KEY, last_id)
+    if moved:
+        logger.info(f"Requeued {moved} deferred webhook deliveries")
+    return moved
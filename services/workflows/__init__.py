@@ -1,16 +1,33 @@
 import asyncio
 import json
+import os
+import time
+from collections.abc import Callable, Collection
 
 from loguru import logger
+from pydantic import BaseModel, ValidationError
 
-from helpers.response_cleaner import clean_response
+from helpers.expressions import ExpressionError, evaluate, render_template
+from helpers.response_cleaner import parse_json_response
+from lib import metrics
+from lib.payload_store import get_payload_store, payload_preview
 from models.mongo.logs import LogBase
-from models.mongo.workflow import Workflow
+from models.mongo.workflow import NodeType, Workflow
 from repository import repository
 from services.agents import AgentCaller
+from services.agents.pool import config_version
 from utils.object_id import ObjectId
 
-from .tasks import run_task
+from .coalesce import buffer_event
+from .context import build_context, build_payload, compact_dumps, estimate_tokens
+from .node_cache import get_cached_result, set_cached_result
+from .output_schema import build_output_model
+from .routing import get_workflow_routes
+from .scheduler import enqueue_run
+from .tasks import run_task, validate_parameters
+
+NODE_TIMEOUT = float(os.getenv("WORKFLOW_NODE_TIMEOUT_SECONDS", 120))
+RUN_TIMEOUT = float(os.getenv("WORKFLOW_RUN_TIMEOUT_SECONDS", 60 * 15))
 
 
 class WorkflowService:
@@ -21,40 +38,76 @@ class WorkflowService:
         self.org_id = org_id
         self.event = event
 
-    def get_workflow(self) -> list[Workflow]:
+    def dispatch(
+        self,
+        payload_ref: str,
+        source_log_id: str,
+        skip: Collection[str] = (),
+        on_dispatched: Callable[[str], None] | None = None,
+    ):
         """
-        Get all workflows for a given organization ID.
+        Dispatch a stored payload to the head workflows subscribed to the event.
+        Runs are queued in the fair scheduler of the organization.
+        Workflows in `skip` are not dispatched again, and `on_dispatched` is
+        called with the id of each workflow once it is dispatched, so that a
+        retried delivery does not run the same workflow twice.
         """
-        return repository.mongo.workflow.get_main_workflows_by_org_id(
-            org_id=self.org_id, event=self.event
+        routes = get_workflow_routes(org_id=self.org_id, event=self.event)
+        logger.info(
+            f"Running workflows for organization ID {self.org_id} with event {self.event}: {len(routes)} workflows found."
         )
+        for route in routes:
+            workflow_id = route["id"]
+            if workflow_id in skip:
+                logger.info(f"Workflow {workflow_id} was already dispatched, skipping")
+                continue
+            if route.get("coalesce_window"):
+                buffer_event(
+                    workflow_id,
+                    window=route["coalesce_window"],
+                    payload_ref=payload_ref,
+                    source=self.event,
+                    source_log_id=source_log_id,
+                )
+                metrics.increment("workflow_events_coalesced", org_id=self.org_id)
+            else:
+                logger.info(f"Running workflow: {workflow_id}")
+                enqueue_run(
+                    self.org_id,
+                    self.event,
+                    workflow_id=workflow_id,
+                    payload_ref=payload_ref,
+                    source=self.event,
+                    source_log_id=source_log_id,
+                )
+            if on_dispatched:
+                on_dispatched(workflow_id)
 
-    def run(self, payload: dict = None):
+    def trigger(self, workflow_id: str, payload: dict) -> str:
         """
-        Run a specific workflow by its ID.
+        Queue a run of a workflow with `payload`, e.g. on a manual prompt.
+        Runs of interactive events go to the priority lane of the scheduler.
+        Returns the id of the input log of the run.
         """
-        from services.celery_jobs.tasks import run_workflow
-
+        payload_ref = get_payload_store().put(payload)
         log = repository.mongo.logs.create(
             LogBase(
                 organizationId=self.org_id,
                 type="input",
                 source=self.event,
-                data=payload or {},
+                data=payload_preview(payload),
+                payload_ref=payload_ref,
             )
         )
-        workflows = self.get_workflow()
-        logger.info(
-            f"Running workflows for organization ID {self.org_id} with event {self.event}: {len(workflows)} workflows found."
+        enqueue_run(
+            self.org_id,
+            self.event,
+            workflow_id=workflow_id,
+            payload_ref=payload_ref,
+            source=self.event,
+            source_log_id=str(log.id),
         )
-        for workflow in workflows:
-            logger.info(f"Running workflow: {workflow.id}")
-            run_workflow.delay(
-                workflow_id=str(workflow.id),
-                payload=payload,
-                source=self.event,
-                source_log_id=str(log.id),
-            )
+        return str(log.id)
 
     @staticmethod
     def run_workflow(
@@ -63,13 +116,17 @@ class WorkflowService:
         context: dict = None,
         source: str = "",
         source_log_id: str | None = None,
+        deadline: float | None = None,
     ):
         """
         Run a specific workflow
         This is a static method to allow running workflows without needing an instance.
+        `deadline` is the epoch time by which the whole chain must finish.
         """
         if context is None:
             context = {}
+        if deadline is None:
+            deadline = time.time() + RUN_TIMEOUT
         if not isinstance(workflow, Workflow):
             raise TypeError(
                 f"Expected an instance of Workflow, got {type(workflow).__name__}"
@@ -86,9 +143,19 @@ class WorkflowService:
                 context=context,
                 source=source,
                 source_log_id=source_log_id,
+                deadline=deadline,
+            )
+        if workflow.node_type:
+            return WorkflowService.run_rule(
+                workflow,
+                payload=payload,
+                context=context,
+                source=source,
+                source_log_id=source_log_id,
+                deadline=deadline,
             )
         agent_caller = AgentCaller.create(
-            org_id=workflow.organizationId, agent=workflow.agent
+            org_id=workflow.organizationId, agent=workflow.agent, ephemeral=True
         )
         if not agent_caller:
             logger.error(
@@ -107,15 +174,15 @@ class WorkflowService:
         ## Workflow Details
         User prompt: {workflow.prompt}
 
-        Context: {json.dumps(context, indent=2)}
+        Context: {build_context(context)}
 
         Input data to analyze and process:
-        {json.dumps(payload, indent=2)}
+        {build_payload(payload)}
 
         ## Next Task Details
         is task: {next_workflow.is_task if next_workflow else False}
-        Task schema details: {json.dumps(next_workflow.task.model_dump(), indent=2, default=str) if next_workflow is not None and next_workflow.task else "No task"}
-        Task parameters: {json.dumps(next_workflow.parameters, indent=2, default=str) if next_workflow is not None and next_workflow.parameters else "No parameters"}
+        Task schema details: {compact_dumps(next_workflow.task.model_dump()) if next_workflow is not None and next_workflow.task else "No task"}
+        Task parameters: {compact_dumps(next_workflow.parameters) if next_workflow is not None and next_workflow.parameters else "No parameters"}
         
         You should automatically fill the necessary parameters for the next task if it is a task and you have the required information to do so.
         
@@ -131,17 +198,71 @@ class WorkflowService:
         
         """
 
-        res = asyncio.run(agent_caller.generate(text=prompt))
-        try:
-            res = clean_response(res)
-            res = json.loads(res)
-            logger.debug(f"Workflow {workflow.id} response: {res}")
-        except json.JSONDecodeError:
-            logger.error(f"Failed to parse JSON response: {res}")
-            res = {
-                "error": "Invalid JSON response from agent",
-                "raw_response": res,
-            }
+        output_model = None
+        if workflow.structured_output:
+            output_model = build_output_model(
+                next_workflow.task
+                if next_workflow is not None and next_workflow.is_task
+                else None
+            )
+
+        prompt_tokens = estimate_tokens(prompt)
+        logger.info(
+            f"Workflow {workflow.id} prompt size: {len(prompt)} chars (~{prompt_tokens} tokens)"
+        )
+        cached = None
+        agent_version = 0
+        if workflow.cache_ttl_seconds:
+            agent_version = config_version(
+                workflow.organizationId, (workflow.agent or "").lower()
+            )
+            cached = get_cached_result(
+                str(workflow.id), workflow.cache_version or 0, prompt, agent_version
+            )
+        if cached is not None:
+            logger.info(f"Workflow {workflow.id} result served from cache")
+            metrics.increment("workflow_node_cache_hits", org_id=workflow.organizationId)
+            res = cached
+        else:
+            timeout = min(workflow.timeout_seconds or NODE_TIMEOUT, deadline - time.time())
+            if timeout <= 0:
+                WorkflowService.log_timeout(
+                    workflow, "Workflow run deadline exceeded", source, source_log_id
+                )
+                return
+            try:
+                res = asyncio.run(
+                    agent_caller.generate(
+                        text=prompt,
+                        timeout=timeout,
+                        hedge=bool(workflow.hedge),
+                        output_schema=output_model,
+                    )
+                )
+            except TimeoutError:
+                WorkflowService.log_timeout(
+                    workflow, f"Node timed out after {timeout:.0f}s", source, source_log_id
+                )
+                return
+            parsed = parse_json_response(res)
+            if parsed is None:
+                logger.error(f"Failed to parse JSON response: {res}")
+                res = {
+                    "error": "Invalid JSON response from agent",
+                    "raw_response": res,
+                }
+            else:
+                res = WorkflowService.validate_output(workflow, parsed, output_model)
+                logger.debug(f"Workflow {workflow.id} response: {res}")
+                if workflow.cache_ttl_seconds:
+                    set_cached_result(
+                        str(workflow.id),
+                        workflow.cache_version or 0,
+                        prompt,
+                        res,
+                        ttl=workflow.cache_ttl_seconds,
+                        agent_version=agent_version,
+                    )
 
         logger.info(f"Workflow {workflow.id} executed successfully: {res}")
         repository.mongo.logs.create(
@@ -152,6 +273,8 @@ class WorkflowService:
                 type="workflow",
                 source=source or "workflow_run",
                 source_id=ObjectId(source_log_id) if source_log_id else None,
+                prompt_tokens=prompt_tokens,
+                cache_hit=cached is not None if workflow.cache_ttl_seconds else None,
             )
         )
 
@@ -171,6 +294,7 @@ class WorkflowService:
                 context=context,
                 source=source,
                 source_log_id=source_log_id,
+                deadline=deadline,
             )
         return
 
@@ -181,6 +305,7 @@ class WorkflowService:
         context: dict = None,
         source: str = "",
         source_log_id: str | None = None,
+        deadline: float | None = None,
     ):
         """
         Run a specific workflow task
@@ -190,16 +315,50 @@ class WorkflowService:
             context = {}
         if payload is None:
             payload = {}
+        if deadline is not None and time.time() >= deadline:
+            WorkflowService.log_timeout(
+                workflow, "Workflow run deadline exceeded", source, source_log_id
+            )
+            return
         task_template = repository.mongo.task.find_by_id(workflow.task_template_id)
         if not task_template:
             logger.error(
                 f"Task template {workflow.task_template_id} not found for workflow {workflow.id}"
             )
             return
+        task_payload = workflow.parameters or payload
+        if task_template.parameters:
+            # The incoming payload, then the parameters suggested by the
+            # previous node, then the ones set on the workflow.
+            last_response = context.get("last_response")
+            suggested = last_response.get("next_task") if isinstance(last_response, dict) else None
+            task_payload, errors = validate_parameters(
+                task_template,
+                {
+                    **(payload if isinstance(payload, dict) else {}),
+                    **(suggested if isinstance(suggested, dict) else {}),
+                    **(workflow.parameters or {}),
+                },
+            )
+            if errors:
+                logger.error(
+                    f"Invalid parameters for task {task_template.id} of workflow {workflow.id}: {errors}"
+                )
+                repository.mongo.logs.create(
+                    LogBase(
+                        agent=workflow.agent,
+                        data=json.dumps({"error": "Invalid task parameters", "details": errors}),
+                        organizationId=workflow.organizationId,
+                        type="task",
+                        source=source or "task_run",
+                        source_id=ObjectId(source_log_id) if source_log_id else None,
+                    )
+                )
+                return
         logger.info(f"Running task {task_template.id} for workflow {workflow.id}")
         result = run_task(
             task_name=task_template.function_name,
-            payload=workflow.parameters or payload,
+            payload=task_payload,
             context=context,
             source=source,
             source_log_id=source_log_id,
@@ -227,9 +386,7 @@ class WorkflowService:
             context["prev_workflow"].append(
                 {
                     "workflow_id": str(workflow.id),
-                    "result": json.dumps(result, indent=2)
-                    if isinstance(result, dict)
-                    else result,
+                    "result": result,
                 }
             )
             return WorkflowService.run_workflow(
@@ -238,5 +395,108 @@ class WorkflowService:
                 context=context,
                 source=source,
                 source_log_id=source_log_id,
+                deadline=deadline,
             )
         return
+
+    @staticmethod
+    def run_rule(
+        workflow: Workflow,
+        payload: dict = None,
+        context: dict = None,
+        source: str = "",
+        source_log_id: str | None = None,
+        deadline: float | None = None,
+    ):
+        """
+        Run a condition or transform node locally, without calling the model.
+        A condition that does not hold, or fails to evaluate, stops the chain.
+        """
+        if context is None:
+            context = {}
+        variables = {
+            "payload": payload or {},
+            "context": context,
+            "last": context.get("last_response"),
+        }
+        try:
+            if workflow.node_type == NodeType.CONDITION:
+                passed = bool(evaluate(workflow.condition or "False", variables))
+                result = {"condition": workflow.condition, "passed": passed}
+            else:
+                result = render_template(workflow.mapping or {}, variables)
+                passed = True
+        except ExpressionError as e:
+            logger.error(f"Workflow {workflow.id} rule failed: {e}")
+            result = {"error": str(e)}
+            passed = False
+        repository.mongo.logs.create(
+            LogBase(
+                data=json.dumps(result, indent=2, default=str),
+                organizationId=workflow.organizationId,
+                type=NodeType(workflow.node_type).value,
+                source=source or "workflow_run",
+                source_id=ObjectId(source_log_id) if source_log_id else None,
+            )
+        )
+        if not passed:
+            logger.info(f"Workflow {workflow.id} condition not met, stopping the chain")
+            return
+        if not workflow.next_flow:
+            return
+        # Conditions pass the previous result through to the next node.
+        if workflow.node_type == NodeType.TRANSFORM:
+            context["last_response"] = result
+            if not context.get("prev_workflow"):
+                context["prev_workflow"] = []
+            context["prev_workflow"].append(
+                {
+                    "workflow_id": str(workflow.id),
+                    "result": result,
+                }
+            )
+        next_workflow = repository.mongo.workflow.get_with_task(workflow.next_flow)
+        return WorkflowService.run_workflow(
+            next_workflow,
+            payload=payload,
+            context=context,
+            source=source,
+            source_log_id=source_log_id,
+            deadline=deadline,
+        )
+
+    @staticmethod
+    def validate_output(
+        workflow: Workflow, output, output_model: type[BaseModel] | None
+    ):
+        """
+        Validate a parsed node output against its schema. Outputs that do not
+        match are kept as parsed, so the next node still gets what was answered.
+        """
+        if output_model is None:
+            return output
+        try:
+            return output_model.model_validate(output).model_dump(exclude_none=True)
+        except ValidationError as e:
+            logger.warning(f"Workflow {workflow.id} output does not match its schema: {e}")
+            return output
+
+    @staticmethod
+    def log_timeout(
+        workflow: Workflow, reason: str, source: str, source_log_id: str | None
+    ):
+        """
+        Log a node that was not run, or was cancelled, because of a timeout.
+        The rest of the chain is skipped.
+        """
+        logger.error(f"Workflow {workflow.id}: {reason}")
+        repository.mongo.logs.create(
+            LogBase(
+                agent=workflow.agent,
+                data=json.dumps({"error": reason}),
+                organizationId=workflow.organizationId,
+                type="workflow",
+                source=source or "workflow_run",
+                source_id=ObjectId(source_log_id) if source_log_id else None,
+            )
+        )
@@ -0,0 +1,99 @@
+import os
+
+from pydantic import BaseModel
+
+from lib.cache import get_cache
+from lib.celery import celery_app
+
+MAX_QUEUE_DEPTH = int(os.getenv("WORKFLOW_MAX_QUEUE_DEPTH", 1000))
+MAX_ORG_INFLIGHT = int(os.getenv("WORKFLOW_MAX_ORG_INFLIGHT", 100))
+RETRY_AFTER = int(os.getenv("WORKFLOW_RETRY_AFTER_SECONDS", 60))
+# In-flight counters expire so that runs lost by a crashed worker heal.
+INFLIGHT_TTL = int(os.getenv("WORKFLOW_INFLIGHT_TTL_SECONDS", 60 * 60))
+
+# Runs waiting in the fair scheduler queues, before reaching Celery.
+PENDING_KEY = "workflow_pending_runs"
+
+_RELEASE_RUN = """
+local inflight = redis.call('decr', KEYS[1])
+if inflight <= 0 then
+    redis.call('del', KEYS[1])
+end
+return inflight
+"""
+
+
+class Admission(BaseModel):
+    admitted: bool
+    reason: str = ""
+    retry_after: int = 0
+
+
+def _inflight_key(org_id: int) -> str:
+    return f"workflow_inflight_{org_id}"
+
+
+def pending_key(org_id: int | None = None) -> str:
+    """Counter of the runs waiting in the scheduler, globally or per organization."""
+    return PENDING_KEY if org_id is None else f"{PENDING_KEY}_{org_id}"
+
+
+def get_pending(org_id: int) -> int:
+    """Number of runs of an organization waiting in the scheduler."""
+    return max(int(get_cache().get(pending_key(org_id)) or 0), 0)
+
+
+def queue_depth() -> int:
+    """
+    Number of workflow runs waiting, in the scheduler queues or in the
+    Celery queue.
+    """
+    cache = get_cache()
+    pending = max(int(cache.get(PENDING_KEY) or 0), 0)
+    return pending + cache.llen(celery_app.conf.task_default_queue)
+
+
+def get_inflight(org_id: int) -> int:
+    """Number of queued or running workflow runs of an organization."""
+    value = get_cache().get(_inflight_key(org_id))
+    return max(int(value), 0) if value else 0
+
+
+def acquire_run(org_id: int) -> None:
+    """Count a dispatched workflow run of an organization."""
+    pipeline = get_cache().pipeline()
+    pipeline.incr(_inflight_key(org_id))
+    pipeline.expire(_inflight_key(org_id), INFLIGHT_TTL)
+    pipeline.execute()
+
+
+def release_run(org_id: int) -> None:
+    """
+    Release a finished workflow run of an organization. The counter is
+    removed once it drops to zero, in the same step as the decrement so that
+    a run acquired concurrently is not lost.
+    """
+    get_cache().eval(_RELEASE_RUN, 1, _inflight_key(org_id))
+
+
+def check_admission(org_id: int) -> Admission:
+    """
+    Decide whether new work of an organization should be admitted, based on
+    the number of waiting runs and the queued or running runs of the
+    organization.
+    """
+    depth = queue_depth()
+    if depth >= MAX_QUEUE_DEPTH:
+        return Admission(
+            admitted=False,
+            reason=f"Workflow queue is saturated ({depth} tasks)",
+            retry_after=RETRY_AFTER,
+        )
+    backlog = get_inflight(org_id) + get_pending(org_id)
+    if backlog >= MAX_ORG_INFLIGHT:
+        return Admission(
+            admitted=False,
+            reason=f"Organization has {backlog} workflow runs queued or running",
+            retry_after=RETRY_AFTER,
+        )
+    return Admission(admitted=True)
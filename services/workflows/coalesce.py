@@ -0,0 +1,90 @@
+import json
+import os
+import time
+
+from loguru import logger
+
+from lib.cache import get_cache
+
+# Extra lifetime of a window marker, so a lost flush does not block new windows.
+WINDOW_GRACE = int(os.getenv("WORKFLOW_COALESCE_GRACE_SECONDS", 60))
+MAX_WINDOW = int(os.getenv("WORKFLOW_COALESCE_MAX_WINDOW_SECONDS", 60 * 10))
+
+
+def _buffer_key(workflow_id: str) -> str:
+    return f"workflow_coalesce_{workflow_id}"
+
+
+def _window_key(workflow_id: str) -> str:
+    return f"workflow_coalesce_window_{workflow_id}"
+
+
+def buffer_event(
+    workflow_id: str,
+    window: int,
+    payload_ref: str,
+    source: str = "",
+    source_log_id: str | None = None,
+) -> bool:
+    """
+    Buffer an event for a workflow with a coalescing window.
+
+    The first event of a window schedules a flush `window` seconds later;
+    events arriving before the flush are merged into the same run.
+    Returns True if the event opened a new window.
+    """
+    from services.celery_jobs.tasks import flush_coalesced_workflow
+
+    window = min(int(window), MAX_WINDOW)
+    cache = get_cache()
+    member = json.dumps({"payload_ref": payload_ref, "source_log_id": source_log_id})
+    pipeline = cache.pipeline()
+    pipeline.zadd(_buffer_key(workflow_id), {member: time.time()})
+    pipeline.expire(_buffer_key(workflow_id), window * 2 + WINDOW_GRACE)
+    pipeline.execute()
+    opened = cache.set(
+        _window_key(workflow_id), "1", nx=True, ex=window + WINDOW_GRACE
+    )
+    if not opened:
+        logger.debug(f"Coalescing event {payload_ref} into open window of {workflow_id}")
+        return False
+    logger.info(f"Opened a {window}s coalescing window for workflow {workflow_id}")
+    flush_coalesced_workflow.apply_async(
+        kwargs={"workflow_id": workflow_id, "source": source}, countdown=window
+    )
+    return True
+
+
+def drain_events(workflow_id: str) -> list[dict]:
+    """
+    Atomically take the buffered events of a workflow, oldest first, and
+    close its window so the next event opens a new one.
+    """
+    pipeline = get_cache().pipeline()
+    pipeline.zrange(_buffer_key(workflow_id), 0, -1)
+    pipeline.delete(_buffer_key(workflow_id))
+    pipeline.delete(_window_key(workflow_id))
+    members, _, _ = pipeline.execute()
+    return [json.loads(member) for member in members]
+
+
+def merge_payloads(payloads: list[dict]) -> dict:
+    """
+    Merge the payloads of a coalesced window into a single batched payload.
+
+    A single payload is returned unchanged. Otherwise the events are kept in
+    arrival order without their commits, which are concatenated once.
+    """
+    if len(payloads) == 1:
+        return payloads[0]
+    commits = []
+    events = []
+    for payload in payloads:
+        commits.extend(payload.get("commits") or [])
+        events.append({k: v for k, v in payload.items() if k != "commits"})
+    return {
+        "batch": True,
+        "count": len(payloads),
+        "events": events,
+        "commits": commits,
+    }
@@ -0,0 +1,92 @@
+import json
+import math
+import os
+
+CHARS_PER_TOKEN = 4
+CONTEXT_KEEP_LAST = int(os.getenv("WORKFLOW_CONTEXT_KEEP_LAST", 2))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("WORKFLOW_CONTEXT_TOKEN_BUDGET", 4000))
+PAYLOAD_TOKEN_BUDGET = int(os.getenv("WORKFLOW_PAYLOAD_TOKEN_BUDGET", 8000))
+SUMMARY_MAX_CHARS = int(os.getenv("WORKFLOW_CONTEXT_SUMMARY_CHARS", 280))
+
+
+def compact_dumps(data) -> str:
+    """
+    Serialize data as compact JSON (no indentation, no extra whitespace).
+    """
+    return json.dumps(data, separators=(",", ":"), default=str, ensure_ascii=False)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token estimate for a prompt fragment (~4 characters per token).
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def truncate_text(text: str, max_chars: int) -> str:
+    """
+    Truncate a string to `max_chars`, marking the cut.
+    """
+    if len(text) <= max_chars:
+        return text
+    return f"{text[: max(max_chars - 15, 0)]}...[truncated]"
+
+
+def summarize_result(entry: dict, max_chars: int = SUMMARY_MAX_CHARS) -> dict:
+    """
+    Reduce a `prev_workflow` entry to its workflow id and a short preview of its result.
+    """
+    result = entry.get("result")
+    if isinstance(result, dict):
+        result = result.get("result", result)
+    text = result if isinstance(result, str) else compact_dumps(result)
+    return {
+        "workflow_id": entry.get("workflow_id"),
+        "summary": truncate_text(text, max_chars),
+    }
+
+
+def build_context(
+    context: dict,
+    keep_last: int = CONTEXT_KEEP_LAST,
+    token_budget: int = CONTEXT_TOKEN_BUDGET,
+) -> str:
+    """
+    Build the serialized context for a workflow prompt.
+
+    The last `keep_last` entries of `prev_workflow` are kept verbatim and older
+    ones are replaced by short summaries. `last_response` is left out when
+    it repeats the newest entry. If the result is still over `token_budget`,
+    whole entries are dropped oldest first, so the context stays valid JSON.
+    """
+    if not context:
+        return "{}"
+    history: list = context.get("prev_workflow") or []
+    split = max(len(history) - keep_last, 0)
+    entries = [*(summarize_result(entry) for entry in history[:split]), *history[split:]]
+
+    skipped = {"prev_workflow"}
+    if history and context.get("last_response") == history[-1].get("result"):
+        skipped.add("last_response")
+    compacted = {k: v for k, v in context.items() if k not in skipped}
+    if history:
+        compacted["prev_workflow"] = entries
+    serialized = compact_dumps(compacted)
+
+    max_chars = token_budget * CHARS_PER_TOKEN
+    while len(serialized) > max_chars and entries:
+        entries.pop(0)
+        serialized = compact_dumps(compacted)
+    if len(serialized) > max_chars:
+        # The rest of the context alone is over budget: pass it as a string.
+        return compact_dumps({"truncated": truncate_text(serialized, max_chars - 20)})
+    return serialized
+
+
+def build_payload(payload: dict, token_budget: int = PAYLOAD_TOKEN_BUDGET) -> str:
+    """
+    Serialize the workflow input payload compactly, capped at `token_budget`.
+    """
+    return truncate_text(compact_dumps(payload or {}), token_budget * CHARS_PER_TOKEN)
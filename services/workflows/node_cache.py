@@ -0,0 +1,75 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+from loguru import logger
+
+from lib.cache import get_cache
+
+# Entries larger than this are not cached.
+MAX_ENTRY_BYTES = int(os.getenv("WORKFLOW_NODE_CACHE_MAX_ENTRY_BYTES", 64 * 1024))
+# Least recently used entries are evicted beyond this many.
+MAX_ENTRIES = int(os.getenv("WORKFLOW_NODE_CACHE_MAX_ENTRIES", 10000))
+MAX_TTL = int(os.getenv("WORKFLOW_NODE_CACHE_MAX_TTL_SECONDS", 60 * 60 * 24 * 7))
+
+INDEX_KEY = "workflow_node_cache_index"
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def prompt_hash(prompt: str) -> str:
+    """Hash of a prompt, ignoring differences in whitespace."""
+    normalized = _WHITESPACE.sub(" ", prompt).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def cache_key(node_id: str, version: int, prompt: str, agent_version: int = 0) -> str:
+    """
+    Key of a node result. `version` is bumped on edits of the node and
+    `agent_version` on edits of the configuration of its agent.
+    """
+    return f"workflow_node_cache_{node_id}_{version}_{agent_version}_{prompt_hash(prompt)}"
+
+
+def get_cached_result(
+    node_id: str, version: int, prompt: str, agent_version: int = 0
+) -> dict | None:
+    """Cached result of a node for a prompt, or None."""
+    cache = get_cache()
+    key = cache_key(node_id, version, prompt, agent_version)
+    value = cache.get(key)
+    if value is None:
+        return None
+    cache.zadd(INDEX_KEY, {key: time.time()})
+    return json.loads(value)
+
+
+def set_cached_result(
+    node_id: str,
+    version: int,
+    prompt: str,
+    result: dict,
+    ttl: int,
+    agent_version: int = 0,
+) -> bool:
+    """
+    Cache the result of a node for `ttl` seconds. Returns False if the result
+    is too large to be cached.
+    """
+    value = json.dumps(result)
+    if len(value.encode("utf-8")) > MAX_ENTRY_BYTES:
+        logger.debug(f"Result of node {node_id} too large to be cached")
+        return False
+    cache = get_cache()
+    key = cache_key(node_id, version, prompt, agent_version)
+    pipeline = cache.pipeline()
+    pipeline.set(key, value, ex=min(int(ttl), MAX_TTL))
+    pipeline.zadd(INDEX_KEY, {key: time.time()})
+    pipeline.zcard(INDEX_KEY)
+    size = pipeline.execute()[-1]
+    if size > MAX_ENTRIES:
+        evicted = [k for k, _ in cache.zpopmin(INDEX_KEY, size - MAX_ENTRIES)]
+        cache.delete(*evicted)
+    return True
@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field, create_model
+
+from models.mongo.task import Task
+
+from .tasks.parameters import parameter_field
+
+
+def build_task_model(task: Task) -> type[BaseModel]:
+    """Model of the parameters of a task."""
+    fields = {p.name: parameter_field(p, schema=True) for p in task.parameters}
+    return create_model("TaskParameters", **fields)
+
+
+def build_output_model(task: Task | None = None) -> type[BaseModel]:
+    """
+    Model of the output of an agent node. When the next node is a task, its
+    parameters are requested in `next_task`.
+    """
+    fields = {
+        "result": (str, Field(..., description="The result of the workflow execution")),
+        "context": (
+            str | None,
+            Field(None, description="Any additional context that should be returned"),
+        ),
+    }
+    if task is not None and task.parameters:
+        fields["next_task"] = (
+            build_task_model(task),
+            Field(..., description="Parameters of the next task"),
+        )
+    return create_model("WorkflowNodeOutput", **fields)
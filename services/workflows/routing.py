@@ -0,0 +1,73 @@
+import json
+import os
+from collections import defaultdict
+
+from loguru import logger
+
+from lib.cache import get_cache
+from repository import repository
+
+ROUTES_TTL = int(os.getenv("WORKFLOW_ROUTES_TTL_SECONDS", 60 * 60 * 24))
+BUILT_FIELD = "__built__"
+
+
+def _routes_key(org_id: int) -> str:
+    return f"workflow_routes_{org_id}"
+
+
+def rebuild_org_routes(org_id: int) -> dict[str, list[dict]]:
+    """
+    Rebuild the (event -> head workflow routes) table of an organization.
+
+    Each route holds the workflow id and its coalescing window. The table is
+    stored as a Redis hash with one field per event plus a marker field, so
+    organizations without routes are cached too.
+    """
+    routes: dict[str, list[dict]] = defaultdict(list)
+    for workflow in repository.mongo.workflow.get_head_workflow_routes(org_id=org_id):
+        route = {
+            "id": str(workflow["_id"]),
+            "coalesce_window": workflow.get("coalesce_window_seconds") or 0,
+        }
+        for event in workflow.get("events") or []:
+            routes[event].append(route)
+    cache = get_cache()
+    key = _routes_key(org_id)
+    pipeline = cache.pipeline()
+    pipeline.delete(key)
+    pipeline.hset(
+        key,
+        mapping={
+            BUILT_FIELD: "1",
+            **{event: json.dumps(items) for event, items in routes.items()},
+        },
+    )
+    pipeline.expire(key, ROUTES_TTL)
+    pipeline.execute()
+    logger.info(f"Rebuilt workflow routes for organization {org_id}: {dict(routes)}")
+    return dict(routes)
+
+
+def get_workflow_routes(org_id: int, event: str) -> list[dict]:
+    """
+    Get the routes (`id`, `coalesce_window`) of the enabled head workflows
+    subscribed to an event.
+
+    This is a single Redis read; the table is rebuilt from MongoDB on a miss.
+    """
+    cached, built = get_cache().hmget(_routes_key(org_id), [event, BUILT_FIELD])
+    if built is None:
+        return rebuild_org_routes(org_id).get(event, [])
+    if not cached:
+        return []
+    return json.loads(cached)
+
+
+def rebuild_all_routes() -> int:
+    """
+    Rebuild the routing tables of every organization with head workflows.
+    """
+    org_ids = repository.mongo.workflow.get_head_workflow_org_ids()
+    for org_id in org_ids:
+        rebuild_org_routes(org_id)
+    return len(org_ids)
@@ -0,0 +1,191 @@
+import json
+import os
+import uuid
+
+from loguru import logger
+
+from lib.cache import get_cache
+from lib.celery import WORKER_CONCURRENCY, celery_app
+from models.mongo.workflow import EventType
+
+from .backpressure import acquire_run, get_inflight, pending_key
+
+# Lanes are drained in order: interactive events go ahead of background ones.
+PRIORITY_LANE = "priority"
+DEFAULT_LANE = "default"
+LANES = (PRIORITY_LANE, DEFAULT_LANE)
+PRIORITY_EVENTS = {EventType.MANUAL_PROMPT.value}
+
+# Runs are released to Celery only while its queue is shorter than this, so
+# the order of execution is decided here rather than by the Celery queue.
+DISPATCH_BACKLOG = int(os.getenv("WORKFLOW_DISPATCH_BACKLOG", WORKER_CONCURRENCY * 2))
+ORG_CONCURRENCY = int(os.getenv("WORKFLOW_ORG_CONCURRENCY", 5))
+LOCK_TTL_MS = int(os.getenv("WORKFLOW_SCHEDULER_LOCK_MS", 5000))
+
+LOCK_KEY = "workflow_scheduler_lock"
+DEFICIT_KEY = "workflow_queue_deficit"
+
+# Forget an organization only if its queue is still empty, so a run queued
+# concurrently is not stranded.
+_RETIRE_ORG = """
+if redis.call('llen', KEYS[1]) == 0 then
+    redis.call('srem', KEYS[2], ARGV[1])
+    redis.call('hdel', KEYS[3], ARGV[2])
+    return 1
+end
+return 0
+"""
+
+# Release the scheduler lock only if this process still holds it.
+_RELEASE_LOCK = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+def _parse_org_map(value: str) -> dict[int, float]:
+    """Parse an `org_id:value,org_id:value` setting."""
+    result = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        org_id, _, number = item.partition(":")
+        result[int(org_id)] = float(number)
+    return result
+
+
+ORG_CONCURRENCY_OVERRIDES = _parse_org_map(os.getenv("WORKFLOW_ORG_CONCURRENCY_OVERRIDES", ""))
+ORG_WEIGHTS = _parse_org_map(os.getenv("WORKFLOW_ORG_WEIGHTS", ""))
+
+
+def _queue_key(lane: str, org_id: int) -> str:
+    return f"workflow_queue_{lane}_{org_id}"
+
+
+def _orgs_key(lane: str) -> str:
+    return f"workflow_queue_orgs_{lane}"
+
+
+def _cursor_key(lane: str) -> str:
+    return f"workflow_queue_cursor_{lane}"
+
+
+def lane_for(event: str) -> str:
+    """Lane of the runs triggered by an event."""
+    return PRIORITY_LANE if event in PRIORITY_EVENTS else DEFAULT_LANE
+
+
+def org_concurrency(org_id: int) -> int:
+    """Maximum number of in-flight runs of an organization."""
+    return int(ORG_CONCURRENCY_OVERRIDES.get(org_id, ORG_CONCURRENCY))
+
+
+def org_weight(org_id: int) -> float:
+    """Runs an organization may dispatch per scheduling round."""
+    return ORG_WEIGHTS.get(org_id, 1.0)
+
+
+def enqueue_run(org_id: int, event: str, **run) -> None:
+    """
+    Queue a workflow run of an organization and try to dispatch it.
+    `run` holds the keyword arguments of the `workflows.run` task.
+    """
+    lane = lane_for(event)
+    pipeline = get_cache().pipeline()
+    pipeline.rpush(_queue_key(lane, org_id), json.dumps(run))
+    pipeline.sadd(_orgs_key(lane), org_id)
+    pipeline.incr(pending_key())
+    pipeline.incr(pending_key(org_id))
+    pipeline.execute()
+    schedule()
+
+
+def _has_capacity(cache) -> bool:
+    return cache.llen(celery_app.conf.task_default_queue) < DISPATCH_BACKLOG
+
+
+def _dispatch(cache, org_id: int, run: dict) -> None:
+    from services.celery_jobs.tasks import run_workflow
+
+    acquire_run(org_id)
+    pipeline = cache.pipeline()
+    pipeline.decr(pending_key())
+    pipeline.decr(pending_key(org_id))
+    pipeline.execute()
+    run_workflow.delay(org_id=org_id, **run)
+
+
+def _rotate(org_ids: list[int], cursor: int | None) -> list[int]:
+    """Start the round after the last organization served."""
+    if cursor is None:
+        return org_ids
+    return [o for o in org_ids if o > cursor] + [o for o in org_ids if o <= cursor]
+
+
+def _drain_lane(cache, lane: str) -> int:
+    """
+    Deficit round-robin over the organizations of a lane: every round each
+    backlogged organization earns its weight in credits and dispatches one
+    run per credit, within its concurrency cap and the global backlog.
+    """
+    dispatched = 0
+    while True:
+        org_ids = sorted(int(o) for o in cache.smembers(_orgs_key(lane)))
+        if not org_ids:
+            return dispatched
+        cursor = cache.get(_cursor_key(lane))
+        progressed = False
+        for org_id in _rotate(org_ids, int(cursor) if cursor else None):
+            if not _has_capacity(cache):
+                return dispatched
+            field = f"{lane}_{org_id}"
+            weight = org_weight(org_id)
+            # Credits do not pile up while an organization is at its cap.
+            deficit = min(
+                float(cache.hget(DEFICIT_KEY, field) or 0) + weight, max(weight, 1)
+            )
+            cap = org_concurrency(org_id)
+            queue = _queue_key(lane, org_id)
+            while deficit >= 1 and get_inflight(org_id) < cap and _has_capacity(cache):
+                raw = cache.lpop(queue)
+                if raw is None:
+                    break
+                _dispatch(cache, org_id, json.loads(raw))
+                deficit -= 1
+                dispatched += 1
+                progressed = True
+            if not cache.eval(
+                _RETIRE_ORG, 3, queue, _orgs_key(lane), DEFICIT_KEY, org_id, field
+            ):
+                cache.hset(DEFICIT_KEY, field, deficit)
+            cache.set(_cursor_key(lane), org_id)
+        if not progressed:
+            return dispatched
+
+
+def schedule() -> int:
+    """
+    Release queued runs to Celery, priority lane first. Only one process
+    schedules at a time; returns how many runs were dispatched.
+    """
+    cache = get_cache()
+    token = uuid.uuid4().hex
+    if not cache.set(LOCK_KEY, token, nx=True, px=LOCK_TTL_MS):
+        return 0
+    try:
+        dispatched = 0
+        for lane in LANES:
+            if not _has_capacity(cache):
+                break
+            dispatched += _drain_lane(cache, lane)
+        if dispatched:
+            logger.info(f"Scheduler dispatched {dispatched} workflow runs")
+        return dispatched
+    finally:
+        cache.eval(_RELEASE_LOCK, 1, LOCK_KEY, token)
+
+
+def pending_runs(org_id: int) -> dict[str, int]:
+    """Queued runs of an organization per lane."""
+    cache = get_cache()
+    return {lane: cache.llen(_queue_key(lane, org_id)) for lane in LANES}
@@ -1,9 +1,15 @@
-import importlib
-from typing import Dict, Optional
-
 from loguru import logger
 from pydantic import BaseModel
 
+from .registry import (  # noqa: F401
+    get_task,
+    load_tasks,
+    register_task,
+    validate_task,
+    validate_task_templates,
+)
+from .validation import validate_parameters  # noqa: F401
+
 
 def run_task(
     task_name: str,
@@ -17,17 +23,13 @@ def run_task(
     """
     if context is None:
         context = {}
-    module = importlib.import_module(f"services.workflows.tasks.{task_name}")
-    if not hasattr(module, "run"):
-        logger.error(f"Task {task_name} does not have a run function.")
-        return
-    run_function = module.run
-    if not callable(run_function):
-        logger.error(f"Task {task_name} run is not callable.")
+    task = get_task(task_name)
+    if task is None:
+        logger.error(f"Task {task_name} is not registered.")
         return
     try:
         logger.info(f"Running task: {task_name}")
-        res = run_function(
+        res = task.run(
             payload=payload,
             context=context,
             source=source,
@@ -39,3 +41,6 @@ def run_task(
     except Exception as e:
         logger.error(f"Error running task {task_name}: {e}")
         raise e
+
+
+load_tasks()
@@ -1,10 +1,30 @@
 
+import json
+
 from loguru import logger
 
+from models.mongo.task import Parameter, ParameterType
 from models.response.task import TaskResponse
-from services.email import send_email
+from services.email import send_batch
+
+from .registry import register_task
 
 
+@register_task(
+    "email",
+    title="Send email",
+    description="Email the result of the previous node.",
+    parameters=[
+        Parameter(
+            title="To",
+            name="to",
+            type=ParameterType.STRING,
+            description="Comma separated recipients",
+            required=True,
+        ),
+        Parameter(title="Subject", name="subject", type=ParameterType.STRING),
+    ],
+)
 def run(
     payload: dict,
     context: dict = None,
@@ -34,23 +54,30 @@ def run(
         task_data: dict = agent_response.get("next_task", {})
         logger.info(f"Agent response: {agent_response}")
         logger.info(f"Task data: {task_data}")
-        for email in emails:
-            if not email:
-                continue
-            # Here you would implement the actual email sending logic.
-            # For example, using an email sending service or library.
-            logger.info(f"Sending email to: {email}")
-            result = send_email(
-                to=email,
-                subject=payload.get("subject")
-                or task_data.get("subject", "No Subject"),
-                text=agent_response.get("result", ""),
-            )
-            logger.info(f"Emails sent successfully to: {email}: {result}")
+        emails = [email.strip() for email in emails if email and email.strip()]
+        subject = payload.get("subject") or task_data.get("subject", "No Subject")
+        text = agent_response.get("result", "")
+        if not isinstance(text, str):
+            text = json.dumps(text, indent=2)
+        logger.info(f"Sending email to {len(emails)} recipients")
+        results = send_batch(
+            [{"to": email, "subject": subject, "text": text} for email in emails],
+            idempotency_key=source_log_id,
+        )
+        failed = [result.to for result in results if not result.success]
+        if failed:
+            logger.error(f"Failed to send email to: {failed}")
         return TaskResponse(
-            success=True,
-            message="Email sent successfully",
-            payload={"emails": emails},
+            success=not failed,
+            message=(
+                f"Email sent to {len(emails) - len(failed)}/{len(emails)} recipients"
+                if failed
+                else "Email sent successfully"
+            ),
+            payload={
+                "emails": emails,
+                "results": [result.model_dump(exclude_none=True) for result in results],
+            },
         )
     except Exception as e:
         logger.error(f"Error sending email: {str(e)}")
@@ -0,0 +1,106 @@
+import json
+from typing import Annotated, Any, Literal
+
+from pydantic import BeforeValidator, Field, WithJsonSchema
+
+from models.mongo.task import Parameter, ParameterType
+
+
+def _decode_json(value: Any) -> Any:
+    return json.loads(value) if isinstance(value, str) else value
+
+
+# Response schemas cannot describe free-form objects, so they are requested
+# as JSON encoded strings and decoded on validation.
+JsonObject = Annotated[
+    dict,
+    BeforeValidator(_decode_json),
+    WithJsonSchema({"type": "string", "description": "JSON encoded object"}),
+]
+
+PARAMETER_TYPES: dict[ParameterType, Any] = {
+    ParameterType.STRING: str,
+    ParameterType.INTEGER: int,
+    ParameterType.BOOLEAN: bool,
+    ParameterType.FLOAT: float,
+    ParameterType.OBJECT: dict,
+    ParameterType.ARRAY: list,
+}
+
+# Types of the parameters requested in model response schemas.
+SCHEMA_PARAMETER_TYPES: dict[ParameterType, Any] = {
+    **PARAMETER_TYPES,
+    ParameterType.OBJECT: JsonObject,
+    ParameterType.ARRAY: list[str],
+}
+
+
+def _repair_string(value: Any) -> Any:
+    if isinstance(value, int | float | bool):
+        return str(value)
+    if isinstance(value, list) and all(isinstance(v, str) for v in value):
+        return ",".join(value)
+    return value
+
+
+def _repair_array(value: Any) -> Any:
+    if not isinstance(value, str):
+        return value
+    if value.strip().startswith("["):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            pass
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def _repair_object(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError:
+            return value
+    return value
+
+
+_REPAIRS = {
+    ParameterType.STRING: _repair_string,
+    ParameterType.ARRAY: _repair_array,
+    ParameterType.OBJECT: _repair_object,
+}
+
+
+def _match_option(options: list):
+    """Match a value to one of the options, ignoring case and whitespace."""
+
+    def repair(value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        normalized = value.strip().lower()
+        for option in options:
+            if isinstance(option, str) and option.lower() == normalized:
+                return option
+        return value
+
+    return repair
+
+
+def parameter_field(parameter: Parameter, schema: bool = False) -> tuple[Any, Any]:
+    """
+    Pydantic field of a task parameter, repairing values towards the declared
+    type before validation. With `schema` the field can also be requested in
+    a model response schema, which only describes string options.
+    """
+    types = SCHEMA_PARAMETER_TYPES if schema else PARAMETER_TYPES
+    annotation = types[parameter.type]
+    if parameter.type in _REPAIRS:
+        annotation = Annotated[annotation, BeforeValidator(_REPAIRS[parameter.type])]
+    option_types = str if schema else str | int | float | bool
+    if parameter.options and all(isinstance(o, option_types) for o in parameter.options):
+        annotation = Annotated[
+            Literal[tuple(parameter.options)], BeforeValidator(_match_option(parameter.options))
+        ]
+    description = parameter.description or parameter.title
+    if parameter.required:
+        return annotation, Field(..., description=description)
+    return annotation | None, Field(parameter.default, description=description)
@@ -0,0 +1,109 @@
+import importlib
+import pkgutil
+from collections.abc import Callable
+from pathlib import Path
+
+from loguru import logger
+from pydantic import BaseModel
+
+from models.mongo.task import Parameter, TaskBase
+from repository import repository
+
+
+class RegisteredTask(BaseModel):
+    name: str
+    run: Callable
+    title: str = ""
+    description: str = ""
+    parameters: list[Parameter] = []
+
+
+TASKS: dict[str, RegisteredTask] = {}
+
+
+def register_task(
+    name: str,
+    title: str = "",
+    description: str = "",
+    parameters: list[Parameter] | None = None,
+):
+    """
+    Register the decorated function as the `run` of a task, with the
+    parameters its templates must declare.
+    """
+
+    def decorator(run: Callable) -> Callable:
+        if name in TASKS and TASKS[name].run is not run:
+            raise ValueError(f"Task {name} is already registered")
+        TASKS[name] = RegisteredTask(
+            name=name,
+            run=run,
+            title=title or name.replace("_", " ").title(),
+            description=description,
+            parameters=parameters or [],
+        )
+        return run
+
+    return decorator
+
+
+def load_tasks() -> dict[str, RegisteredTask]:
+    """Import every task module of the package so that they register."""
+    package = Path(__file__).parent
+    for module in pkgutil.iter_modules([str(package)]):
+        if module.name != "registry":
+            importlib.import_module(f"{__package__}.{module.name}")
+    return TASKS
+
+
+def get_task(name: str) -> RegisteredTask | None:
+    return TASKS.get(name)
+
+
+def validate_task(task: TaskBase) -> list[str]:
+    """
+    Check a task template against the registry. Returns the problems found:
+    an unknown function, parameters the task does not declare, parameters
+    of the wrong type and required parameters missing from the template.
+    """
+    registered = get_task(task.function_name)
+    if registered is None:
+        return [
+            f"Task function '{task.function_name}' is not registered. "
+            f"Available tasks: {sorted(TASKS)}"
+        ]
+    errors = []
+    declared = {p.name: p for p in registered.parameters}
+    for parameter in task.parameters:
+        expected = declared.get(parameter.name)
+        if expected is None:
+            errors.append(
+                f"Parameter '{parameter.name}' is not declared by task '{task.function_name}'"
+            )
+        elif expected.type != parameter.type:
+            errors.append(
+                f"Parameter '{parameter.name}' must be of type {expected.type.value}, "
+                f"got {parameter.type.value}"
+            )
+    names = {p.name for p in task.parameters}
+    for parameter in registered.parameters:
+        if parameter.required and parameter.name not in names:
+            errors.append(f"Required parameter '{parameter.name}' is missing")
+    return errors
+
+
+def validate_task_templates() -> dict[str, list[str]]:
+    """
+    Check every task template stored in Mongo against the registry and log
+    the invalid ones. Returns the problems per template id.
+    """
+    invalid = {}
+    for task in repository.mongo.task.get_all_tasks():
+        errors = validate_task(task)
+        if errors:
+            invalid[str(task.id)] = errors
+            logger.error(f"Task template {task.id} ({task.function_name}) is invalid: {errors}")
+    logger.info(
+        f"Validated task templates against {len(TASKS)} registered tasks: {len(invalid)} invalid"
+    )
+    return invalid
@@ -0,0 +1,42 @@
+import json
+from functools import lru_cache
+
+from pydantic import BaseModel, ValidationError, create_model
+
+from models.mongo.task import Parameter, TaskBase
+
+from .parameters import parameter_field
+
+
+@lru_cache(maxsize=256)
+def _compile(parameters_json: str) -> type[BaseModel]:
+    parameters = [Parameter.model_validate(p) for p in json.loads(parameters_json)]
+    fields = {p.name: parameter_field(p) for p in parameters}
+    return create_model("TaskParameterValidator", **fields)
+
+
+def get_validator(task: TaskBase) -> type[BaseModel]:
+    """
+    Validator of the parameters of a task template. Validators are compiled
+    once per distinct parameter list, so editing a template builds a new one.
+    """
+    return _compile(
+        json.dumps([p.model_dump(mode="json") for p in task.parameters], sort_keys=True)
+    )
+
+
+def validate_parameters(task: TaskBase, values: dict) -> tuple[dict, list[str]]:
+    """
+    Validate and repair parameter values for a task template: values are
+    coerced to their declared types, options are matched ignoring case,
+    defaults are filled in and undeclared values are dropped.
+    Returns the cleaned values and the problems that could not be repaired.
+    """
+    try:
+        validated = get_validator(task).model_validate(values or {})
+    except ValidationError as e:
+        return {}, [
+            f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+            for error in e.errors()
+        ]
+    return validated.model_dump(exclude_none=True), []
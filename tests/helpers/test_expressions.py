@@ -0,0 +1,133 @@
+import pytest
+
+from helpers.expressions import (
+    ExpressionError,
+    compile_expression,
+    evaluate,
+    render_template,
+    validate_template,
+)
+
+VARIABLES = {
+    "payload": {
+        "ref": "refs/heads/main",
+        "commits": [{"id": "a1", "message": "fix"}, {"id": "b2", "message": "feat"}],
+    },
+    "context": {},
+    "last": {"result": "ok"},
+}
+
+
+class TestEvaluate:
+    """Test cases for the safe expression evaluator."""
+
+    def test_predicates(self):
+        """Test comparisons, boolean logic and allowed functions."""
+        # Act & Assert
+        assert evaluate('payload.ref == "refs/heads/main" and len(payload.commits) > 1', VARIABLES)
+        assert evaluate('payload.ref.startswith("refs/heads/")', VARIABLES)
+        assert evaluate('payload.commits[-1].id == "b2"', VARIABLES)
+        assert not evaluate("not last.result", VARIABLES)
+
+    def test_missing_keys_are_none(self):
+        """Test that missing keys and indexes evaluate to None."""
+        # Act & Assert
+        assert evaluate("payload.pusher.name", VARIABLES) is None
+        assert evaluate("payload.commits[5]", VARIABLES) is None
+
+    @pytest.mark.parametrize(
+        "expression",
+        [
+            '__import__("os")',
+            "payload.__class__",
+            "(lambda: 1)()",
+            "[c for c in payload.commits]",
+            "2 ** 64",
+            "payload.get('ref')",
+        ],
+    )
+    def test_rejects_unsafe_expressions(self, expression):
+        """Test that anything outside the supported subset is rejected."""
+        # Act & Assert
+        with pytest.raises(ExpressionError):
+            compile_expression(expression)
+
+    def test_limits_result_size(self):
+        """Test that huge sequences cannot be built."""
+        # Act & Assert
+        with pytest.raises(ExpressionError):
+            evaluate('"a" * 100000000', VARIABLES)
+
+    @pytest.mark.parametrize(
+        "expression",
+        [
+            '("a" * 100000).replace("", "b" * 100000)',
+            '("a" * 1000).replace("a", "b" * 1000)',
+            '("a" * 100000).join(["b" * 100000] * 100000)',
+            '",".join(["b" * 60000, "c" * 60000])',
+            "str([\"a\" * 100000] * 10000)",
+            "upper({\"k\": [\"a\" * 100000] * 10000})",
+        ],
+    )
+    def test_limits_string_method_results(self, expression):
+        """Test that replace, join and str() cannot build huge strings."""
+        # Act & Assert
+        with pytest.raises(ExpressionError):
+            evaluate(expression, VARIABLES)
+
+    @pytest.mark.parametrize("expression", ["'%0100000000d' % 1", '"%s" % payload.ref'])
+    def test_rejects_string_formatting(self, expression):
+        """Test that % is refused on strings."""
+        # Act & Assert
+        with pytest.raises(ExpressionError):
+            evaluate(expression, VARIABLES)
+
+    def test_modulo_and_str_of_small_values(self):
+        """Test that % between numbers and str() of small values still work."""
+        # Act & Assert
+        assert evaluate("len(payload.commits) % 2", VARIABLES) == 0
+        assert evaluate("str(payload.commits[0])", VARIABLES) == str(VARIABLES["payload"]["commits"][0])
+        assert evaluate("upper(last.result)", VARIABLES) == "OK"
+
+    def test_string_methods(self):
+        """Test that string methods with small results still work."""
+        # Act & Assert
+        assert evaluate('payload.ref.replace("refs/heads/", "")', VARIABLES) == "main"
+        assert evaluate('",".join(["a", "b"])', VARIABLES) == "a,b"
+        assert evaluate('"a-b-c".replace("-", "+", 1)', VARIABLES) == "a+b-c"
+
+    def test_unknown_name(self):
+        """Test that unknown names fail to evaluate."""
+        # Act & Assert
+        with pytest.raises(ExpressionError):
+            evaluate("secrets", VARIABLES)
+
+
+class TestRenderTemplate:
+    """Test cases for JSON templates."""
+
+    def test_render_template(self):
+        """Test that whole-value expressions keep their type and others are interpolated."""
+        # Arrange
+        template = {
+            "result": "Branch {{ payload.ref.split('/')[-1] }}",
+            "next_task": {"count": "{{ len(payload.commits) }}", "ids": ["{{ payload.commits[0].id }}"]},
+            "static": 1,
+        }
+
+        # Act
+        result = render_template(template, VARIABLES)
+
+        # Assert
+        assert result == {
+            "result": "Branch main",
+            "next_task": {"count": 2, "ids": ["a1"]},
+            "static": 1,
+        }
+
+    def test_validate_template(self):
+        """Test that invalid expressions in templates are rejected."""
+        # Act & Assert
+        validate_template({"a": ["{{ payload.ref }}"]})
+        with pytest.raises(ExpressionError):
+            validate_template({"a": {"b": "{{ open('x') }}"}})
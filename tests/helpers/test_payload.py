@@ -0,0 +1,81 @@
+import copy
+
+from helpers.payload import get_path, project_payload
+
+PAYLOAD = {
+    "ref": "refs/heads/main",
+    "repository": {"name": "repo", "owner": {"login": "org", "id": 1}},
+    "commits": [
+        {"id": "a1", "message": "fix", "author": {"name": "Ana"}},
+        {"id": "b2", "message": "feat", "author": {"name": "Luis"}},
+    ],
+}
+
+
+class TestGetPath:
+    """Test cases for resolving dotted paths."""
+
+    def test_get_path(self):
+        """Test keys, list indexes and paths applied to every item."""
+        # Act & Assert
+        assert get_path(PAYLOAD, "repository.owner.login") == "org"
+        assert get_path(PAYLOAD, "commits.-1.id") == "b2"
+        assert get_path(PAYLOAD, "commits.message") == ["fix", "feat"]
+        assert get_path(PAYLOAD, "commits.5.id", default="none") == "none"
+
+
+class TestProjectPayload:
+    """Test cases for projecting payloads to the fields a workflow uses."""
+
+    def test_project_nested_fields(self):
+        """Test that only the given fields are kept, with their nesting."""
+        # Act
+        result = project_payload(PAYLOAD, ["ref", "repository.owner.login", "commits.message"])
+
+        # Assert
+        assert result == {
+            "ref": "refs/heads/main",
+            "repository": {"owner": {"login": "org"}},
+            "commits": [{"message": "fix"}, {"message": "feat"}],
+        }
+
+    def test_project_list_index_keeps_list(self):
+        """Test that an index path keeps the list instead of turning it into a dict."""
+        # Act
+        result = project_payload(PAYLOAD, ["commits.1.id"])
+
+        # Assert
+        assert result == {"commits": [{"id": "b2"}]}
+
+    def test_project_list_index_merges_with_item_paths(self):
+        """Test that index and item paths into the same list merge item by item."""
+        # Act
+        result = project_payload(PAYLOAD, ["commits.message", "commits.0.author.name"])
+
+        # Assert
+        assert result == {
+            "commits": [
+                {"message": "fix", "author": {"name": "Ana"}},
+                {"message": "feat"},
+            ]
+        }
+
+    def test_project_does_not_modify_payload(self):
+        """Test that overlapping fields do not mutate the source payload."""
+        # Arrange
+        payload = copy.deepcopy(PAYLOAD)
+
+        # Act
+        result = project_payload(payload, ["repository", "repository.owner.login", "commits"])
+        result["repository"]["owner"]["login"] = "changed"
+        result["commits"][0]["id"] = "changed"
+
+        # Assert
+        assert payload == PAYLOAD
+
+    def test_project_without_fields(self):
+        """Test that the payload is returned unchanged without fields."""
+        # Act & Assert
+        assert project_payload(PAYLOAD, None) is PAYLOAD
+        assert project_payload(None, ["ref"]) == {}
+        assert project_payload(PAYLOAD, ["missing.path"]) == {}
@@ -0,0 +1,38 @@
+from helpers.response_cleaner import parse_json_response
+
+
+class TestParseJsonResponse:
+    """Test cases for the tolerant JSON response parser."""
+
+    def test_parse_fenced_json(self):
+        """Test that code fences are ignored and newlines in strings are kept."""
+        # Arrange
+        response = '```json\n{"result": "line 1\nline 2"}\n```'
+
+        # Act
+        result = parse_json_response(response)
+
+        # Assert
+        assert result == {"result": "line 1\nline 2"}
+
+    def test_parse_json_surrounded_by_text(self):
+        """Test that the first valid JSON value is taken from prose."""
+        # Act
+        result = parse_json_response('Here it is: {bad} {"result": "ok"} Hope it helps!')
+
+        # Assert
+        assert result == {"result": "ok"}
+
+    def test_parse_truncated_json(self):
+        """Test that open strings, objects and arrays are closed."""
+        # Act
+        result = parse_json_response('{"result": "ok", "next_task": {"to": ["a@b.c", "d@e')
+
+        # Assert
+        assert result == {"result": "ok", "next_task": {"to": ["a@b.c", "d@e"]}}
+
+    def test_parse_without_json(self):
+        """Test that responses without JSON return None."""
+        # Act & Assert
+        assert parse_json_response("I could not do that.") is None
+        assert parse_json_response(None) is None
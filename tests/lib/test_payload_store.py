@@ -0,0 +1,90 @@
+import os
+import time
+
+from lib.payload_store import (
+    LocalPayloadStore,
+    payload_key,
+    payload_preview,
+    serialize_payload,
+)
+
+
+class TestLocalPayloadStore:
+    """Test cases for the content-addressed local payload store."""
+
+    def test_serialize_payload_is_canonical(self):
+        """Test that key order does not change the serialized payload."""
+        assert serialize_payload({"b": 1, "a": 2}) == serialize_payload({"a": 2, "b": 1})
+
+    def test_put_and_get(self, tmp_path):
+        """Test storing and loading a payload by its hash key."""
+        # Arrange
+        store = LocalPayloadStore(root=tmp_path)
+        payload = {"ref": "refs/heads/main", "commits": [{"id": "abc"}]}
+
+        # Act
+        key = store.put(payload)
+
+        # Assert
+        assert key == payload_key(serialize_payload(payload))
+        assert store.get(key) == payload
+
+    def test_identical_payloads_share_storage(self, tmp_path):
+        """Test that redelivered payloads are stored only once."""
+        # Arrange
+        store = LocalPayloadStore(root=tmp_path)
+
+        # Act
+        first = store.put({"a": 1, "b": 2})
+        second = store.put({"b": 2, "a": 1})
+
+        # Assert
+        assert first == second
+        assert len(list(tmp_path.glob("*.json"))) == 1
+
+    def test_get_missing(self, tmp_path):
+        """Test loading an unknown key."""
+        store = LocalPayloadStore(root=tmp_path)
+        assert store.get("missing") is None
+
+    def test_purge_expired(self, tmp_path):
+        """Test that expired payloads are hidden and purged."""
+        # Arrange
+        store = LocalPayloadStore(root=tmp_path, ttl=60)
+        expired = store.put({"old": True})
+        fresh = store.put({"new": True})
+        past = time.time() - 120
+        os.utime(tmp_path / f"{expired}.json", (past, past))
+
+        # Act
+        removed = store.purge_expired()
+
+        # Assert
+        assert removed == 1
+        assert store.get(expired) is None
+        assert store.get(fresh) == {"new": True}
+
+
+class TestPayloadPreview:
+    """Test cases for the copy of a payload kept on its input log."""
+
+    def test_small_payload_is_kept(self):
+        """Test that a payload within the limit is kept as is."""
+        # Arrange
+        payload = {"ref": "refs/heads/main"}
+
+        # Act & Assert
+        assert payload_preview(payload, max_bytes=100) == payload
+
+    def test_large_payload_is_truncated(self):
+        """Test that a large payload is kept as truncated JSON."""
+        # Arrange
+        payload = {"commits": [{"message": "x" * 100}] * 10}
+
+        # Act
+        preview = payload_preview(payload, max_bytes=50)
+
+        # Assert
+        assert isinstance(preview, str)
+        assert preview.startswith('{"commits":[{"message":"xxx')
+        assert len(preview) == 53
@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+import pytest
+
+from lib.ttl_cache import TTLCache
+
+
+class TestTTLCache:
+    """Test cases for the in-process TTL cache."""
+
+    def test_get_and_set(self):
+        """Test storing and reading an entry."""
+        # Arrange
+        cache = TTLCache(maxsize=2, ttl=60)
+
+        # Act
+        cache.set("a", None)
+
+        # Assert
+        assert cache.get("a") is None
+        assert cache.get("b", "default") == "default"
+        with pytest.raises(KeyError):
+            cache.get("b")
+
+    @patch('lib.ttl_cache.time.monotonic')
+    def test_entries_expire(self, mock_monotonic):
+        """Test that expired entries are not returned."""
+        # Arrange
+        mock_monotonic.return_value = 100
+        cache = TTLCache(ttl=10)
+        cache.set("a", 1)
+        cache.set("b", 2, ttl=30)
+
+        # Act
+        mock_monotonic.return_value = 115
+
+        # Assert
+        assert cache.get("a", None) is None
+        assert cache.get("b") == 2
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full."""
+        # Arrange
+        cache = TTLCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+
+        # Act
+        cache.set("c", 3)
+
+        # Assert
+        assert cache.get("b", None) is None
+        assert cache.get("a") == 1
+        assert len(cache) == 2
@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from models.mongo.logs import LogOutput
+
+
+class TestLogOutput:
+    """Test cases for the output of stored logs."""
+
+    def test_from_document(self):
+        """Test that stored fields, including cache hits, are passed through."""
+        # Arrange
+        now = datetime(2025, 1, 1)
+        log = {
+            "_id": "65f1c0ffee0000000000abcd",
+            "agent": "engineer",
+            "type": "workflow",
+            "data": "{}",
+            "source": "65f1c0ffee0000000000abce",
+            "source_event": [{"createdAt": now}],
+            "payload_ref": "abc",
+            "cache_hit": True,
+            "createdAt": now,
+            "updatedAt": now,
+        }
+
+        # Act
+        output = LogOutput.from_document(log)
+
+        # Assert
+        assert output.cache_hit is True
+        assert output.payload_ref == "abc"
+        assert output.source_event == {"createdAt": str(now)}
+
+    def test_from_document_without_optional_fields(self):
+        """Test that logs stored before the optional fields existed are read."""
+        # Arrange
+        now = datetime(2025, 1, 1)
+        log = {
+            "_id": "65f1c0ffee0000000000abcd",
+            "agent": None,
+            "type": "input",
+            "data": "{}",
+            "source": "webhook",
+            "createdAt": now,
+            "updatedAt": now,
+        }
+
+        # Act
+        output = LogOutput.from_document(log)
+
+        # Assert
+        assert output.cache_hit is None
+        assert output.source_event is None
@@ -0,0 +1,281 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from google.adk.agents.run_config import StreamingMode
+from google.adk.events import Event
+from google.genai import types
+
+from services.agents import APP_NAME, AgentCaller
+
+
+def make_caller() -> AgentCaller:
+    caller = AgentCaller(
+        org_id=7,
+        agent=Mock(model="gemini"),
+        session_service=Mock(delete_session=AsyncMock()),
+    )
+    caller.init_runner = Mock()
+    return caller
+
+
+@patch('services.agents.metrics')
+@patch('services.agents.get_llm_limiter')
+class TestAgentCallerGenerate:
+    """Test cases for model call timeouts and hedging."""
+
+    async def test_generate_timeout(self, mock_get_llm_limiter, mock_metrics):
+        """Test that a stuck call is cancelled after the timeout."""
+        # Arrange
+        caller = make_caller()
+
+        async def stuck(text, session_id, lease=None):
+            await asyncio.sleep(10)
+
+        # Act & Assert
+        with (
+            patch.object(AgentCaller, "_generate", side_effect=stuck),
+            pytest.raises(TimeoutError),
+        ):
+            await caller.generate("hello", timeout=0.01)
+
+    async def test_ephemeral_session_is_deleted(self, mock_get_llm_limiter, mock_metrics):
+        """Test that one-shot callers do not keep their session."""
+        # Arrange
+        caller = make_caller()
+        caller.ephemeral = True
+
+        async def answer(text, session_id, lease=None):
+            return "done"
+
+        # Act
+        with patch.object(AgentCaller, "_generate", side_effect=answer):
+            result = await caller.generate("hello")
+
+        # Assert
+        assert result == "done"
+        caller.session_service.delete_session.assert_awaited_once_with(
+            app_name=APP_NAME, user_id="7", session_id=caller.id
+        )
+
+    async def test_conversation_session_is_kept(self, mock_get_llm_limiter, mock_metrics):
+        """Test that callers continuing a conversation keep their session."""
+        # Arrange
+        caller = make_caller()
+
+        async def answer(text, session_id, lease=None):
+            return "done"
+
+        # Act
+        with patch.object(AgentCaller, "_generate", side_effect=answer):
+            await caller.generate("hello")
+
+        # Assert
+        caller.session_service.delete_session.assert_not_awaited()
+
+    async def test_hedge_not_sent_without_latency_history(self, mock_get_llm_limiter, mock_metrics):
+        """Test that calls are not hedged before a p95 delay is known."""
+        # Arrange
+        caller = make_caller()
+        mock_get_llm_limiter.return_value.hedge_delay.return_value = None
+
+        async def answer(text, session_id, lease=None):
+            return "primary"
+
+        # Act
+        with patch.object(AgentCaller, "_generate", side_effect=answer) as mock_generate:
+            result = await caller.generate("hello", hedge=True)
+
+        # Assert
+        assert result == "primary"
+        assert mock_generate.call_count == 1
+        mock_get_llm_limiter.return_value.try_acquire.assert_not_called()
+
+    async def test_hedge_wins_over_slow_primary(self, mock_get_llm_limiter, mock_metrics):
+        """Test that a hedged request is sent after the delay and the first answer wins."""
+        # Arrange
+        caller = make_caller()
+        limiter = mock_get_llm_limiter.return_value
+        limiter.hedge_delay.return_value = 0.01
+        limiter.try_acquire.return_value = "lease"
+        sessions = []
+
+        async def answer(text, session_id, lease=None):
+            sessions.append((session_id, lease))
+            if lease is None:
+                await asyncio.sleep(10)
+                return "primary"
+            return "hedge"
+
+        # Act
+        with patch.object(AgentCaller, "_generate", side_effect=answer):
+            result = await caller.generate("hello", hedge=True)
+
+        # Assert
+        assert result == "hedge"
+        assert sessions[0] == (caller.id, None)
+        assert sessions[1][0].startswith(f"{caller.id}_hedge_")
+        assert sessions[1][1] == "lease"
+        limiter.try_acquire.assert_called_once_with("gemini", 7)
+        mock_metrics.increment.assert_any_call("llm_hedges_won", org_id=7)
+        # The hedge forks the conversation and its answer is kept in it
+        hedge_id = sessions[1][0]
+        copies = [c[0] for c in caller.session_service.copy_session.call_args_list]
+        assert copies == [
+            (APP_NAME, "7", caller.id, hedge_id),
+            (APP_NAME, "7", hedge_id, caller.id),
+        ]
+        caller.session_service.delete_session.assert_awaited_once_with(
+            app_name=APP_NAME, user_id="7", session_id=hedge_id
+        )
+
+    async def test_hedge_skipped_without_budget(self, mock_get_llm_limiter, mock_metrics):
+        """Test that no hedge is sent when the limiter has no free slot."""
+        # Arrange
+        caller = make_caller()
+        limiter = mock_get_llm_limiter.return_value
+        limiter.hedge_delay.return_value = 0.01
+        limiter.try_acquire.return_value = None
+
+        async def answer(text, session_id, lease=None):
+            await asyncio.sleep(0.05)
+            return "primary"
+
+        # Act
+        with patch.object(AgentCaller, "_generate", side_effect=answer) as mock_generate:
+            result = await caller.generate("hello", hedge=True)
+
+        # Assert
+        assert result == "primary"
+        assert mock_generate.call_count == 1
+        mock_metrics.increment.assert_not_called()
+        caller.session_service.copy_session.assert_called_once()
+        caller.session_service.delete_session.assert_awaited_once()
+
+    @patch('services.agents.Runner')
+    async def test_generate_with_output_schema(
+        self, mock_runner, mock_get_llm_limiter, mock_metrics
+    ):
+        """Test that a schema runs the call on a tool-less structured copy of the agent."""
+        # Arrange
+        caller = AgentCaller(org_id=7, agent=Mock(model="gemini"), session_service=Mock())
+        schema = Mock()
+
+        async def answer(text, session_id, lease=None):
+            return '{"result": "ok"}'
+
+        # Act
+        with patch.object(AgentCaller, "_generate", side_effect=answer):
+            await caller.generate("hello", output_schema=schema)
+
+        # Assert
+        update = caller.agent.model_copy.call_args[1]["update"]
+        assert update["output_schema"] is schema
+        assert update["tools"] == [] and update["sub_agents"] == []
+        assert mock_runner.call_args[1]["agent"] is caller.agent.model_copy.return_value
+
+    @patch('services.agents.get_agent_pool')
+    async def test_structured_agent_is_pooled_per_schema(
+        self, mock_get_agent_pool, mock_get_llm_limiter, mock_metrics
+    ):
+        """Test that structured copies of pooled agents are pooled by JSON schema."""
+        # Arrange
+        caller = AgentCaller(
+            org_id=7, agent=Mock(model="gemini"), session_service=Mock(), agent_name="Engineer"
+        )
+        schema = Mock()
+        schema.model_json_schema.return_value = {"type": "object"}
+
+        # Act
+        agent = caller.structured_agent(schema)
+
+        # Assert
+        pool = mock_get_agent_pool.return_value
+        assert agent is pool.get.return_value
+        assert pool.get.call_args[0][:2] == (7, "engineer")
+        assert pool.get.call_args[1]["variant"] == '{"type": "object"}'
+        pool.get.call_args[0][2]()
+        assert caller.agent.model_copy.call_args[1]["update"]["output_schema"] is schema
+
+
+def model_event(author: str = "EngineerAgent", partial: bool = False, **part) -> Event:
+    return Event(
+        author=author,
+        partial=partial,
+        content=types.Content(role="model", parts=[types.Part(**part)]),
+    )
+
+
+@patch('services.agents.get_llm_limiter')
+class TestAgentCallerStream:
+    """Test cases for streaming agent responses."""
+
+    def make_caller(self, events: list[Event], closed: list) -> AgentCaller:
+        caller = AgentCaller(
+            org_id=7, agent=Mock(model="gemini"), session_service=AsyncMock()
+        )
+        caller.init_runner = Mock()
+
+        async def run_async(**kwargs):
+            try:
+                for event in events:
+                    yield event
+            finally:
+                closed.append(kwargs["run_config"].streaming_mode)
+
+        caller.runner = Mock(run_async=run_async)
+        return caller
+
+    async def test_stream_yields_progress(self, mock_get_llm_limiter):
+        """Test that partial text, tool calls and the final answer are streamed."""
+        # Arrange
+        closed = []
+        caller = self.make_caller(
+            [
+                model_event(function_call=types.FunctionCall(name="get_changelog", args={})),
+                model_event(
+                    author="user",
+                    function_response=types.FunctionResponse(name="get_changelog", response={}),
+                ),
+                model_event(partial=True, text="Hel"),
+                model_event(partial=True, text="lo"),
+                model_event(text="Hello "),
+            ],
+            closed,
+        )
+
+        # Act
+        chunks = [chunk async for chunk in caller.stream("hi")]
+
+        # Assert
+        assert [c["type"] for c in chunks] == [
+            "tool_call",
+            "tool_result",
+            "text",
+            "text",
+            "final",
+        ]
+        assert chunks[0]["name"] == "get_changelog"
+        assert "".join(c["text"] for c in chunks if c["type"] == "text") == "Hello"
+        assert chunks[-1] == {"type": "final", "text": "Hello", "conversation_id": caller.id}
+        assert closed == [StreamingMode.SSE]
+        mock_get_llm_limiter.return_value.slot.assert_called_once_with(model="gemini", org_id=7)
+
+    async def test_closing_stream_cancels_run(self, mock_get_llm_limiter):
+        """Test that a consumer going away closes the runner and releases the slot."""
+        # Arrange
+        closed = []
+        caller = self.make_caller(
+            [model_event(partial=True, text=str(i)) for i in range(100)], closed
+        )
+        slot = mock_get_llm_limiter.return_value.slot.return_value
+
+        # Act
+        stream = caller.stream("hi")
+        first = await anext(stream)
+        await stream.aclose()
+
+        # Assert
+        assert first["text"] == "0"
+        assert closed == [StreamingMode.SSE]
+        slot.__aexit__.assert_awaited_once()
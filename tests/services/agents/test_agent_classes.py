@@ -5,6 +5,7 @@ import pytest
 from services.agents.customer_agent import CustomerAgent
 from services.agents.engineer_agent import EngineerAgent
 from services.agents.growth_agent import GrowthAgent
+from services.agents.multi_agent import MultiAgent
 from services.agents.operations_agent import OperationsAgent
 from services.agents.product_agent import ProductAgent
 
@@ -174,3 +175,42 @@ class TestAgentClasses:
             built_agent = agent.build()
             assert built_agent == mock_built_agent
             assert agent.agent == mock_built_agent
+
+
+class TestMultiAgent:
+    """Test cases for the MultiAgent orchestrator."""
+
+    @patch('services.agents.multi_agent.repository')
+    @patch('services.agents.base.repository')
+    @patch('services.agents.base.AgentFactory')
+    def test_configs_loaded_in_one_query(self, mock_factory, mock_base_repository, mock_repository):
+        """Test that sub-agents share one config query and defaults are created in bulk."""
+        # Arrange
+        existing_config = Mock()
+        existing_config.name = "EngineerAgent"
+        existing_config.instructions = "Custom engineer instructions"
+        existing_config.description = None
+        existing_config.content_config = None
+        existing_config.global_instruction = None
+        mock_repository.mongo.agent.get_agent_configs.return_value = {
+            "EngineerAgent": existing_config
+        }
+        mock_factory.create_agent.side_effect = lambda config: Mock(name=config.name)
+
+        # Act
+        agent = MultiAgent(org_id=7)
+
+        # Assert
+        mock_repository.mongo.agent.get_agent_configs.assert_called_once_with(7)
+        mock_base_repository.mongo.agent.get_agent_config.assert_not_called()
+        mock_base_repository.mongo.agent.create.assert_not_called()
+        assert len(agent.sub_agents) == 5
+        created = mock_repository.mongo.agent.create_defaults.call_args[0][0]
+        assert sorted(c.name for c in created) == [
+            "CustomerAgent",
+            "GrowthAgent",
+            "MultiAgent",
+            "OperationsAgent",
+            "ProductAgent",
+        ]
+        assert all(c.organizationId == 7 for c in created)
@@ -0,0 +1,315 @@
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+import requests
+
+from models.agent_job import AgentJob, AgentJobStatus
+from models.inputs.agent import AgentProcess
+from models.mongo.mongo_base import tz_zone
+from services.agents import jobs
+
+
+def make_job(**kwargs) -> AgentJob:
+    now = datetime(2025, 1, 1)
+    values = {
+        "id": "j1",
+        "org_id": 7,
+        "agent": "engineer",
+        "conversation_id": "7_abc",
+        "created_at": now,
+        "updated_at": now,
+    }
+    values.update(kwargs)
+    return AgentJob(**values)
+
+
+class TestAgentProcessModes:
+    """Test cases for the background options of an agent request."""
+
+    def test_callback_requires_background(self):
+        """Test that a callback URL is only accepted for background requests."""
+        # Act / Assert
+        with pytest.raises(ValueError):
+            AgentProcess(agent="engineer", text="hi", callback_url="https://example.com/hook")
+
+    def test_stream_and_background_are_exclusive(self):
+        """Test that a request cannot be both streamed and run in background."""
+        # Act / Assert
+        with pytest.raises(ValueError):
+            AgentProcess(agent="engineer", text="hi", stream=True, background=True)
+
+    def test_callback_must_be_http(self):
+        """Test that callback URLs must be http(s) URLs."""
+        # Act / Assert
+        with pytest.raises(ValueError):
+            AgentProcess(
+                agent="engineer", text="hi", background=True, callback_url="file:///etc/passwd"
+            )
+
+
+@patch('services.agents.jobs.metrics')
+@patch('services.agents.jobs.get_cache')
+class TestCreateJob:
+    """Test cases for queuing agent jobs."""
+
+    @patch('services.celery_jobs.tasks.run_agent_job')
+    def test_create_job_stores_and_enqueues(self, mock_task, mock_get_cache, mock_metrics):
+        """Test that the job and its input are stored with a TTL and enqueued."""
+        # Arrange
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+        data = AgentProcess(agent="engineer", text="hello", background=True)
+
+        # Act
+        job = jobs.create_job(org_id=7, data=data)
+
+        # Assert
+        assert job.status == AgentJobStatus.QUEUED
+        assert job.conversation_id.startswith("7_")
+        pipeline.set.assert_any_call(f"agent_job_input_{job.id}", "hello", ex=jobs.JOB_TTL)
+        pipeline.execute.assert_called_once()
+        mock_task.delay.assert_called_once_with(job.id)
+
+    @patch('services.celery_jobs.tasks.deliver_agent_job_callback')
+    @patch('services.celery_jobs.tasks.run_agent_job')
+    def test_create_job_fails_when_not_enqueued(
+        self, mock_task, mock_callback, mock_get_cache, mock_metrics
+    ):
+        """Test that a job that cannot be enqueued is marked failed."""
+        # Arrange
+        mock_task.delay.side_effect = ConnectionError("broker down")
+        data = AgentProcess(agent="engineer", text="hello", background=True)
+
+        # Act
+        with pytest.raises(ConnectionError):
+            jobs.create_job(org_id=7, data=data)
+
+        # Assert
+        stored = AgentJob.model_validate_json(mock_get_cache.return_value.set.call_args[0][1])
+        assert stored.status == AgentJobStatus.FAILED
+
+
+@patch('services.agents.jobs.get_cache')
+class TestGetJob:
+    """Test cases for reading agent jobs."""
+
+    def test_get_job_of_other_org(self, mock_get_cache):
+        """Test that jobs of another organization are not returned."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = make_job(org_id=8).model_dump_json()
+
+        # Act
+        job = jobs.get_job(org_id=7, job_id="j1")
+
+        # Assert
+        assert job is None
+
+    def test_get_stale_running_job(self, mock_get_cache):
+        """Test that a job running past its timeout is reported failed."""
+        # Arrange
+        started_at = datetime.now(tz_zone) - timedelta(
+            seconds=jobs.JOB_TIMEOUT + jobs.STALE_GRACE + 1
+        )
+        mock_get_cache.return_value.get.return_value = make_job(
+            status=AgentJobStatus.RUNNING, started_at=started_at
+        ).model_dump_json()
+
+        # Act
+        job = jobs.get_job(org_id=7, job_id="j1")
+
+        # Assert
+        assert job.status == AgentJobStatus.FAILED
+        assert "did not finish" in job.error
+
+    def test_get_running_job(self, mock_get_cache):
+        """Test that a job within its timeout is still running."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = make_job(
+            status=AgentJobStatus.RUNNING, started_at=datetime.now(tz_zone)
+        ).model_dump_json()
+
+        # Act
+        job = jobs.get_job(org_id=7, job_id="j1")
+
+        # Assert
+        assert job.status == AgentJobStatus.RUNNING
+
+    def test_get_missing_job(self, mock_get_cache):
+        """Test that an expired job is None."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = None
+
+        # Act / Assert
+        assert jobs.get_job(org_id=7, job_id="j1") is None
+
+
+@patch('services.celery_jobs.tasks.deliver_agent_job_callback')
+@patch('services.agents.jobs.metrics')
+@patch('services.agents.jobs.get_cache')
+class TestRunJob:
+    """Test cases for running agent jobs in a worker."""
+
+    @patch('services.agents.AgentCaller')
+    def test_run_job_stores_response(
+        self, mock_caller, mock_get_cache, mock_metrics, mock_callback
+    ):
+        """Test that the response is stored and the callback scheduled."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.get.side_effect = [
+            make_job(callback_url="https://example.com/hook").model_dump_json(),
+            b"hello",
+        ]
+        mock_caller.create.return_value.generate = AsyncMock(return_value="done")
+
+        # Act
+        job = jobs.run_job("j1")
+
+        # Assert
+        assert job.status == AgentJobStatus.SUCCEEDED
+        assert job.response == "done"
+        assert job.started_at is not None
+        cache.set.assert_any_call("agent_job_claim_j1", "1", nx=True, ex=jobs.JOB_TTL)
+        mock_caller.create.assert_called_once_with(
+            org_id=7, agent="engineer", session_id="7_abc"
+        )
+        mock_caller.create.return_value.generate.assert_awaited_once_with(
+            "hello", timeout=jobs.JOB_TIMEOUT
+        )
+        cache.delete.assert_called_once_with("agent_job_input_j1")
+        mock_callback.delay.assert_called_once_with("j1")
+
+    @patch('services.agents.AgentCaller')
+    def test_run_job_stores_error(
+        self, mock_caller, mock_get_cache, mock_metrics, mock_callback
+    ):
+        """Test that a failed agent run marks the job failed."""
+        # Arrange
+        mock_get_cache.return_value.get.side_effect = [make_job().model_dump_json(), b"hello"]
+        mock_caller.create.return_value.generate = AsyncMock(side_effect=RuntimeError("boom"))
+
+        # Act
+        job = jobs.run_job("j1")
+
+        # Assert
+        assert job.status == AgentJobStatus.FAILED
+        assert job.error == "boom"
+        mock_callback.delay.assert_not_called()
+
+    def test_run_job_skips_started_jobs(self, mock_get_cache, mock_metrics, mock_callback):
+        """Test that a job already picked up by a worker is not run again."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = make_job(
+            status=AgentJobStatus.RUNNING
+        ).model_dump_json()
+
+        # Act / Assert
+        assert jobs.run_job("j1") is None
+        mock_get_cache.return_value.set.assert_not_called()
+
+    @patch('services.agents.AgentCaller')
+    def test_run_job_skips_claimed_jobs(
+        self, mock_caller, mock_get_cache, mock_metrics, mock_callback
+    ):
+        """Test that a queued job claimed by another worker is not run again."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.get.return_value = make_job().model_dump_json()
+        cache.set.return_value = None
+
+        # Act / Assert
+        assert jobs.run_job("j1") is None
+        mock_caller.create.assert_not_called()
+
+
+@patch('services.agents.jobs.resolve_public_address', return_value="93.184.216.34")
+@patch('services.agents.jobs.requests')
+@patch('services.agents.jobs.get_cache')
+class TestDeliverCallback:
+    """Test cases for posting job results to callback URLs."""
+
+    def test_deliver_signed_callback(self, mock_get_cache, mock_requests, mock_public):
+        """Test that the job is posted with an HMAC signature of the body."""
+        # Arrange
+        job = make_job(status=AgentJobStatus.SUCCEEDED, callback_url="https://example.com/hook")
+        mock_get_cache.return_value.get.return_value = job.model_dump_json()
+        session = mock_requests.Session.return_value.__enter__.return_value
+        session.post.return_value = Mock(status_code=200, ok=True)
+
+        # Act
+        with patch.object(jobs, "CALLBACK_SECRET", "secret"):
+            delivered = jobs.deliver_callback("j1")
+            body = session.post.call_args[1]["data"]
+            expected = jobs.sign(body)
+
+        # Assert
+        assert delivered is True
+        assert json.loads(body)["status"] == "succeeded"
+        headers = session.post.call_args[1]["headers"]
+        assert headers[jobs.SIGNATURE_HEADER] == expected
+        assert headers["Host"] == "example.com"
+        adapter = session.mount.call_args[0][1]
+        assert adapter.address == "93.184.216.34"
+
+    def test_server_errors_raise_for_retry(self, mock_get_cache, mock_requests, mock_public):
+        """Test that 5xx responses raise so that the delivery is retried."""
+        # Arrange
+        job = make_job(callback_url="https://example.com/hook")
+        mock_get_cache.return_value.get.return_value = job.model_dump_json()
+        response = Mock(status_code=503, ok=False)
+        response.raise_for_status.side_effect = requests.HTTPError("503")
+        session = mock_requests.Session.return_value.__enter__.return_value
+        session.post.return_value = response
+
+        # Act / Assert
+        with pytest.raises(requests.HTTPError):
+            jobs.deliver_callback("j1")
+
+    def test_private_addresses_are_refused(self, mock_get_cache, mock_requests, mock_public):
+        """Test that callbacks to non-public addresses are not sent."""
+        # Arrange
+        mock_public.return_value = None
+        job = make_job(callback_url="http://localhost/hook")
+        mock_get_cache.return_value.get.return_value = job.model_dump_json()
+
+        # Act
+        delivered = jobs.deliver_callback("j1")
+
+        # Assert
+        assert delivered is False
+        mock_requests.Session.assert_not_called()
+
+
+class TestResolvePublicAddress:
+    """Test cases for the callback address check."""
+
+    def test_loopback_is_not_public(self):
+        """Test that loopback addresses are rejected."""
+        # Act / Assert
+        assert jobs.resolve_public_address("http://127.0.0.1:8000/hook") is None
+
+    def test_public_address(self):
+        """Test that the address of a public host is returned."""
+        # Act / Assert
+        assert jobs.resolve_public_address("https://1.1.1.1/hook") == "1.1.1.1"
+
+
+class TestPinnedAdapter:
+    """Test cases for connecting to a checked callback address."""
+
+    def test_connects_to_pinned_address(self):
+        """Test that the pinned address is used while TLS checks the hostname."""
+        # Arrange
+        adapter = jobs.PinnedAdapter("93.184.216.34")
+        request = requests.Request("POST", "https://example.com/hook").prepare()
+
+        # Act
+        host_params, pool_kwargs = adapter.build_connection_pool_key_attributes(
+            request, verify=True
+        )
+
+        # Assert
+        assert host_params["host"] == "93.184.216.34"
+        assert pool_kwargs["server_hostname"] == "example.com"
+        assert pool_kwargs["assert_hostname"] == "example.com"
@@ -0,0 +1,147 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from services.agents.pool import AgentPool, invalidate_agent
+from services.agents.registry import RegisteredAgent
+
+
+@patch('services.agents.pool.metrics')
+@patch('services.agents.pool.get_cache')
+class TestAgentPool:
+    """Test cases for the pool of built agents."""
+
+    def test_agent_is_built_once(self, mock_get_cache, mock_metrics):
+        """Test that a pooled agent is reused instead of rebuilt."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = None
+        pool = AgentPool(max_size=4)
+        build = Mock(return_value=Mock(name="agent"))
+
+        # Act
+        first = pool.get(1, "engineer", build)
+        second = pool.get(1, "engineer", build)
+
+        # Assert
+        assert first is second
+        build.assert_called_once()
+        mock_metrics.increment.assert_any_call("agent_pool_builds", org_id=1)
+        mock_metrics.increment.assert_any_call("agent_pool_hits", org_id=1)
+
+    def test_new_config_version_rebuilds(self, mock_get_cache, mock_metrics):
+        """Test that bumping the config version builds a new agent."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.get.return_value = b"1"
+        pool = AgentPool(max_size=4)
+        build = Mock(side_effect=[Mock(), Mock()])
+        first = pool.get(1, "engineer", build)
+
+        # Act
+        cache.get.return_value = b"2"
+        second = pool.get(1, "engineer", build)
+
+        # Assert
+        assert first is not second
+        assert build.call_count == 2
+
+    def test_agents_are_scoped_by_org(self, mock_get_cache, mock_metrics):
+        """Test that organizations do not share agents."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = None
+        pool = AgentPool(max_size=4)
+        build = Mock(side_effect=[Mock(), Mock()])
+
+        # Act
+        first = pool.get(1, "engineer", build)
+        second = pool.get(2, "engineer", build)
+
+        # Assert
+        assert first is not second
+
+    def test_least_recently_used_is_evicted(self, mock_get_cache, mock_metrics):
+        """Test that the pool keeps at most max_size agents."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = None
+        pool = AgentPool(max_size=2)
+        pool.get(1, "engineer", Mock(return_value=Mock()))
+        pool.get(1, "growth", Mock(return_value=Mock()))
+        pool.get(1, "engineer", Mock())
+
+        # Act
+        pool.get(1, "product", Mock(return_value=Mock()))
+        build = Mock(return_value=Mock())
+        pool.get(1, "growth", build)
+
+        # Assert
+        build.assert_called_once()
+        assert pool.evictions == 2
+
+    def test_failed_build_is_not_pooled(self, mock_get_cache, mock_metrics):
+        """Test that a build error is raised and nothing is pooled."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = None
+        pool = AgentPool(max_size=2)
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            pool.get(1, "engineer", Mock(side_effect=ValueError("missing")))
+        assert pool.get_stats(org_id=1)["size"] == 0
+
+    def test_stats_hit_rate(self, mock_get_cache, mock_metrics):
+        """Test that the hit rate is derived from the shared counters."""
+        # Arrange
+        mock_metrics.get_metrics.return_value = {"agent_pool_hits": 9, "agent_pool_builds": 1}
+        pool = AgentPool(max_size=2)
+
+        # Act
+        stats = pool.get_stats(org_id=1)
+
+        # Assert
+        mock_metrics.get_metrics.assert_called_once_with(org_id=1)
+        assert stats["hit_rate"] == 0.9
+        assert stats["builds"] == 1
+
+    @patch.dict('services.agents.pool.AGENTS', {}, clear=True)
+    @patch('services.agents.pool.get_agent_pool')
+    def test_invalidate_bumps_version(self, mock_get_pool, mock_get_cache, mock_metrics):
+        """Test that invalidating an agent bumps its version and drops it locally."""
+        # Arrange
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+        pipeline.execute.return_value = [3]
+
+        # Act
+        version = invalidate_agent(1, "Engineer")
+
+        # Assert
+        pipeline.incr.assert_called_once_with("agent_config_version_1_engineer")
+        mock_get_pool.return_value.discard.assert_called_once_with(1, "engineer")
+        assert version == 3
+
+    @patch('services.agents.pool.get_agent_pool')
+    def test_invalidate_sub_agent_invalidates_orchestrators(
+        self, mock_get_pool, mock_get_cache, mock_metrics
+    ):
+        """Test that orchestrators embedding a changed sub-agent are rebuilt too."""
+        # Arrange
+        agents = {
+            name: RegisteredAgent(
+                name=name, agent_class=object, class_name=name, module="m",
+                orchestrator=name == "multi",
+            )
+            for name in ("engineer", "multi")
+        }
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+        pipeline.execute.return_value = [2, 5]
+
+        # Act
+        with patch.dict('services.agents.pool.AGENTS', agents, clear=True):
+            version = invalidate_agent(1, "engineer")
+
+        # Assert
+        assert [c.args[0] for c in pipeline.incr.call_args_list] == [
+            "agent_config_version_1_engineer",
+            "agent_config_version_1_multi",
+        ]
+        mock_get_pool.return_value.discard.assert_any_call(1, "multi")
+        assert version == 2
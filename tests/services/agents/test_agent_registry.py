@@ -0,0 +1,78 @@
+from unittest.mock import patch
+
+import pytest
+
+from services.agents import AgentCaller, get_available_agents
+from services.agents.base import AgentBase
+from services.agents.engineer_agent import EngineerAgent
+from services.agents.multi_agent import MultiAgent
+from services.agents.registry import AGENTS, agent_key, get_agent_class, register_agent
+
+
+class TestAgentRegistry:
+    """Test cases for the agent class registry."""
+
+    def test_agents_register_on_import(self):
+        """Test that every agent module registers its class when the package is imported."""
+        # Act
+        names = get_available_agents()
+
+        # Assert
+        assert sorted(names) == ["customer", "engineer", "growth", "multi", "operations", "product"]
+        assert get_agent_class("engineer") is EngineerAgent
+        assert get_agent_class("multi") is MultiAgent
+
+    def test_orchestrators_can_be_excluded(self):
+        """Test that the multi-agent is not listed as a sub-agent."""
+        # Act
+        names = get_available_agents(include_orchestrators=False)
+
+        # Assert
+        assert "multi" not in names
+        assert "engineer" in names
+
+    def test_agent_key(self):
+        """Test that class names map to the names used by the API."""
+        # Act & Assert
+        assert agent_key("EngineerAgent") == "engineer"
+        assert agent_key("CustomerSuccessAgent") == "customer_success"
+
+    def test_subclasses_register_under_explicit_name(self):
+        """Test that an agent class can choose the name it registers under."""
+        # Arrange & Act
+        class SupportTestAgent(AgentBase, agent_name="support_test"):
+            pass
+
+        # Assert
+        try:
+            assert get_agent_class("support_test") is SupportTestAgent
+        finally:
+            AGENTS.pop("support_test", None)
+
+    def test_register_duplicate_name(self):
+        """Test that two different classes cannot register under one name."""
+        # Arrange
+        class OtherAgent:
+            pass
+
+        # Act & Assert
+        with pytest.raises(ValueError):
+            register_agent(OtherAgent, name="engineer")
+
+    @patch('services.agents.base.repository')
+    def test_get_agent_by_name(self, mock_repository):
+        """Test that AgentCaller looks agents up in the registry."""
+        # Arrange
+        mock_repository.mongo.agent.get_agent_config.return_value = None
+
+        # Act
+        agent = AgentCaller.get_agent(org_id=1, agent_name="Engineer")
+
+        # Assert
+        assert isinstance(agent, EngineerAgent)
+
+    def test_get_unknown_agent(self):
+        """Test that an unknown agent name is rejected."""
+        # Act & Assert
+        with pytest.raises(ValueError, match="is not available"):
+            AgentCaller.get_agent(org_id=1, agent_name="unknown")
@@ -152,6 +152,44 @@ class TestAgentBase:
         assert agent.global_instruction == "Existing global instruction"
         mock_repository.mongo.agent.create.assert_not_called()
 
+    @patch('services.agents.base.repository')
+    def test_agent_base_init_with_loaded_configs(self, mock_repository):
+        """Test that preloaded configurations are used without querying."""
+        # Arrange
+        existing_config = Mock()
+        existing_config.instructions = "Existing instructions"
+        existing_config.description = None
+        existing_config.content_config = None
+        existing_config.global_instruction = None
+
+        # Act
+        agent = AgentBase(
+            name="TestAgent",
+            description="Test description",
+            org_id=123,
+            configs={"TestAgent": existing_config},
+        )
+
+        # Assert
+        assert agent.instructions == "Existing instructions"
+        assert agent.description == "Test description"
+        mock_repository.mongo.agent.get_agent_config.assert_not_called()
+        mock_repository.mongo.agent.create.assert_not_called()
+
+    @patch('services.agents.base.repository')
+    def test_agent_base_init_missing_from_loaded_configs(self, mock_repository):
+        """Test that a missing preloaded configuration is left to the caller to create."""
+        # Act
+        agent = AgentBase(name="TestAgent", org_id=123, instructions="Defaults", configs={})
+
+        # Assert
+        assert agent.instructions == "Defaults"
+        mock_repository.mongo.agent.create.assert_not_called()
+        default = agent.default_config()
+        assert default.organizationId == 123
+        assert default.name == "TestAgent"
+        assert default.instructions == "Defaults"
+
     def test_agent_base_init_without_org_id(self):
         """Test AgentBase initialization without org_id raises ValueError."""
         # Act & Assert
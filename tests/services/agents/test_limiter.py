@@ -0,0 +1,198 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from services.agents.limiter import (
+    NEUTRAL,
+    OK,
+    OVERLOAD,
+    AdaptiveLimiter,
+    LimiterTimeout,
+    classify_error,
+)
+
+
+class ProviderError(Exception):
+    def __init__(self, code):
+        super().__init__(f"provider error {code}")
+        self.code = code
+
+
+class TestClassifyError:
+    """Test cases for provider error classification."""
+
+    def test_rate_limit_and_server_errors_are_overload(self):
+        """Test that 429 and 5xx reduce the limits."""
+        # Act & Assert
+        assert classify_error(ProviderError(429)) == OVERLOAD
+        assert classify_error(ProviderError(503)) == OVERLOAD
+
+    def test_timeouts_and_cancellations_are_overload(self):
+        """Test that calls cut short for being slow are overload signals."""
+        # Act & Assert
+        assert classify_error(TimeoutError()) == OVERLOAD
+        assert classify_error(asyncio.CancelledError()) == OVERLOAD
+
+    def test_other_errors_are_neutral(self):
+        """Test that client errors do not change the limits."""
+        # Act & Assert
+        assert classify_error(ProviderError(400)) == NEUTRAL
+        assert classify_error(ValueError("bad")) == NEUTRAL
+
+
+@patch('services.agents.limiter.get_cache')
+class TestAdaptiveLimiter:
+    """Test cases for the adaptive model call limiter."""
+
+    def test_try_acquire(self, mock_get_cache):
+        """Test that a lease is taken on the model and organization scopes."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.eval.return_value = 1
+        limiter = AdaptiveLimiter()
+
+        # Act
+        lease = limiter.try_acquire("gemini-2.0-flash", 7)
+
+        # Assert
+        assert lease
+        args = cache.eval.call_args[0]
+        assert args[1:6] == (
+            4,
+            "llm_inflight_model_gemini-2.0-flash",
+            "llm_limit_model_gemini-2.0-flash",
+            "llm_inflight_org_7",
+            "llm_limit_org_7",
+        )
+        cache.sadd.assert_called_once_with("llm_limit_models", "gemini-2.0-flash")
+
+    def test_try_acquire_at_limit(self, mock_get_cache):
+        """Test that no lease is returned when a scope is full."""
+        # Arrange
+        mock_get_cache.return_value.eval.return_value = 0
+
+        # Act & Assert
+        assert AdaptiveLimiter().try_acquire("gemini", 7) is None
+
+    @patch('services.agents.limiter.asyncio.sleep')
+    async def test_acquire_timeout(self, mock_sleep, mock_get_cache):
+        """Test that waiting for a slot gives up after the timeout."""
+        # Arrange
+        mock_get_cache.return_value.eval.return_value = 0
+
+        # Act & Assert
+        with pytest.raises(LimiterTimeout):
+            await AdaptiveLimiter().acquire("gemini", 7, timeout=0)
+
+    async def test_slot_reports_success(self, mock_get_cache):
+        """Test that a fast call is fed back as a success."""
+        # Arrange
+        mock_get_cache.return_value.eval.return_value = 1
+        limiter = AdaptiveLimiter()
+
+        # Act
+        with patch.object(limiter, "release") as mock_release:
+            async with limiter.slot("gemini", 7) as lease:
+                pass
+
+        # Assert
+        mock_release.assert_called_once_with(lease, "gemini", 7, OK)
+
+    async def test_slot_reports_overload(self, mock_get_cache):
+        """Test that a provider rate limit is fed back as an overload."""
+        # Arrange
+        mock_get_cache.return_value.eval.return_value = 1
+        limiter = AdaptiveLimiter()
+
+        # Act
+        with patch.object(limiter, "release") as mock_release, pytest.raises(ProviderError):
+            async with limiter.slot("gemini", 7):
+                raise ProviderError(429)
+
+        # Assert
+        assert mock_release.call_args[0][3] == OVERLOAD
+
+    async def test_slot_reports_cancellation(self, mock_get_cache):
+        """Test that a call cancelled by a timeout is fed back as an overload."""
+        # Arrange
+        mock_get_cache.return_value.eval.return_value = 1
+        limiter = AdaptiveLimiter()
+
+        async def call():
+            async with limiter.slot("gemini", 7):
+                await asyncio.sleep(10)
+
+        # Act
+        with patch.object(limiter, "release") as mock_release, pytest.raises(TimeoutError):
+            await asyncio.wait_for(call(), timeout=0.01)
+
+        # Assert
+        assert mock_release.call_args[0][3] == OVERLOAD
+
+    async def test_slot_renews_lease_of_long_calls(self, mock_get_cache):
+        """Test that the lease is renewed while a call outlasts a third of its TTL."""
+        # Arrange
+        mock_get_cache.return_value.eval.return_value = 1
+        limiter = AdaptiveLimiter()
+
+        # Act
+        with (
+            patch('services.agents.limiter.LEASE_TTL', 0.03),
+            patch.object(limiter, "release"),
+            patch.object(limiter, "renew") as mock_renew,
+        ):
+            async with limiter.slot("gemini", 7) as lease:
+                await asyncio.sleep(0.05)
+
+        # Assert
+        mock_renew.assert_called_with(lease, "gemini", 7)
+
+    def test_renew(self, mock_get_cache):
+        """Test that renewing only pushes back leases that still exist."""
+        # Arrange
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+
+        # Act
+        AdaptiveLimiter().renew("lease", "gemini", 7)
+
+        # Assert
+        assert pipeline.zadd.call_count == 2
+        key, mapping = pipeline.zadd.call_args[0]
+        assert key == "llm_inflight_org_7"
+        assert list(mapping) == ["lease"]
+        assert pipeline.zadd.call_args[1] == {"xx": True}
+
+    def test_get_limits(self, mock_get_cache):
+        """Test reporting the current limits."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.smembers.return_value = {b"gemini"}
+        cache.pipeline.return_value.execute.side_effect = [[2, b"6.5"], [1, None]]
+
+        # Act
+        limits = AdaptiveLimiter().get_limits(7)
+
+        # Assert
+        assert limits["models"] == {"gemini": {"limit": 6, "inflight": 2}}
+        assert limits["organization"]["inflight"] == 1
+
+    def test_hedge_delay_needs_samples(self, mock_get_cache):
+        """Test that no hedging delay is derived from too few samples."""
+        # Arrange
+        mock_get_cache.return_value.lrange.return_value = [b"1.5"] * 3
+
+        # Act & Assert
+        assert AdaptiveLimiter().hedge_delay("gemini") is None
+
+    def test_hedge_delay_percentile(self, mock_get_cache):
+        """Test that the hedging delay is the configured latency percentile."""
+        # Arrange
+        samples = [str(v).encode() for v in range(1, 101)]
+        mock_get_cache.return_value.lrange.return_value = samples
+
+        # Act
+        delay = AdaptiveLimiter().hedge_delay("gemini")
+
+        # Assert
+        assert delay == 96.0
@@ -0,0 +1,169 @@
+import json
+from unittest.mock import patch
+
+from google.adk.events import Event, EventActions
+from google.genai import types
+
+from services.agents.sessions import RedisSessionService, window_events
+
+
+def user_event(text: str, timestamp: float = 1.0) -> Event:
+    return Event(
+        author="user",
+        content=types.Content(role="user", parts=[types.Part.from_text(text=text)]),
+        timestamp=timestamp,
+    )
+
+
+def model_event(text: str, timestamp: float = 1.0) -> Event:
+    return Event(
+        author="EngineerAgent",
+        content=types.Content(role="model", parts=[types.Part.from_text(text=text)]),
+        timestamp=timestamp,
+    )
+
+
+def tool_response_event() -> Event:
+    return Event(
+        author="user",
+        content=types.Content(
+            role="user",
+            parts=[
+                types.Part.from_function_response(name="get_changelog", response={"ok": True})
+            ],
+        ),
+    )
+
+
+class TestWindowEvents:
+    """Test cases for the history window of a session."""
+
+    def test_keeps_most_recent_events(self):
+        """Test that only the last events are kept."""
+        # Arrange
+        events = [user_event("1"), model_event("a"), user_event("2"), model_event("b")]
+
+        # Act
+        result = window_events(events, 2)
+
+        # Assert
+        assert [e.content.parts[0].text for e in result] == ["2", "b"]
+
+    def test_starts_at_user_message(self):
+        """Test that a window never opens with a model turn or a tool response."""
+        # Arrange
+        events = [user_event("1"), model_event("a"), tool_response_event(), model_event("b"),
+                  user_event("2"), model_event("c")]
+
+        # Act
+        result = window_events(events, 4)
+
+        # Assert
+        assert [e.content.parts[0].text for e in result] == ["2", "c"]
+
+
+@patch('services.agents.sessions.get_cache')
+class TestRedisSessionService:
+    """Test cases for the Redis backed agent session service."""
+
+    async def test_get_missing_session(self, mock_get_cache):
+        """Test that a session that does not exist (or expired) is None."""
+        # Arrange
+        mock_get_cache.return_value.pipeline.return_value.execute.return_value = [
+            {}, {}, [], {}, {}
+        ]
+
+        # Act
+        session = await RedisSessionService().get_session(
+            app_name="roadflow", user_id="7", session_id="s1"
+        )
+
+        # Assert
+        assert session is None
+
+    async def test_get_session_windows_history(self, mock_get_cache):
+        """Test that the session is returned with its state and recent history only."""
+        # Arrange
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+        events = [user_event("1"), model_event("a"), user_event("2"), model_event("b")]
+        pipeline.execute.side_effect = [
+            [
+                {b"last_update_time": b"12.5"},
+                {b"topic": json.dumps("release")},
+                [e.model_dump_json(exclude_none=True) for e in events[-3:]],
+                {b"plan": json.dumps("pro")},
+                {},
+            ],
+            [],
+        ]
+        service = RedisSessionService(history_events=3)
+
+        # Act
+        session = await service.get_session(app_name="roadflow", user_id="7", session_id="s1")
+
+        # Assert
+        pipeline.lrange.assert_called_once_with("agent_session_events_roadflow_7_s1", -3, -1)
+        assert [e.content.parts[0].text for e in session.events] == ["2", "b"]
+        assert session.state == {"topic": "release", "app:plan": "pro"}
+        assert session.last_update_time == 12.5
+        pipeline.expire.assert_any_call("agent_session_roadflow_7_s1", service.ttl)
+
+    async def test_create_session(self, mock_get_cache):
+        """Test that a new session is stored with its state and indexed."""
+        # Arrange
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+
+        # Act
+        session = await RedisSessionService().create_session(
+            app_name="roadflow", user_id="7", session_id="s1", state={"topic": "release"}
+        )
+
+        # Assert
+        assert session.id == "s1"
+        pipeline.hset.assert_any_call(
+            "agent_session_state_roadflow_7_s1", mapping={"topic": '"release"'}
+        )
+        pipeline.sadd.assert_called_once_with("agent_sessions_roadflow_7", "s1")
+        pipeline.execute.assert_called_once()
+
+    async def test_append_event_persists_and_trims(self, mock_get_cache):
+        """Test that events are appended, the list is bounded and state is saved."""
+        # Arrange
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+        service = RedisSessionService(max_events=50)
+        session = await service.create_session(app_name="roadflow", user_id="7", session_id="s1")
+        pipeline.reset_mock()
+        event = model_event("a", timestamp=20.0)
+        event.actions = EventActions(
+            state_delta={"topic": "release", "user:name": "Ana", "temp:scratch": 1}
+        )
+
+        # Act
+        await service.append_event(session, event)
+
+        # Assert
+        stored = pipeline.rpush.call_args[0]
+        assert stored[0] == "agent_session_events_roadflow_7_s1"
+        assert Event.model_validate_json(stored[1]).content.parts[0].text == "a"
+        pipeline.ltrim.assert_called_once_with("agent_session_events_roadflow_7_s1", -50, -1)
+        pipeline.hset.assert_any_call("agent_session_state_roadflow_7_s1", "topic", '"release"')
+        pipeline.hset.assert_any_call("agent_user_state_roadflow_7", "name", '"Ana"')
+        assert all("scratch" not in str(c) for c in pipeline.hset.call_args_list)
+        assert session.events == [event]
+
+    async def test_partial_events_are_not_stored(self, mock_get_cache):
+        """Test that streamed partial events are not persisted."""
+        # Arrange
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+        service = RedisSessionService()
+        session = await service.create_session(app_name="roadflow", user_id="7", session_id="s1")
+        pipeline.reset_mock()
+        event = model_event("a")
+        event.partial = True
+
+        # Act
+        await service.append_event(session, event)
+
+        # Assert
+        pipeline.rpush.assert_not_called()
+        assert session.events == []
@@ -0,0 +1,216 @@
+from unittest.mock import MagicMock, Mock, patch
+
+import pytest
+
+from services.email import EmailResult, outbox
+
+
+def _email(email_id, to, attempts=0):
+    return Mock(
+        id=email_id,
+        to=to,
+        subject="Hello",
+        html="<p>Hi</p>",
+        text="",
+        from_email=None,
+        attempts=attempts,
+    )
+
+
+def _cache(used_before=0):
+    """Redis mock whose INCRBY adds to `used_before`."""
+    cache = MagicMock()
+    pipeline = cache.pipeline.return_value
+
+    def incrby(key, count):
+        pipeline.execute.return_value = [used_before + count, True]
+
+    pipeline.incrby.side_effect = incrby
+    return cache
+
+
+class TestEnqueueEmail:
+    """Test cases for storing emails in the outbox."""
+
+    @patch('services.celery_jobs.tasks.deliver_email_outbox')
+    @patch('services.email.outbox.repository')
+    def test_enqueue_stores_and_schedules(self, mock_repository, mock_task):
+        """Test that the email is stored and a delivery is scheduled."""
+        # Arrange
+        mock_repository.mongo.email_outbox.create.return_value = Mock(id="e1")
+
+        # Act
+        email_id = outbox.enqueue_email(
+            to="a@example.com", subject="Welcome", html="<p>Hi</p>", kind="signup_validation"
+        )
+
+        # Assert
+        stored = mock_repository.mongo.email_outbox.create.call_args[0][0]
+        assert stored.to == "a@example.com"
+        assert stored.status == "pending"
+        assert stored.kind == "signup_validation"
+        mock_task.delay.assert_called_once_with()
+        assert email_id == "e1"
+
+    @patch('services.celery_jobs.tasks.deliver_email_outbox')
+    @patch('services.email.outbox.repository')
+    def test_enqueue_survives_broker_errors(self, mock_repository, mock_task):
+        """Test that the email stays in the outbox when the broker is down."""
+        # Arrange
+        mock_repository.mongo.email_outbox.create.return_value = Mock(id="e1")
+        mock_task.delay.side_effect = ConnectionError("broker down")
+
+        # Act
+        email_id = outbox.enqueue_email(to="a@example.com", subject="Welcome")
+
+        # Assert
+        assert email_id == "e1"
+
+    @patch('services.email.outbox.repository')
+    def test_enqueue_requires_recipient(self, mock_repository):
+        """Test that an email without recipient is rejected."""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            outbox.enqueue_email(to="", subject="Welcome")
+        mock_repository.mongo.email_outbox.create.assert_not_called()
+
+
+class TestDeliverPending:
+    """Test cases for delivering the outbox."""
+
+    @patch('services.email.outbox.send_batch')
+    @patch('services.email.outbox.get_cache')
+    @patch('services.email.outbox.repository')
+    def test_deliver_marks_results(self, mock_repository, mock_get_cache, mock_send_batch):
+        """Test that sent emails are marked sent and failures are rescheduled."""
+        # Arrange
+        mock_get_cache.return_value = _cache()
+        repo = mock_repository.mongo.email_outbox
+        repo.claim_batch.return_value = [_email("e1", "a@example.com"), _email("e2", "bad")]
+        mock_send_batch.return_value = [
+            EmailResult(to="a@example.com", success=True, id="p1", attempts=1),
+            EmailResult(to="bad", success=False, error="invalid", attempts=1),
+        ]
+
+        # Act
+        sent = outbox.deliver_pending(batch_size=10)
+
+        # Assert
+        assert sent == 1
+        assert len(mock_send_batch.call_args[0][0]) == 2
+        assert mock_send_batch.call_args[1]["idempotency_key"].startswith("outbox-")
+        repo.mark_sent.assert_called_once_with("e1", "p1", 1)
+        email_id, error, attempts, retry_at = repo.mark_failed.call_args[0]
+        assert (email_id, error, attempts) == ("e2", "invalid", 1)
+        assert retry_at is not None
+
+    @patch('services.email.outbox.send_batch')
+    @patch('services.email.outbox.get_cache')
+    @patch('services.email.outbox.repository')
+    def test_deliver_gives_up_after_max_attempts(
+        self, mock_repository, mock_get_cache, mock_send_batch
+    ):
+        """Test that an email failing MAX_ATTEMPTS times is marked failed."""
+        # Arrange
+        mock_get_cache.return_value = _cache()
+        repo = mock_repository.mongo.email_outbox
+        repo.claim_batch.return_value = [
+            _email("e1", "a@example.com", attempts=outbox.MAX_ATTEMPTS - 1)
+        ]
+        mock_send_batch.return_value = [
+            EmailResult(to="a@example.com", success=False, error="down")
+        ]
+
+        # Act
+        outbox.deliver_pending(batch_size=10)
+
+        # Assert
+        assert repo.mark_failed.call_args[0] == ("e1", "down", outbox.MAX_ATTEMPTS, None)
+
+    @patch('services.email.outbox.send_batch')
+    @patch('services.email.outbox.get_cache')
+    @patch('services.email.outbox.repository')
+    def test_deliver_respects_rate_limit(self, mock_repository, mock_get_cache, mock_send_batch):
+        """Test that only the remaining budget of the minute is claimed."""
+        # Arrange
+        cache = _cache(used_before=outbox.RATE_LIMIT - 3)
+        mock_get_cache.return_value = cache
+        repo = mock_repository.mongo.email_outbox
+        repo.claim_batch.return_value = []
+
+        # Act
+        outbox.deliver_pending(batch_size=10)
+
+        # Assert
+        assert repo.claim_batch.call_args[0][0] == 3
+        # The unused budget is returned
+        cache.decrby.assert_called_with(cache.decrby.call_args[0][0], 3)
+
+    @patch('services.email.outbox.send_batch')
+    @patch('services.email.outbox.get_cache')
+    @patch('services.email.outbox.repository')
+    def test_deliver_stops_when_budget_exhausted(
+        self, mock_repository, mock_get_cache, mock_send_batch
+    ):
+        """Test that nothing is claimed once the rate limit is reached."""
+        # Arrange
+        mock_get_cache.return_value = _cache(used_before=outbox.RATE_LIMIT)
+
+        # Act
+        sent = outbox.deliver_pending(batch_size=10)
+
+        # Assert
+        assert sent == 0
+        mock_repository.mongo.email_outbox.claim_batch.assert_not_called()
+        mock_send_batch.assert_not_called()
+
+    @patch('services.email.outbox.send_batch')
+    @patch('services.email.outbox.get_cache')
+    @patch('services.email.outbox.repository')
+    def test_deliver_releases_emails_on_errors(
+        self, mock_repository, mock_get_cache, mock_send_batch
+    ):
+        """Test that claimed emails are released when the batch cannot be sent."""
+        # Arrange
+        cache = _cache()
+        mock_get_cache.return_value = cache
+        repo = mock_repository.mongo.email_outbox
+        repo.claim_batch.return_value = [_email("e1", "a@example.com")]
+        mock_send_batch.side_effect = RuntimeError("provider down")
+
+        # Act
+        with pytest.raises(RuntimeError):
+            outbox.deliver_pending(batch_size=10)
+
+        # Assert
+        repo.release.assert_called_once_with(["e1"])
+        repo.mark_failed.assert_not_called()
+        cache.decrby.assert_called_with(cache.decrby.call_args[0][0], 1)
+
+    @patch('services.email.outbox.send_batch')
+    @patch('services.email.outbox.get_cache')
+    @patch('services.email.outbox.repository')
+    def test_deliver_releases_emails_without_result(
+        self, mock_repository, mock_get_cache, mock_send_batch
+    ):
+        """Test that emails missing from the results are released."""
+        # Arrange
+        mock_get_cache.return_value = _cache()
+        repo = mock_repository.mongo.email_outbox
+        repo.claim_batch.return_value = [_email("e1", "a@example.com"), _email("e2", "b")]
+        mock_send_batch.return_value = [
+            EmailResult(to="a@example.com", success=True, id="p1", attempts=1)
+        ]
+
+        # Act
+        outbox.deliver_pending(batch_size=10)
+
+        # Assert
+        repo.mark_sent.assert_called_once_with("e1", "p1", 1)
+        repo.release.assert_called_once_with(["e2"])
+
+    def test_retry_delay_is_capped(self):
+        """Test that the retry delay doubles and is capped."""
+        # Assert
+        assert outbox.retry_delay(2) == outbox.RETRY_BASE * 2
+        assert outbox.retry_delay(100) == outbox.MAX_RETRY_DELAY
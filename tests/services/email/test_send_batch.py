@@ -0,0 +1,130 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+import resend
+
+from services.email import send_batch
+
+
+class ResendStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the batch endpoint of the email API."""
+
+    requests: list = []
+    # Status codes to answer with, in order; then 200.
+    statuses: list = []
+    # Recipients rejected as invalid; a batch containing one fails with 422.
+    invalid: set = set()
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests.append(
+            {"path": self.path, "body": body, "idempotency_key": self.headers.get("Idempotency-Key")}
+        )
+        status = type(self).statuses.pop(0) if type(self).statuses else 200
+        if status == 200 and any(message["to"] in type(self).invalid for message in body):
+            status = 422
+        if status == 200:
+            count = len(type(self).requests)
+            response = {"data": [{"id": f"email_{count}_{i}"} for i in range(len(body))]}
+        else:
+            response = {"statusCode": status, "name": "error", "message": f"status {status}"}
+        payload = json.dumps(response).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def email_api():
+    ResendStandIn.requests = []
+    ResendStandIn.statuses = []
+    ResendStandIn.invalid = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ResendStandIn)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    with patch.object(resend, "api_url", f"http://127.0.0.1:{server.server_port}"), \
+            patch('services.email.RETRY_BACKOFF', 0):
+        yield ResendStandIn
+    server.shutdown()
+    server.server_close()
+
+
+def make_messages(count: int) -> list[dict]:
+    return [{"to": f"user{i}@example.com", "subject": "Hi", "text": "Hello"} for i in range(count)]
+
+
+class TestSendBatch:
+    """Test cases for batched email sending against a local stand-in of the API."""
+
+    def test_send_batch_in_chunks(self, email_api):
+        """Test that messages are sent in batches of at most 100."""
+        # Act
+        results = send_batch(make_messages(150), idempotency_key="log_1")
+
+        # Assert
+        assert len(email_api.requests) == 2
+        assert {request["path"] for request in email_api.requests} == {"/emails/batch"}
+        assert sorted(len(request["body"]) for request in email_api.requests) == [50, 100]
+        assert all(result.success and result.id for result in results)
+        assert [result.to for result in results] == [f"user{i}@example.com" for i in range(150)]
+        assert all(request["idempotency_key"].startswith("log_1-") for request in email_api.requests)
+
+    def test_send_batch_retries_server_errors(self, email_api):
+        """Test that rate limits are retried with the same idempotency key."""
+        # Arrange
+        email_api.statuses = [429, 503]
+
+        # Act
+        results = send_batch(make_messages(3), retries=3)
+
+        # Assert
+        assert len(email_api.requests) == 3
+        assert len({request["idempotency_key"] for request in email_api.requests}) == 1
+        assert all(result.success and result.attempts == 3 for result in results)
+
+    def test_send_batch_isolates_invalid_recipients(self, email_api):
+        """Test that a rejected batch is resent per recipient to report each result."""
+        # Arrange
+        email_api.invalid = {"user1@example.com"}
+
+        # Act
+        results = send_batch(make_messages(3))
+
+        # Assert
+        assert [result.success for result in results] == [True, False, True]
+        assert results[1].error
+        # One rejected batch, then one request per recipient; validation errors are not retried.
+        assert len(email_api.requests) == 4
+
+    def test_send_batch_gives_up_after_retries(self, email_api):
+        """Test that persistent server errors are reported per recipient."""
+        # Arrange
+        email_api.statuses = [500] * 10
+
+        # Act
+        results = send_batch(make_messages(1), retries=2)
+
+        # Assert
+        assert len(email_api.requests) == 3
+        assert results[0].success is False
+        assert results[0].attempts == 3
+
+    def test_send_batch_does_not_split_throttled_batches(self, email_api):
+        """Test that a batch still rate limited after its retries is not resent per recipient."""
+        # Arrange
+        email_api.statuses = [429] * 10
+
+        # Act
+        results = send_batch(make_messages(3), retries=2)
+
+        # Assert
+        assert len(email_api.requests) == 3
+        assert all(result.success is False and result.attempts == 3 for result in results)
@@ -1,3 +1,4 @@
+import contextlib
 from unittest.mock import Mock, patch
 
 
@@ -55,6 +56,74 @@ class TestCeleryTasks:
             source_log_id=source_log_id
         )
 
+    @patch('services.celery_jobs.tasks.get_payload_store')
+    @patch('services.celery_jobs.tasks.repository')
+    @patch('services.celery_jobs.tasks.WorkflowService')
+    def test_run_workflow_with_payload_ref(self, mock_workflow_service, mock_repository, mock_get_payload_store):
+        """Test that a payload reference is loaded and projected for the workflow."""
+        from services.celery_jobs.tasks import run_workflow
+
+        # Arrange
+        mock_workflow = Mock()
+        mock_workflow.payload_fields = ["branch", "commits.message"]
+        mock_repository.mongo.workflow.find_by_id.return_value = mock_workflow
+        mock_get_payload_store.return_value.get.return_value = {
+            "branch": "main",
+            "repository": {"name": "repo"},
+            "commits": [{"id": "abc", "message": "fix"}],
+        }
+
+        # Act
+        run_workflow.run("workflow_123", payload_ref="payload_hash", source="git_webhook")
+
+        # Assert
+        mock_get_payload_store.return_value.get.assert_called_once_with("payload_hash")
+        mock_workflow_service.run_workflow.assert_called_once_with(
+            mock_workflow,
+            {"branch": "main", "commits": [{"message": "fix"}]},
+            context={},
+            source="git_webhook",
+            source_log_id=None
+        )
+
+    @patch('services.celery_jobs.tasks.get_payload_store')
+    @patch('services.celery_jobs.tasks.repository')
+    @patch('services.celery_jobs.tasks.WorkflowService')
+    def test_run_workflow_with_projected_payload_ref(self, mock_workflow_service, mock_repository, mock_get_payload_store):
+        """Test that an already projected payload, like a coalesced batch, is not projected again."""
+        from services.celery_jobs.tasks import run_workflow
+
+        # Arrange
+        mock_workflow = Mock()
+        mock_workflow.payload_fields = ["branch"]
+        mock_repository.mongo.workflow.find_by_id.return_value = mock_workflow
+        batch = {"batch": True, "count": 2, "events": [{"branch": "a"}, {"branch": "b"}]}
+        mock_get_payload_store.return_value.get.return_value = batch
+
+        # Act
+        run_workflow.run("workflow_123", payload_ref="batch_ref", projected=True)
+
+        # Assert
+        assert mock_workflow_service.run_workflow.call_args[0][1] == batch
+
+    @patch('services.celery_jobs.tasks.get_payload_store')
+    @patch('services.celery_jobs.tasks.repository')
+    @patch('services.celery_jobs.tasks.WorkflowService')
+    def test_run_workflow_with_expired_payload_ref(self, mock_workflow_service, mock_repository, mock_get_payload_store):
+        """Test that a missing payload skips the workflow run."""
+        from services.celery_jobs.tasks import run_workflow
+
+        # Arrange
+        mock_repository.mongo.workflow.find_by_id.return_value = Mock()
+        mock_get_payload_store.return_value.get.return_value = None
+
+        # Act
+        result = run_workflow.run("workflow_123", payload_ref="expired_hash")
+
+        # Assert
+        assert result is None
+        mock_workflow_service.run_workflow.assert_not_called()
+
     @patch('services.celery_jobs.tasks.repository')
     @patch('services.celery_jobs.tasks.WorkflowService')
     def test_run_workflow_not_found(self, mock_workflow_service, mock_repository):
@@ -133,6 +202,26 @@ class TestCeleryTasks:
             source_log_id=source_log_id
         )
 
+    @patch('services.celery_jobs.tasks.schedule')
+    @patch('services.celery_jobs.tasks.release_run')
+    @patch('services.celery_jobs.tasks.repository')
+    @patch('services.celery_jobs.tasks.WorkflowService')
+    def test_run_workflow_releases_inflight_run(self, mock_workflow_service, mock_repository, mock_release_run, mock_schedule):
+        """Test that the in-flight run is released and the next runs scheduled even on failure."""
+        from services.celery_jobs.tasks import run_workflow
+
+        # Arrange
+        mock_repository.mongo.workflow.find_by_id.return_value = Mock()
+        mock_workflow_service.run_workflow.side_effect = Exception("agent failed")
+
+        # Act
+        with contextlib.suppress(Exception):
+            run_workflow.run("workflow_123", payload={}, org_id=123)
+
+        # Assert
+        mock_release_run.assert_called_once_with(123)
+        mock_schedule.assert_called_once()
+
     @patch('services.celery_jobs.tasks.repository')
     @patch('services.celery_jobs.tasks.WorkflowService')
     @patch('services.celery_jobs.tasks.logger')
@@ -153,3 +242,68 @@ class TestCeleryTasks:
         mock_logger.error.assert_called_once_with(
             f"Workflow with ID {workflow_id} not found."
         )
+
+    @patch('services.celery_jobs.tasks.enqueue_run')
+    @patch('services.celery_jobs.tasks.drain_events')
+    @patch('services.celery_jobs.tasks.get_payload_store')
+    @patch('services.celery_jobs.tasks.repository')
+    @patch('services.celery_jobs.tasks.WorkflowService')
+    def test_flush_coalesced_workflow(self, mock_workflow_service, mock_repository, mock_get_payload_store, mock_drain_events, mock_enqueue_run):
+        """Test that buffered events are queued as one run with a batched payload."""
+        from services.celery_jobs.tasks import flush_coalesced_workflow
+
+        # Arrange
+        mock_workflow = Mock()
+        mock_workflow.payload_fields = None
+        mock_workflow.organizationId = 7
+        mock_repository.mongo.workflow.find_by_id.return_value = mock_workflow
+        mock_drain_events.return_value = [
+            {"payload_ref": "ref_1", "source_log_id": "log_1"},
+            {"payload_ref": "ref_2", "source_log_id": "log_2"},
+        ]
+        mock_get_payload_store.return_value.get.side_effect = [
+            {"after": "a", "commits": [{"id": "a"}]},
+            {"after": "b", "commits": [{"id": "b"}]},
+        ]
+        mock_get_payload_store.return_value.put.return_value = "batch_ref"
+
+        # Act
+        result = flush_coalesced_workflow.run("workflow_123", source="git_webhook")
+
+        # Assert
+        assert result == 2
+        mock_get_payload_store.return_value.put.assert_called_once_with(
+            {
+                "batch": True,
+                "count": 2,
+                "events": [{"after": "a"}, {"after": "b"}],
+                "commits": [{"id": "a"}, {"id": "b"}],
+            }
+        )
+        mock_enqueue_run.assert_called_once_with(
+            7,
+            "git_webhook",
+            workflow_id="workflow_123",
+            payload_ref="batch_ref",
+            projected=True,
+            source="git_webhook",
+            source_log_id="log_1",
+        )
+        mock_workflow_service.run_workflow.assert_not_called()
+
+    @patch('services.celery_jobs.tasks.drain_events')
+    @patch('services.celery_jobs.tasks.repository')
+    @patch('services.celery_jobs.tasks.WorkflowService')
+    def test_flush_coalesced_workflow_empty(self, mock_workflow_service, mock_repository, mock_drain_events):
+        """Test that an empty window does not run the workflow."""
+        from services.celery_jobs.tasks import flush_coalesced_workflow
+
+        # Arrange
+        mock_drain_events.return_value = []
+
+        # Act
+        flush_coalesced_workflow.run("workflow_123")
+
+        # Assert
+        mock_repository.mongo.workflow.find_by_id.assert_not_called()
+        mock_workflow_service.run_workflow.assert_not_called()
@@ -0,0 +1,270 @@
+import json
+from unittest.mock import Mock, patch
+
+from services.webhook_service.consumer import (
+    ATTEMPTS_KEY,
+    DEAD_LETTER_STREAM,
+    WebhookConsumer,
+)
+from services.webhook_service.stream import (
+    DEFERRED_CURSOR_KEY,
+    DEFERRED_STREAM,
+    decode_entry,
+    forwarded_headers,
+    requeue_deferred,
+)
+
+PUSH_BODY = json.dumps(
+    {
+        "ref": "refs/heads/main",
+        "repository": {"name": "repo", "full_name": "org/repo"},
+        "commits": [],
+    }
+)
+
+
+def make_entry(entry_id: bytes, body: str = PUSH_BODY, org_id: int = 7) -> tuple:
+    return (
+        entry_id,
+        {
+            b"webhook_key": b"hook",
+            b"org_id": str(org_id).encode(),
+            b"delivery": b"x-github-delivery:1",
+            b"headers": json.dumps({"x-github-event": "push"}).encode(),
+            b"body": body.encode(),
+        },
+    )
+
+
+class TestWebhookStream:
+    """Test cases for the webhook ingest stream entries."""
+
+    def test_forwarded_headers(self):
+        """Test that only the headers needed for normalization are kept."""
+        # Act
+        headers = forwarded_headers(
+            {"X-GitHub-Event": "push", "Authorization": "secret", "User-Agent": "GitHub-Hookshot"}
+        )
+
+        # Assert
+        assert headers == {"x-github-event": "push", "user-agent": "GitHub-Hookshot"}
+
+    def test_decode_entry(self):
+        """Test decoding the raw fields of a stream entry."""
+        # Act
+        delivery = decode_entry(make_entry(b"1-0")[1])
+
+        # Assert
+        assert delivery["org_id"] == 7
+        assert delivery["webhook_key"] == "hook"
+        assert delivery["headers"] == {"x-github-event": "push"}
+        assert json.loads(delivery["body"])["ref"] == "refs/heads/main"
+
+
+    @patch('services.webhook_service.stream.check_admission')
+    @patch('services.webhook_service.stream.get_cache')
+    def test_requeue_deferred(self, mock_get_cache, mock_check_admission):
+        """Test that deferred deliveries are requeued only for admitted organizations."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.get.return_value = None
+        cache.xrange.side_effect = [
+            [
+                make_entry(b"1-0", org_id=7),
+                make_entry(b"2-0", org_id=8),
+                make_entry(b"3-0", org_id=8),
+            ],
+            [],
+        ]
+        mock_check_admission.side_effect = lambda org_id: Mock(admitted=org_id == 7)
+
+        # Act
+        moved = requeue_deferred()
+
+        # Assert
+        assert moved == 1
+        assert mock_check_admission.call_count == 2
+        cache.pipeline.return_value.xdel.assert_called_once_with(DEFERRED_STREAM, b"1-0")
+        cache.delete.assert_called_once_with(DEFERRED_CURSOR_KEY)
+
+    @patch('services.webhook_service.stream.check_admission')
+    @patch('services.webhook_service.stream.get_cache')
+    def test_requeue_deferred_pages_past_rejected_entries(
+        self, mock_get_cache, mock_check_admission
+    ):
+        """Test that entries beyond the first page are reached."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.get.return_value = None
+        cache.xrange.side_effect = [
+            [make_entry(b"1-0", org_id=8), make_entry(b"2-0", org_id=8)],
+            [make_entry(b"3-0", org_id=7)],
+            [],
+        ]
+        mock_check_admission.side_effect = lambda org_id: Mock(admitted=org_id == 7)
+
+        # Act
+        moved = requeue_deferred(limit=2)
+
+        # Assert
+        assert moved == 1
+        assert cache.xrange.call_args_list[1][1]["min"] == "(2-0"
+        cache.pipeline.return_value.xdel.assert_called_once_with(DEFERRED_STREAM, b"3-0")
+
+    @patch('services.webhook_service.stream.check_admission')
+    @patch('services.webhook_service.stream.get_cache')
+    def test_requeue_deferred_resumes_from_cursor(self, mock_get_cache, mock_check_admission):
+        """Test that a run resumes after the previous one and wraps around."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.get.return_value = b"5-0"
+        cache.xrange.side_effect = [[make_entry(b"6-0", org_id=8)], [], []]
+        mock_check_admission.return_value = Mock(admitted=False)
+
+        # Act
+        requeue_deferred(limit=1, scan=2)
+
+        # Assert
+        ranges = [(c[1]["min"], c[1]["max"]) for c in cache.xrange.call_args_list]
+        assert ranges == [("(5-0", "+"), ("(6-0", "+"), ("-", "5-0")]
+        cache.delete.assert_called_once_with(DEFERRED_CURSOR_KEY)
+
+    @patch('services.webhook_service.stream.check_admission')
+    @patch('services.webhook_service.stream.get_cache')
+    def test_requeue_deferred_stores_cursor(self, mock_get_cache, mock_check_admission):
+        """Test that a run stopping at its scan budget records where it stopped."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.get.return_value = None
+        cache.xrange.side_effect = [[make_entry(b"1-0", org_id=8), make_entry(b"2-0", org_id=8)]]
+        mock_check_admission.return_value = Mock(admitted=False)
+
+        # Act
+        requeue_deferred(limit=2, scan=2)
+
+        # Assert
+        cache.set.assert_called_once_with(DEFERRED_CURSOR_KEY, "2-0")
+
+
+@patch('services.webhook_service.consumer.metrics')
+@patch('services.webhook_service.consumer.WorkflowService')
+@patch('services.webhook_service.consumer.repository')
+@patch('services.webhook_service.consumer.get_payload_store')
+@patch('services.webhook_service.consumer.get_cache')
+class TestWebhookConsumer:
+    """Test cases for the webhook ingest stream consumer."""
+
+    def test_process_batch(self, mock_get_cache, mock_get_payload_store, mock_repository, mock_workflow_service, mock_metrics):
+        """Test that a batch creates the logs at once and dispatches every delivery."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        mock_get_payload_store.return_value.put.side_effect = ["ref_1", "ref_2"]
+        mock_repository.mongo.logs.upsert_by_delivery.return_value = ["log_1", "log_2"]
+        consumer = WebhookConsumer(name="test")
+
+        # Act
+        dispatched = consumer.process([make_entry(b"1-0"), make_entry(b"2-0", org_id=8)])
+
+        # Assert
+        assert dispatched == 2
+        logs = mock_repository.mongo.logs.upsert_by_delivery.call_args[0][0]
+        assert [log.payload_ref for log in logs] == ["ref_1", "ref_2"]
+        assert [log.organizationId for log in logs] == [7, 8]
+        mock_workflow_service.assert_any_call(org_id=8, event="git_webhook")
+        assert [log.delivery_id for log in logs] == ["hook:x-github-delivery:1"] * 2
+        assert logs[0].data["ref"] == "refs/heads/main"
+        dispatch = mock_workflow_service.return_value.dispatch.call_args_list[0]
+        assert dispatch.args == ("ref_1",)
+        assert dispatch.kwargs["source_log_id"] == "log_1"
+        cache.pipeline.return_value.xack.assert_called_once_with(
+            "webhooks_ingest", "webhook_consumers", b"1-0", b"2-0"
+        )
+
+    def test_process_dead_letters_malformed_delivery(self, mock_get_cache, mock_get_payload_store, mock_repository, mock_workflow_service, mock_metrics):
+        """Test that a delivery with an invalid body is not retried."""
+        # Arrange
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+        consumer = WebhookConsumer(name="test")
+
+        # Act
+        dispatched = consumer.process([make_entry(b"1-0", body="not json")])
+
+        # Assert
+        assert dispatched == 0
+        assert pipeline.xadd.call_args[0][0] == DEAD_LETTER_STREAM
+        pipeline.xack.assert_called_once_with("webhooks_ingest", "webhook_consumers", b"1-0")
+        mock_repository.mongo.logs.upsert_by_delivery.assert_not_called()
+        mock_metrics.increment.assert_called_once_with("webhook_deliveries_dead_lettered")
+
+    def test_process_dead_letters_non_object_body(self, mock_get_cache, mock_get_payload_store, mock_repository, mock_workflow_service, mock_metrics):
+        """Test that a JSON body that is not an object is dead-lettered and the batch goes on."""
+        # Arrange
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+        mock_get_payload_store.return_value.put.return_value = "ref_2"
+        mock_repository.mongo.logs.upsert_by_delivery.return_value = ["log_2"]
+        consumer = WebhookConsumer(name="test")
+
+        # Act
+        dispatched = consumer.process([make_entry(b"1-0", body="[]"), make_entry(b"2-0")])
+
+        # Assert
+        assert dispatched == 1
+        assert pipeline.xadd.call_args[0][0] == DEAD_LETTER_STREAM
+        pipeline.xack.assert_any_call("webhooks_ingest", "webhook_consumers", b"1-0")
+        pipeline.xack.assert_any_call("webhooks_ingest", "webhook_consumers", b"2-0")
+
+    def test_process_keeps_failed_dispatch_pending(self, mock_get_cache, mock_get_payload_store, mock_repository, mock_workflow_service, mock_metrics):
+        """Test that a failed dispatch is left pending for a retry."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.hincrby.return_value = 1
+        mock_get_payload_store.return_value.put.return_value = "ref_1"
+        mock_repository.mongo.logs.upsert_by_delivery.return_value = ["log_1"]
+        mock_workflow_service.return_value.dispatch.side_effect = Exception("redis down")
+        consumer = WebhookConsumer(name="test")
+
+        # Act
+        dispatched = consumer.process([make_entry(b"1-0")])
+
+        # Assert
+        assert dispatched == 0
+        cache.hincrby.assert_called_once_with(ATTEMPTS_KEY, b"1-0", 1)
+        cache.pipeline.return_value.xack.assert_not_called()
+
+    def test_process_skips_workflows_dispatched_by_earlier_attempt(self, mock_get_cache, mock_get_payload_store, mock_repository, mock_workflow_service, mock_metrics):
+        """Test that a retried delivery only dispatches the workflows that were not dispatched."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.smembers.return_value = {b"wf_1"}
+        mock_get_payload_store.return_value.put.return_value = "ref_1"
+        mock_repository.mongo.logs.upsert_by_delivery.return_value = ["log_1"]
+        consumer = WebhookConsumer(name="test")
+
+        # Act
+        consumer.process([make_entry(b"1-0")])
+        dispatch = mock_workflow_service.return_value.dispatch.call_args
+        dispatch.kwargs["on_dispatched"]("wf_2")
+
+        # Assert
+        cache.smembers.assert_called_once_with("webhook_dispatched_hook:x-github-delivery:1")
+        assert dispatch.kwargs["skip"] == {"wf_1"}
+        cache.pipeline.return_value.sadd.assert_called_once_with(
+            "webhook_dispatched_hook:x-github-delivery:1", "wf_2"
+        )
+
+    def test_run_once_prefers_stale_entries(self, mock_get_cache, mock_get_payload_store, mock_repository, mock_workflow_service, mock_metrics):
+        """Test that pending entries of dead consumers are recovered first."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.xautoclaim.return_value = [b"0-0", [make_entry(b"1-0"), (b"2-0", None)], []]
+        mock_get_payload_store.return_value.put.return_value = "ref_1"
+        mock_repository.mongo.logs.upsert_by_delivery.return_value = ["log_1"]
+        consumer = WebhookConsumer(name="test")
+
+        # Act
+        dispatched = consumer.run_once()
+
+        # Assert
+        assert dispatched == 1
+        cache.xack.assert_called_once_with("webhooks_ingest", "webhook_consumers", b"2-0")
+        cache.xreadgroup.assert_not_called()
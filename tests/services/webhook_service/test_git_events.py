@@ -0,0 +1,130 @@
+from services.webhook_service.git_events import (
+    detect_provider,
+    normalize_git_event,
+)
+
+
+class TestGitEvents:
+    """Test cases for git webhook normalization."""
+
+    def test_detect_provider_from_headers(self):
+        """Test provider detection, preferring the Gitea header over GitHub's."""
+        assert detect_provider({}, {"X-GitHub-Event": "push"}) == "github"
+        assert detect_provider({}, {"X-Gitlab-Event": "Push Hook"}) == "gitlab"
+        assert (
+            detect_provider({}, {"X-GitHub-Event": "push", "X-Gitea-Event": "push"})
+            == "gitea"
+        )
+
+    def test_detect_provider_from_payload(self):
+        """Test provider detection without headers."""
+        assert detect_provider({"object_kind": "push"}) == "gitlab"
+        assert detect_provider({"compare_url": "http://gitea"}) == "gitea"
+        assert detect_provider({"head_commit": {}}) == "github"
+        assert detect_provider({}) == "unknown"
+
+    def test_normalize_github_push(self):
+        """Test normalizing a GitHub push payload."""
+        # Arrange
+        payload = {
+            "ref": "refs/heads/main",
+            "before": "000",
+            "after": "abc",
+            "compare": "https://github.com/org/repo/compare/000...abc",
+            "repository": {
+                "name": "repo",
+                "full_name": "org/repo",
+                "html_url": "https://github.com/org/repo",
+                "default_branch": "main",
+                "owner": {"login": "org"},
+            },
+            "pusher": {"name": "dev", "email": "dev@example.com"},
+            "sender": {"login": "dev", "avatar_url": "https://avatars"},
+            "commits": [
+                {
+                    "id": "abc",
+                    "message": "Fix bug",
+                    "timestamp": "2024-01-01T00:00:00Z",
+                    "url": "https://github.com/org/repo/commit/abc",
+                    "author": {"name": "Dev", "email": "dev@example.com", "username": "dev"},
+                    "added": ["a.py"],
+                    "removed": [],
+                    "modified": ["b.py"],
+                    "tree_id": "tree",
+                }
+            ],
+            "head_commit": {"id": "abc"},
+        }
+
+        # Act
+        event = normalize_git_event(payload, {"X-GitHub-Event": "push"})
+
+        # Assert
+        assert event["provider"] == "github"
+        assert event["event"] == "push"
+        assert event["branch"] == "main"
+        assert event["ref_type"] == "branch"
+        assert event["tag"] is None
+        assert event["repository"]["full_name"] == "org/repo"
+        assert event["pusher"]["username"] == "dev"
+        assert event["total_commits"] == 1
+        assert event["commits"][0]["message"] == "Fix bug"
+        assert "tree_id" not in event["commits"][0]
+        assert "head_commit" not in event
+
+    def test_normalize_gitlab_push(self):
+        """Test normalizing a GitLab push payload."""
+        # Arrange
+        payload = {
+            "object_kind": "tag_push",
+            "ref": "refs/tags/v1.0.0",
+            "checkout_sha": "def",
+            "user_name": "Dev",
+            "user_username": "dev",
+            "user_email": "dev@example.com",
+            "project": {
+                "name": "repo",
+                "path_with_namespace": "group/repo",
+                "web_url": "https://gitlab.com/group/repo",
+                "default_branch": "main",
+            },
+            "commits": [],
+            "total_commits_count": 0,
+        }
+
+        # Act
+        event = normalize_git_event(payload, {"X-Gitlab-Event": "Tag Push Hook"})
+
+        # Assert
+        assert event["provider"] == "gitlab"
+        assert event["event"] == "push"
+        assert event["ref_type"] == "tag"
+        assert event["tag"] == "v1.0.0"
+        assert event["branch"] is None
+        assert event["after"] == "def"
+        assert event["repository"]["full_name"] == "group/repo"
+        assert event["pusher"]["username"] == "dev"
+
+    def test_normalize_github_tag_push(self):
+        """Test that GitHub tag pushes are marked like GitLab ones."""
+        # Arrange
+        payload = {"ref": "refs/tags/v1.0.0", "commits": [], "repository": {}}
+
+        # Act
+        event = normalize_git_event(payload, {"X-GitHub-Event": "push"})
+
+        # Assert
+        assert (event["event"], event["ref_type"], event["tag"]) == ("push", "tag", "v1.0.0")
+
+    def test_normalize_non_push_event_keeps_payload(self):
+        """Test that non-push events keep their original payload."""
+        # Arrange
+        payload = {"action": "opened", "pull_request": {"id": 1}, "repository": {}}
+
+        # Act
+        event = normalize_git_event(payload, {"X-GitHub-Event": "pull_request"})
+
+        # Assert
+        assert event["event"] == "pull_request"
+        assert event["action"] == "opened"
+        assert event["data"] == payload
@@ -0,0 +1,69 @@
+import hashlib
+from unittest.mock import patch
+
+from services.webhook_service.idempotency import (
+    claim_delivery,
+    idempotency_key,
+    release_delivery,
+)
+
+
+class TestWebhookIdempotency:
+    """Test cases for webhook redelivery deduplication."""
+
+    def test_idempotency_key_from_delivery_header(self):
+        """Test that provider delivery ids are preferred."""
+        # Act
+        key = idempotency_key({"X-GitHub-Delivery": "abc-123"}, b"{}")
+
+        # Assert
+        assert key == "x-github-delivery:abc-123"
+
+    def test_idempotency_key_from_body_hash(self):
+        """Test the payload hash fallback."""
+        # Arrange
+        body = b'{"ref": "refs/heads/main"}'
+
+        # Act
+        key = idempotency_key({}, body)
+
+        # Assert
+        assert key == f"sha256:{hashlib.sha256(body).hexdigest()}"
+
+    @patch('services.webhook_service.idempotency.get_cache')
+    def test_claim_delivery_first_time(self, mock_get_cache):
+        """Test claiming a new delivery."""
+        # Arrange
+        mock_get_cache.return_value.set.return_value = True
+
+        # Act
+        result = claim_delivery("hook", "x-github-delivery:1", ttl=60)
+
+        # Assert
+        assert result is True
+        mock_get_cache.return_value.set.assert_called_once_with(
+            "webhook_delivery_hook_x-github-delivery:1", "1", nx=True, ex=60
+        )
+
+    @patch('services.webhook_service.idempotency.get_cache')
+    def test_claim_delivery_duplicate(self, mock_get_cache):
+        """Test that a redelivery within the window is rejected."""
+        # Arrange
+        mock_get_cache.return_value.set.return_value = None
+
+        # Act
+        result = claim_delivery("hook", "x-github-delivery:1")
+
+        # Assert
+        assert result is False
+
+    @patch('services.webhook_service.idempotency.get_cache')
+    def test_release_delivery(self, mock_get_cache):
+        """Test releasing a claimed delivery."""
+        # Act
+        release_delivery("hook", "sha256:abc")
+
+        # Assert
+        mock_get_cache.return_value.delete.assert_called_once_with(
+            "webhook_delivery_hook_sha256:abc"
+        )
@@ -0,0 +1,97 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+
+from services.webhook_service import resolver
+from services.webhook_service.resolver import invalidate_webhook_key, resolve_org_id
+
+
+@pytest.fixture(autouse=True)
+def clear_local_tier():
+    resolver._local.clear()
+    yield
+    resolver._local.clear()
+
+
+@patch('services.webhook_service.resolver.repository')
+@patch('services.webhook_service.resolver.get_cache')
+class TestWebhookResolver:
+    """Test cases for the webhook key to organization resolution cache."""
+
+    async def test_resolve_from_database_and_cache(self, mock_get_cache, mock_repository):
+        """Test that a miss reads Postgres once and fills both tiers."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.get.return_value = None
+        mock_repository.sql.input_webhook.get_by_key = AsyncMock(return_value=Mock(org_id=7))
+
+        # Act
+        first = await resolve_org_id("hook")
+        second = await resolve_org_id("hook")
+
+        # Assert
+        assert first == second == 7
+        mock_repository.sql.input_webhook.get_by_key.assert_called_once_with("hook")
+        cache.set.assert_called_once_with(
+            "webhook_org_hook", 7, ex=resolver.RESOLVER_TTL
+        )
+
+    async def test_resolve_from_redis(self, mock_get_cache, mock_repository):
+        """Test that the Redis tier avoids the database."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = b"7"
+        mock_repository.sql.input_webhook.get_by_key = AsyncMock()
+
+        # Act
+        result = await resolve_org_id("hook")
+
+        # Assert
+        assert result == 7
+        mock_repository.sql.input_webhook.get_by_key.assert_not_called()
+
+    async def test_unknown_key_is_negatively_cached(self, mock_get_cache, mock_repository):
+        """Test that unknown keys are cached so spam does not reach Postgres."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.get.return_value = None
+        mock_repository.sql.input_webhook.get_by_key = AsyncMock(return_value=None)
+
+        # Act
+        first = await resolve_org_id("spam")
+        second = await resolve_org_id("spam")
+
+        # Assert
+        assert first is None and second is None
+        mock_repository.sql.input_webhook.get_by_key.assert_called_once_with("spam")
+        cache.set.assert_called_once_with(
+            "webhook_org_spam", resolver.UNKNOWN, ex=resolver.RESOLVER_NEGATIVE_TTL
+        )
+
+    async def test_unknown_key_from_redis(self, mock_get_cache, mock_repository):
+        """Test a negative entry stored in Redis."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = b"unknown"
+        mock_repository.sql.input_webhook.get_by_key = AsyncMock()
+
+        # Act
+        result = await resolve_org_id("spam")
+
+        # Assert
+        assert result is None
+        mock_repository.sql.input_webhook.get_by_key.assert_not_called()
+
+    async def test_invalidate_webhook_key(self, mock_get_cache, mock_repository):
+        """Test that invalidation clears both tiers."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = b"7"
+        await resolve_org_id("hook")
+        mock_get_cache.return_value.get.return_value = None
+        mock_repository.sql.input_webhook.get_by_key = AsyncMock(return_value=None)
+
+        # Act
+        invalidate_webhook_key("hook")
+        result = await resolve_org_id("hook")
+
+        # Assert
+        assert result is None
+        mock_get_cache.return_value.delete.assert_called_once_with("webhook_org_hook")
@@ -0,0 +1,89 @@
+from unittest.mock import patch
+
+from services.workflows import backpressure
+from services.workflows.backpressure import (
+    acquire_run,
+    check_admission,
+    get_inflight,
+    release_run,
+)
+
+
+@patch('services.workflows.backpressure.get_cache')
+class TestWorkflowBackpressure:
+    """Test cases for workflow admission control."""
+
+    def test_admitted(self, mock_get_cache):
+        """Test that work is admitted below both thresholds."""
+        # Arrange
+        mock_get_cache.return_value.llen.return_value = 3
+        mock_get_cache.return_value.get.side_effect = [b"4", b"2", b"1"]
+
+        # Act
+        admission = check_admission(123)
+
+        # Assert
+        assert admission.admitted is True
+        mock_get_cache.return_value.llen.assert_called_once_with("celery")
+        mock_get_cache.return_value.get.assert_any_call("workflow_pending_runs")
+        mock_get_cache.return_value.get.assert_any_call("workflow_inflight_123")
+        mock_get_cache.return_value.get.assert_called_with("workflow_pending_runs_123")
+
+    def test_rejected_when_queue_saturated(self, mock_get_cache):
+        """Test shedding when too many runs are waiting."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = str(backpressure.MAX_QUEUE_DEPTH - 1).encode()
+        mock_get_cache.return_value.llen.return_value = 1
+
+        # Act
+        admission = check_admission(123)
+
+        # Assert
+        assert admission.admitted is False
+        assert admission.retry_after == backpressure.RETRY_AFTER
+        mock_get_cache.return_value.get.assert_called_once_with("workflow_pending_runs")
+
+    def test_rejected_when_org_has_too_many_runs(self, mock_get_cache):
+        """Test shedding when an organization has too many runs queued or running."""
+        # Arrange
+        mock_get_cache.return_value.llen.return_value = 0
+        mock_get_cache.return_value.get.side_effect = [
+            None,
+            str(backpressure.MAX_ORG_INFLIGHT - 1).encode(),
+            b"1",
+        ]
+
+        # Act
+        admission = check_admission(123)
+
+        # Assert
+        assert admission.admitted is False
+        assert "queued or running" in admission.reason
+
+    def test_acquire_and_release_run(self, mock_get_cache):
+        """Test the in-flight counter of an organization."""
+        # Arrange
+        cache = mock_get_cache.return_value
+
+        # Act
+        acquire_run(123)
+        release_run(123)
+
+        # Assert
+        cache.pipeline.return_value.incr.assert_called_once_with("workflow_inflight_123")
+        cache.pipeline.return_value.expire.assert_called_once_with(
+            "workflow_inflight_123", backpressure.INFLIGHT_TTL
+        )
+        # The decrement and the removal at zero happen in one script
+        script, numkeys, key = cache.eval.call_args[0]
+        assert (numkeys, key) == (1, "workflow_inflight_123")
+        assert "decr" in script and "del" in script
+        cache.decr.assert_not_called()
+
+    def test_get_inflight_without_runs(self, mock_get_cache):
+        """Test an organization without runs in flight."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = None
+
+        # Act & Assert
+        assert get_inflight(123) == 0
@@ -0,0 +1,91 @@
+import json
+from unittest.mock import patch
+
+from services.workflows.coalesce import buffer_event, drain_events, merge_payloads
+
+
+class TestWorkflowCoalescing:
+    """Test cases for webhook burst coalescing."""
+
+    @patch('services.celery_jobs.tasks.flush_coalesced_workflow')
+    @patch('services.workflows.coalesce.get_cache')
+    def test_buffer_event_opens_window(self, mock_get_cache, mock_flush):
+        """Test that the first event of a window schedules a flush."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.set.return_value = True
+
+        # Act
+        opened = buffer_event("wf_1", window=30, payload_ref="ref_1", source="git_webhook", source_log_id="log_1")
+
+        # Assert
+        assert opened is True
+        member = json.loads(list(cache.pipeline.return_value.zadd.call_args[0][1])[0])
+        assert member == {"payload_ref": "ref_1", "source_log_id": "log_1"}
+        mock_flush.apply_async.assert_called_once_with(
+            kwargs={"workflow_id": "wf_1", "source": "git_webhook"}, countdown=30
+        )
+
+    @patch('services.celery_jobs.tasks.flush_coalesced_workflow')
+    @patch('services.workflows.coalesce.get_cache')
+    def test_buffer_event_joins_open_window(self, mock_get_cache, mock_flush):
+        """Test that events within an open window do not schedule another flush."""
+        # Arrange
+        mock_get_cache.return_value.set.return_value = None
+
+        # Act
+        opened = buffer_event("wf_1", window=30, payload_ref="ref_2")
+
+        # Assert
+        assert opened is False
+        mock_get_cache.return_value.pipeline.return_value.zadd.assert_called_once()
+        mock_flush.apply_async.assert_not_called()
+
+    @patch('services.workflows.coalesce.get_cache')
+    def test_drain_events(self, mock_get_cache):
+        """Test that draining returns the buffered events and closes the window."""
+        # Arrange
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+        pipeline.execute.return_value = [
+            [b'{"payload_ref": "ref_1", "source_log_id": "log_1"}'],
+            1,
+            1,
+        ]
+
+        # Act
+        events = drain_events("wf_1")
+
+        # Assert
+        assert events == [{"payload_ref": "ref_1", "source_log_id": "log_1"}]
+        pipeline.delete.assert_any_call("workflow_coalesce_wf_1")
+        pipeline.delete.assert_any_call("workflow_coalesce_window_wf_1")
+
+    def test_merge_payloads_single(self):
+        """Test that a single payload is passed through unchanged."""
+        # Arrange
+        payload = {"branch": "main", "commits": [{"id": "a"}]}
+
+        # Act & Assert
+        assert merge_payloads([payload]) == payload
+
+    def test_merge_payloads_batch(self):
+        """Test merging several pushes into one batched payload."""
+        # Arrange
+        payloads = [
+            {"branch": "main", "after": "a", "commits": [{"id": "a"}]},
+            {"branch": "main", "after": "b", "commits": [{"id": "b"}]},
+        ]
+
+        # Act
+        result = merge_payloads(payloads)
+
+        # Assert
+        assert result == {
+            "batch": True,
+            "count": 2,
+            "events": [
+                {"branch": "main", "after": "a"},
+                {"branch": "main", "after": "b"},
+            ],
+            "commits": [{"id": "a"}, {"id": "b"}],
+        }
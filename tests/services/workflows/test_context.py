@@ -0,0 +1,127 @@
+import json
+
+from services.workflows.context import (
+    build_context,
+    build_payload,
+    compact_dumps,
+    estimate_tokens,
+    summarize_result,
+)
+
+
+class TestWorkflowContext:
+    """Test cases for the workflow prompt context builder."""
+
+    def test_compact_dumps_has_no_whitespace(self):
+        """Test that compact serialization drops indentation and spaces."""
+        # Act
+        result = compact_dumps({"a": 1, "b": [1, 2]})
+
+        # Assert
+        assert result == '{"a":1,"b":[1,2]}'
+
+    def test_estimate_tokens(self):
+        """Test the rough token estimate."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abcd") == 1
+        assert estimate_tokens("abcde") == 2
+
+    def test_summarize_result_uses_inner_result(self):
+        """Test summarizing a previous workflow entry."""
+        # Arrange
+        entry = {"workflow_id": "wf_1", "result": {"result": "x" * 500}}
+
+        # Act
+        summary = summarize_result(entry, max_chars=50)
+
+        # Assert
+        assert summary["workflow_id"] == "wf_1"
+        assert len(summary["summary"]) <= 50
+        assert summary["summary"].endswith("[truncated]")
+
+    def test_build_context_keeps_last_results_verbatim(self):
+        """Test that only the last N results are kept verbatim."""
+        # Arrange
+        history = [
+            {"workflow_id": f"wf_{i}", "result": {"result": f"result {i}"}}
+            for i in range(5)
+        ]
+        context = {"prev_workflow": history, "last_response": history[-1]["result"]}
+
+        # Act
+        result = json.loads(build_context(context, keep_last=2))
+
+        # Assert
+        prev = result["prev_workflow"]
+        assert len(prev) == 5
+        assert prev[0] == {"workflow_id": "wf_0", "summary": "result 0"}
+        assert prev[-2:] == history[-2:]
+        # The newest entry already holds the last response
+        assert "last_response" not in result
+
+    def test_build_context_drops_summaries_over_budget(self):
+        """Test that older summaries are dropped to honour the token budget."""
+        # Arrange
+        history = [
+            {"workflow_id": f"wf_{i}", "result": "y" * 200} for i in range(10)
+        ]
+
+        # Act
+        serialized = build_context({"prev_workflow": history}, keep_last=1, token_budget=100)
+
+        # Assert
+        assert len(serialized) <= 400
+        assert "wf_9" in serialized
+
+    def test_build_context_drops_whole_entries(self):
+        """Test that recent entries are dropped whole, keeping valid JSON."""
+        # Arrange
+        history = [
+            {"workflow_id": f"wf_{i}", "result": {"result": "y" * 200}} for i in range(3)
+        ]
+
+        # Act
+        serialized = build_context(
+            {"prev_workflow": history, "source": "push"}, keep_last=3, token_budget=75
+        )
+
+        # Assert
+        result = json.loads(serialized)
+        assert len(serialized) <= 300
+        assert result["source"] == "push"
+        assert result["prev_workflow"] == history[-1:]
+
+    def test_build_context_over_budget_without_history(self):
+        """Test that an oversized context is still valid JSON."""
+        # Act
+        serialized = build_context({"data": "z" * 1000}, token_budget=10)
+
+        # Assert
+        assert json.loads(serialized)["truncated"].endswith("[truncated]")
+
+    def test_build_context_keeps_distinct_last_response(self):
+        """Test that a last response not in the history is kept."""
+        # Arrange
+        context = {
+            "prev_workflow": [{"workflow_id": "wf_0", "result": "a"}],
+            "last_response": "b",
+        }
+
+        # Act
+        result = json.loads(build_context(context))
+
+        # Assert
+        assert result["last_response"] == "b"
+
+    def test_build_context_empty(self):
+        """Test building an empty context."""
+        assert build_context({}) == "{}"
+        assert build_context(None) == "{}"
+
+    def test_build_payload_truncates(self):
+        """Test that the payload is capped at its token budget."""
+        # Act
+        serialized = build_payload({"data": "z" * 1000}, token_budget=10)
+
+        # Assert
+        assert len(serialized) <= 40
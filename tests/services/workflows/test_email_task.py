@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+from services.email import EmailResult
+from services.workflows.tasks import email
+
+
+class TestEmailTask:
+    """Test cases for the email workflow task."""
+
+    @patch('services.workflows.tasks.email.send_batch')
+    def test_run_sends_one_batch(self, mock_send_batch):
+        """Test that every recipient is sent in a single batch call."""
+        # Arrange
+        mock_send_batch.return_value = [
+            EmailResult(to="a@example.com", success=True, id="1"),
+            EmailResult(to="b@example.com", success=True, id="2"),
+        ]
+        context = {"last_response": {"result": "Report", "next_task": {"subject": "Weekly"}}}
+
+        # Act
+        response = email.run({"to": "a@example.com, b@example.com"}, context, source_log_id="log_1")
+
+        # Assert
+        messages = mock_send_batch.call_args[0][0]
+        assert [m["to"] for m in messages] == ["a@example.com", "b@example.com"]
+        assert messages[0]["subject"] == "Weekly"
+        assert mock_send_batch.call_args[1]["idempotency_key"] == "log_1"
+        assert response.success is True
+        assert len(response.payload["results"]) == 2
+
+    @patch('services.workflows.tasks.email.send_batch')
+    def test_run_reports_failed_recipients(self, mock_send_batch):
+        """Test that partial failures are reported per recipient."""
+        # Arrange
+        mock_send_batch.return_value = [
+            EmailResult(to="a@example.com", success=True, id="1"),
+            EmailResult(to="bad", success=False, error="invalid"),
+        ]
+
+        # Act
+        response = email.run({"to": ["a@example.com", "bad"]}, {"last_response": {"result": "x"}})
+
+        # Assert
+        assert response.success is False
+        assert response.message == "Email sent to 1/2 recipients"
+        assert response.payload["results"][1] == {
+            "to": "bad", "success": False, "error": "invalid", "attempts": 0
+        }
@@ -0,0 +1,98 @@
+import json
+from unittest.mock import patch
+
+from services.workflows.node_cache import (
+    INDEX_KEY,
+    cache_key,
+    get_cached_result,
+    prompt_hash,
+    set_cached_result,
+)
+
+
+class TestNodeCache:
+    """Test cases for the node result cache."""
+
+    def test_prompt_hash_ignores_whitespace(self):
+        """Test that prompts differing only in whitespace share a hash."""
+        # Act & Assert
+        assert prompt_hash("  Analyze\n\tthis   payload ") == prompt_hash("Analyze this payload")
+        assert prompt_hash("Analyze this") != prompt_hash("Analyze that")
+
+    def test_cache_key_includes_version(self):
+        """Test that bumping the node version changes the key."""
+        # Act & Assert
+        assert cache_key("node_1", 1, "prompt") != cache_key("node_1", 2, "prompt")
+        assert cache_key("node_1", 1, "prompt").startswith("workflow_node_cache_node_1_1_")
+
+    def test_cache_key_includes_agent_version(self):
+        """Test that editing the agent configuration changes the key."""
+        # Act & Assert
+        assert cache_key("node_1", 1, "prompt", 1) != cache_key("node_1", 1, "prompt", 2)
+
+    @patch('services.workflows.node_cache.get_cache')
+    def test_get_cached_result_hit(self, mock_get_cache):
+        """Test that a hit is decoded and marked as recently used."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.get.return_value = b'{"result": "ok"}'
+
+        # Act
+        result = get_cached_result("node_1", 0, "prompt")
+
+        # Assert
+        assert result == {"result": "ok"}
+        cache.zadd.assert_called_once()
+
+    @patch('services.workflows.node_cache.get_cache')
+    def test_get_cached_result_miss(self, mock_get_cache):
+        """Test that a miss returns None."""
+        # Arrange
+        mock_get_cache.return_value.get.return_value = None
+
+        # Act & Assert
+        assert get_cached_result("node_1", 0, "prompt") is None
+
+    @patch('services.workflows.node_cache.get_cache')
+    def test_set_cached_result(self, mock_get_cache):
+        """Test that a result is stored with its TTL."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        pipeline = cache.pipeline.return_value
+        pipeline.execute.return_value = [True, 1, 1]
+
+        # Act
+        stored = set_cached_result("node_1", 0, "prompt", {"result": "ok"}, ttl=60)
+
+        # Assert
+        assert stored is True
+        key = cache_key("node_1", 0, "prompt")
+        pipeline.set.assert_called_once_with(key, json.dumps({"result": "ok"}), ex=60)
+        cache.zpopmin.assert_not_called()
+
+    @patch('services.workflows.node_cache.MAX_ENTRIES', 2)
+    @patch('services.workflows.node_cache.get_cache')
+    def test_set_cached_result_evicts_least_recently_used(self, mock_get_cache):
+        """Test that entries beyond the size limit are evicted."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.pipeline.return_value.execute.return_value = [True, 1, 3]
+        cache.zpopmin.return_value = [(b"old_key", 1.0)]
+
+        # Act
+        set_cached_result("node_1", 0, "prompt", {"result": "ok"}, ttl=60)
+
+        # Assert
+        cache.zpopmin.assert_called_once_with(INDEX_KEY, 1)
+        cache.delete.assert_called_once_with(b"old_key")
+
+    @patch('services.workflows.node_cache.MAX_ENTRY_BYTES', 10)
+    @patch('services.workflows.node_cache.get_cache')
+    def test_set_cached_result_too_large(self, mock_get_cache):
+        """Test that oversized results are not cached."""
+        # Act
+        stored = set_cached_result("node_1", 0, "prompt", {"result": "x" * 100}, ttl=60)
+
+        # Assert
+        assert stored is False
+        mock_get_cache.return_value.pipeline.assert_not_called()
@@ -0,0 +1,72 @@
+import pytest
+from pydantic import ValidationError
+
+from models.mongo.task import Parameter, Task
+from services.workflows.output_schema import build_output_model, build_task_model
+
+
+def make_task() -> Task:
+    return Task(
+        title="Email",
+        function_name="email",
+        parameters=[
+            Parameter(title="To", name="to", type="string", required=True),
+            Parameter(title="Priority", name="priority", type="string", options=["low", "high"]),
+            Parameter(title="Metadata", name="metadata", type="object"),
+        ],
+    )
+
+
+class TestOutputSchema:
+    """Test cases for the output schemas of agent nodes."""
+
+    def test_build_output_model_without_task(self):
+        """Test the output model when the next node is not a task."""
+        # Act
+        model = build_output_model()
+
+        # Assert
+        assert set(model.model_fields) == {"result", "context"}
+
+    def test_build_output_model_with_task(self):
+        """Test that the next task's parameters are requested in next_task."""
+        # Act
+        model = build_output_model(make_task())
+        output = model.model_validate(
+            {"result": "done", "next_task": {"to": "dev@example.com", "metadata": '{"id": 1}'}}
+        )
+
+        # Assert
+        assert output.next_task.to == "dev@example.com"
+        assert output.next_task.metadata == {"id": 1}
+
+    def test_task_model_validates_parameters(self):
+        """Test required parameters and options."""
+        # Arrange
+        model = build_task_model(make_task())
+
+        # Act & Assert
+        with pytest.raises(ValidationError):
+            model.model_validate({"priority": "low"})
+        with pytest.raises(ValidationError):
+            model.model_validate({"to": "dev@example.com", "priority": "urgent"})
+
+    def test_object_parameters_are_strings_in_json_schema(self):
+        """Test that free-form objects are requested as JSON strings."""
+        # Act
+        schema = build_task_model(make_task()).model_json_schema()
+
+        # Assert
+        metadata = schema["properties"]["metadata"]["anyOf"][0]
+        assert metadata["type"] == "string"
+        assert schema["required"] == ["to"]
+
+    def test_task_model_matches_options_ignoring_case(self):
+        """Test that options are repaired like task parameters are."""
+        # Act
+        output = build_task_model(make_task()).model_validate(
+            {"to": "dev@example.com", "priority": " High "}
+        )
+
+        # Assert
+        assert output.priority == "high"
@@ -0,0 +1,107 @@
+import json
+from unittest.mock import patch
+
+from services.workflows.routing import (
+    BUILT_FIELD,
+    get_workflow_routes,
+    rebuild_all_routes,
+    rebuild_org_routes,
+)
+
+
+class TestWorkflowRouting:
+    """Test cases for the head workflow routing index."""
+
+    @patch('services.workflows.routing.get_cache')
+    @patch('services.workflows.routing.repository')
+    def test_rebuild_org_routes(self, mock_repository, mock_get_cache):
+        """Test materializing the routing table of an organization."""
+        # Arrange
+        mock_repository.mongo.workflow.get_head_workflow_routes.return_value = [
+            {"_id": "wf_1", "events": ["git_webhook"]},
+            {"_id": "wf_2", "events": ["git_webhook", "manual_prompt"], "coalesce_window_seconds": 30},
+            {"_id": "wf_3"},
+        ]
+        wf_1 = {"id": "wf_1", "coalesce_window": 0}
+        wf_2 = {"id": "wf_2", "coalesce_window": 30}
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+
+        # Act
+        routes = rebuild_org_routes(123)
+
+        # Assert
+        assert routes == {"git_webhook": [wf_1, wf_2], "manual_prompt": [wf_2]}
+        pipeline.delete.assert_called_once_with("workflow_routes_123")
+        mapping = pipeline.hset.call_args[1]["mapping"]
+        assert mapping[BUILT_FIELD] == "1"
+        assert json.loads(mapping["git_webhook"]) == [wf_1, wf_2]
+        pipeline.execute.assert_called_once()
+
+    @patch('services.workflows.routing.get_cache')
+    @patch('services.workflows.routing.repository')
+    def test_get_workflow_routes_cache_hit(self, mock_repository, mock_get_cache):
+        """Test that a built routing table is served from a single cache read."""
+        # Arrange
+        mock_get_cache.return_value.hmget.return_value = [
+            b'[{"id": "wf_1", "coalesce_window": 0}]',
+            b"1",
+        ]
+
+        # Act
+        result = get_workflow_routes(123, "git_webhook")
+
+        # Assert
+        assert result == [{"id": "wf_1", "coalesce_window": 0}]
+        mock_get_cache.return_value.hmget.assert_called_once_with(
+            "workflow_routes_123", ["git_webhook", BUILT_FIELD]
+        )
+        mock_repository.mongo.workflow.get_head_workflow_routes.assert_not_called()
+
+    @patch('services.workflows.routing.get_cache')
+    @patch('services.workflows.routing.repository')
+    def test_get_workflow_routes_no_routes_for_event(self, mock_repository, mock_get_cache):
+        """Test an event without subscribed workflows on a built table."""
+        # Arrange
+        mock_get_cache.return_value.hmget.return_value = [None, b"1"]
+
+        # Act
+        result = get_workflow_routes(123, "manual_prompt")
+
+        # Assert
+        assert result == []
+        mock_repository.mongo.workflow.get_head_workflow_routes.assert_not_called()
+
+    @patch('services.workflows.routing.get_cache')
+    @patch('services.workflows.routing.repository')
+    def test_get_workflow_routes_rebuilds_on_miss(self, mock_repository, mock_get_cache):
+        """Test that a missing routing table is rebuilt from MongoDB."""
+        # Arrange
+        mock_get_cache.return_value.hmget.return_value = [None, None]
+        mock_repository.mongo.workflow.get_head_workflow_routes.return_value = [
+            {"_id": "wf_1", "events": ["git_webhook"]},
+        ]
+
+        # Act
+        result = get_workflow_routes(123, "git_webhook")
+
+        # Assert
+        assert result == [{"id": "wf_1", "coalesce_window": 0}]
+        mock_repository.mongo.workflow.get_head_workflow_routes.assert_called_once_with(
+            org_id=123
+        )
+
+    @patch('services.workflows.routing.rebuild_org_routes')
+    @patch('services.workflows.routing.repository')
+    def test_rebuild_all_routes(self, mock_repository, mock_rebuild_org_routes):
+        """Test rebuilding the routing tables of every organization."""
+        # Arrange
+        mock_repository.mongo.workflow.get_head_workflow_org_ids.return_value = [1, 2]
+
+        # Act
+        total = rebuild_all_routes()
+
+        # Assert
+        assert total == 2
+        assert mock_rebuild_org_routes.call_count == 2
+        mock_rebuild_org_routes.assert_any_call(1)
+        mock_rebuild_org_routes.assert_any_call(2)
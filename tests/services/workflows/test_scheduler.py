@@ -0,0 +1,94 @@
+import json
+from unittest.mock import patch
+
+from services.workflows import scheduler
+from services.workflows.scheduler import (
+    DEFAULT_LANE,
+    PRIORITY_LANE,
+    _parse_org_map,
+    _rotate,
+    enqueue_run,
+    lane_for,
+    org_concurrency,
+    schedule,
+)
+
+
+class TestWorkflowScheduler:
+    """Test cases for the fair multi-tenant workflow scheduler."""
+
+    def test_lane_for(self):
+        """Test that manual prompts go to the priority lane."""
+        # Act & Assert
+        assert lane_for("manual_prompt") == PRIORITY_LANE
+        assert lane_for("git_webhook") == DEFAULT_LANE
+
+    def test_parse_org_map(self):
+        """Test parsing per-organization settings."""
+        # Act & Assert
+        assert _parse_org_map("12:20, 15:2,") == {12: 20.0, 15: 2.0}
+        assert _parse_org_map("") == {}
+
+    def test_org_concurrency_override(self):
+        """Test per-organization concurrency caps."""
+        # Arrange
+        with patch.dict(scheduler.ORG_CONCURRENCY_OVERRIDES, {12: 20}):
+            # Act & Assert
+            assert org_concurrency(12) == 20
+            assert org_concurrency(13) == scheduler.ORG_CONCURRENCY
+
+    def test_rotate(self):
+        """Test that a round starts after the last organization served."""
+        # Act & Assert
+        assert _rotate([1, 2, 3], None) == [1, 2, 3]
+        assert _rotate([1, 2, 3], 2) == [3, 1, 2]
+
+    @patch('services.workflows.scheduler.schedule')
+    @patch('services.workflows.scheduler.get_cache')
+    def test_enqueue_run(self, mock_get_cache, mock_schedule):
+        """Test queueing a run in the lane of its event."""
+        # Arrange
+        pipeline = mock_get_cache.return_value.pipeline.return_value
+
+        # Act
+        enqueue_run(123, "git_webhook", workflow_id="wf_1", payload_ref="ref")
+
+        # Assert
+        key, raw = pipeline.rpush.call_args[0]
+        assert key == "workflow_queue_default_123"
+        assert json.loads(raw) == {"workflow_id": "wf_1", "payload_ref": "ref"}
+        pipeline.sadd.assert_called_once_with("workflow_queue_orgs_default", 123)
+        mock_schedule.assert_called_once()
+
+    @patch('services.workflows.scheduler.get_cache')
+    def test_schedule_skips_when_locked(self, mock_get_cache):
+        """Test that only one process schedules at a time."""
+        # Arrange
+        mock_get_cache.return_value.set.return_value = None
+
+        # Act
+        dispatched = schedule()
+
+        # Assert
+        assert dispatched == 0
+        mock_get_cache.return_value.smembers.assert_not_called()
+
+    @patch('services.workflows.scheduler._drain_lane', return_value=0)
+    @patch('services.workflows.scheduler._has_capacity', return_value=True)
+    @patch('services.workflows.scheduler.get_cache')
+    def test_schedule_releases_own_lock(self, mock_get_cache, mock_capacity, mock_drain):
+        """Test that the lock is released by compare-and-delete on its token."""
+        # Arrange
+        cache = mock_get_cache.return_value
+        cache.set.return_value = True
+
+        # Act
+        schedule()
+
+        # Assert
+        token = cache.set.call_args[0][1]
+        cache.eval.assert_called_once_with(
+            scheduler._RELEASE_LOCK, 1, scheduler.LOCK_KEY, token
+        )
+        cache.delete.assert_not_called()
+
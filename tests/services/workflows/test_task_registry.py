@@ -0,0 +1,112 @@
+from unittest.mock import Mock, patch
+
+import pytest
+
+from models.mongo.task import Parameter, ParameterType, TaskBase
+from services.workflows.tasks import run_task
+from services.workflows.tasks.registry import (
+    TASKS,
+    get_task,
+    register_task,
+    validate_task,
+    validate_task_templates,
+)
+
+
+@pytest.fixture
+def echo_task():
+    @register_task(
+        "echo_test",
+        parameters=[
+            Parameter(title="Text", name="text", type=ParameterType.STRING, required=True),
+            Parameter(title="Times", name="times", type=ParameterType.INTEGER),
+        ],
+    )
+    def run(payload: dict, context: dict = None, **kwargs):
+        return {"echo": payload.get("text")}
+
+    yield run
+    TASKS.pop("echo_test", None)
+
+
+class TestTaskRegistry:
+    """Test cases for the task plugin registry."""
+
+    def test_builtin_tasks_are_registered(self):
+        """Test that the task modules register when the package is imported."""
+        # Act
+        task = get_task("email")
+
+        # Assert
+        assert task is not None
+        assert [p.name for p in task.parameters] == ["to", "subject"]
+
+    def test_register_duplicate_name(self, echo_task):
+        """Test that two functions cannot register under one name."""
+        # Act & Assert
+        with pytest.raises(ValueError):
+            register_task("echo_test")(lambda payload, **kwargs: None)
+
+    def test_run_task_dispatches_registered_task(self, echo_task):
+        """Test that run_task looks the task up in the registry."""
+        # Act
+        result = run_task("echo_test", payload={"text": "hi"})
+
+        # Assert
+        assert result == {"echo": "hi"}
+
+    def test_run_task_unknown(self):
+        """Test that unknown tasks are not run."""
+        # Act & Assert
+        assert run_task("does_not_exist", payload={}) is None
+
+    def test_validate_task(self, echo_task):
+        """Test that a matching template is valid."""
+        # Arrange
+        task = TaskBase(
+            title="Echo",
+            function_name="echo_test",
+            parameters=[Parameter(title="Text", name="text", type=ParameterType.STRING)],
+        )
+
+        # Act & Assert
+        assert validate_task(task) == []
+
+    def test_validate_task_problems(self, echo_task):
+        """Test unknown functions, undeclared and mistyped parameters and missing required ones."""
+        # Arrange
+        unknown = TaskBase(title="Typo", function_name="emial")
+        mismatched = TaskBase(
+            title="Echo",
+            function_name="echo_test",
+            parameters=[
+                Parameter(title="Times", name="times", type=ParameterType.STRING),
+                Parameter(title="Other", name="other", type=ParameterType.STRING),
+            ],
+        )
+
+        # Act
+        unknown_errors = validate_task(unknown)
+        mismatched_errors = validate_task(mismatched)
+
+        # Assert
+        assert "not registered" in unknown_errors[0]
+        assert len(mismatched_errors) == 3
+
+    @patch('services.workflows.tasks.registry.repository')
+    def test_validate_task_templates(self, mock_repository, echo_task):
+        """Test that stored templates are checked at startup."""
+        # Arrange
+        valid = Mock(
+            id="t1",
+            function_name="echo_test",
+            parameters=[Parameter(title="Text", name="text", type=ParameterType.STRING)],
+        )
+        invalid = Mock(id="t2", function_name="emial", parameters=[])
+        mock_repository.mongo.task.get_all_tasks.return_value = [valid, invalid]
+
+        # Act
+        result = validate_task_templates()
+
+        # Assert
+        assert list(result) == ["t2"]
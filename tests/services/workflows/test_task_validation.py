@@ -0,0 +1,68 @@
+from models.mongo.task import Parameter, ParameterType, TaskBase
+from services.workflows.tasks.validation import get_validator, validate_parameters
+
+
+def make_task(title: str = "Report") -> TaskBase:
+    return TaskBase(
+        title=title,
+        function_name="report",
+        parameters=[
+            Parameter(title="To", name="to", type=ParameterType.STRING, required=True),
+            Parameter(title="Limit", name="limit", type=ParameterType.INTEGER, default=10),
+            Parameter(title="Labels", name="labels", type=ParameterType.ARRAY),
+            Parameter(title="Meta", name="meta", type=ParameterType.OBJECT),
+            Parameter(title="Level", name="level", type=ParameterType.STRING, options=["low", "high"]),
+        ],
+    )
+
+
+class TestTaskParameterValidation:
+    """Test cases for compiled task parameter validators."""
+
+    def test_validator_is_cached_per_parameter_list(self):
+        """Test that templates with the same parameters share a compiled validator."""
+        # Act & Assert
+        assert get_validator(make_task()) is get_validator(make_task(title="Other"))
+        assert get_validator(make_task()) is not get_validator(TaskBase(title="Empty", function_name="report"))
+
+    def test_valid_parameters_with_defaults(self):
+        """Test that defaults are filled in and undeclared values dropped."""
+        # Act
+        values, errors = validate_parameters(make_task(), {"to": "dev@example.com", "extra": 1})
+
+        # Assert
+        assert errors == []
+        assert values == {"to": "dev@example.com", "limit": 10}
+
+    def test_repairs_values(self):
+        """Test coercion of LLM-filled values to the declared types."""
+        # Act
+        values, errors = validate_parameters(
+            make_task(),
+            {
+                "to": ["a@example.com", "b@example.com"],
+                "limit": "25",
+                "labels": "bug, urgent",
+                "meta": '{"id": 7}',
+                "level": " HIGH ",
+            },
+        )
+
+        # Assert
+        assert errors == []
+        assert values == {
+            "to": "a@example.com,b@example.com",
+            "limit": 25,
+            "labels": ["bug", "urgent"],
+            "meta": {"id": 7},
+            "level": "high",
+        }
+
+    def test_rejects_invalid_values(self):
+        """Test that missing required values and unknown options are reported."""
+        # Act
+        values, errors = validate_parameters(make_task(), {"limit": "many", "level": "urgent"})
+
+        # Assert
+        assert values == {}
+        assert {error.split(":")[0] for error in errors} == {"to", "limit", "level"}
@@ -1,8 +1,11 @@
+import json
+import time
 from unittest.mock import AsyncMock, Mock, patch
 
 import pytest
 
-from models.mongo.workflow import Workflow
+from models.mongo.task import Parameter, Task
+from models.mongo.workflow import NodeType, Workflow
 from services.workflows import WorkflowService
 
 
@@ -18,85 +21,134 @@ class TestWorkflowService:
         assert service.org_id == 123
         assert service.event == "test_event"
 
-    @patch('services.workflows.repository')
-    def test_get_workflow(self, mock_repository):
-        """Test getting workflows."""
+    @patch('services.workflows.get_workflow_routes')
+    @patch('services.workflows.enqueue_run')
+    def test_dispatch_with_workflows(self, mock_enqueue_run, mock_get_workflow_routes):
+        """Test that a stored payload is queued for every subscribed workflow."""
         # Arrange
-        expected_workflows = [Mock(), Mock()]
-        mock_repository.mongo.workflow.get_main_workflows_by_org_id.return_value = expected_workflows
-
+        mock_get_workflow_routes.return_value = [
+            {"id": "workflow_1", "coalesce_window": 0},
+            {"id": "workflow_2", "coalesce_window": 0},
+        ]
         service = WorkflowService(org_id=123, event="test_event")
 
         # Act
-        result = service.get_workflow()
+        service.dispatch("payload_hash", source_log_id="log_123")
 
         # Assert
-        mock_repository.mongo.workflow.get_main_workflows_by_org_id.assert_called_once_with(
-            org_id=123, event="test_event"
+        mock_get_workflow_routes.assert_called_once_with(org_id=123, event="test_event")
+        assert mock_enqueue_run.call_count == 2
+        mock_enqueue_run.assert_any_call(
+            123,
+            "test_event",
+            workflow_id="workflow_1",
+            payload_ref="payload_hash",
+            source="test_event",
+            source_log_id="log_123"
+        )
+        mock_enqueue_run.assert_any_call(
+            123,
+            "test_event",
+            workflow_id="workflow_2",
+            payload_ref="payload_hash",
+            source="test_event",
+            source_log_id="log_123"
         )
-        assert result == expected_workflows
 
-    @patch('services.workflows.repository')
-    @patch('services.celery_jobs.tasks.run_workflow')
-    def test_run_with_workflows(self, mock_run_workflow_task, mock_repository):
-        """Test running workflows."""
+    @patch('services.workflows.metrics')
+    @patch('services.workflows.buffer_event')
+    @patch('services.workflows.get_workflow_routes')
+    @patch('services.workflows.enqueue_run')
+    def test_dispatch_buffers_coalesced_workflows(self, mock_enqueue_run, mock_get_workflow_routes, mock_buffer_event, mock_metrics):
+        """Test that workflows with a coalescing window buffer the event."""
         # Arrange
-        mock_workflow1 = Mock()
-        mock_workflow1.id = "workflow_1"
-        mock_workflow2 = Mock()
-        mock_workflow2.id = "workflow_2"
-        workflows = [mock_workflow1, mock_workflow2]
-
-        mock_log = Mock()
-        mock_log.id = "log_123"
-        mock_repository.mongo.logs.create.return_value = mock_log
-        mock_repository.mongo.workflow.get_main_workflows_by_org_id.return_value = workflows
-        mock_run_workflow_task.delay = Mock()
-
+        mock_get_workflow_routes.return_value = [
+            {"id": "workflow_1", "coalesce_window": 30},
+            {"id": "workflow_2", "coalesce_window": 0},
+        ]
         service = WorkflowService(org_id=123, event="test_event")
-        payload = {"test": "data"}
 
         # Act
-        service.run(payload)
+        service.dispatch("payload_hash", source_log_id="log_123")
 
         # Assert
-        mock_repository.mongo.logs.create.assert_called_once()
-        log_call_args = mock_repository.mongo.logs.create.call_args[0][0]
-        assert log_call_args.organizationId == 123
-        assert log_call_args.type == "input"
-        assert log_call_args.source == "test_event"
-        assert log_call_args.data == payload
-
-        assert mock_run_workflow_task.delay.call_count == 2
-        mock_run_workflow_task.delay.assert_any_call(
-            workflow_id="workflow_1",
-            payload=payload,
+        mock_buffer_event.assert_called_once_with(
+            "workflow_1",
+            window=30,
+            payload_ref="payload_hash",
             source="test_event",
-            source_log_id="log_123"
+            source_log_id="log_123",
+        )
+        mock_metrics.increment.assert_called_once_with(
+            "workflow_events_coalesced", org_id=123
         )
-        mock_run_workflow_task.delay.assert_any_call(
+        mock_enqueue_run.assert_called_once_with(
+            123,
+            "test_event",
             workflow_id="workflow_2",
-            payload=payload,
+            payload_ref="payload_hash",
             source="test_event",
-            source_log_id="log_123"
+            source_log_id="log_123",
         )
 
-    @patch('services.workflows.repository')
-    def test_run_with_no_workflows(self, mock_repository):
-        """Test running with no workflows."""
+    @patch('services.workflows.get_workflow_routes')
+    @patch('services.workflows.enqueue_run')
+    def test_dispatch_skips_dispatched_workflows(self, mock_enqueue_run, mock_get_workflow_routes):
+        """Test that workflows already dispatched for a delivery are not queued again."""
         # Arrange
-        mock_log = Mock()
-        mock_log.id = "log_123"
-        mock_repository.mongo.logs.create.return_value = mock_log
-        mock_repository.mongo.workflow.get_main_workflows_by_org_id.return_value = []
+        mock_get_workflow_routes.return_value = [{"id": "workflow_1"}, {"id": "workflow_2"}]
+        on_dispatched = Mock()
+        service = WorkflowService(org_id=123, event="test_event")
 
+        # Act
+        service.dispatch(
+            "payload_hash", source_log_id="log_123", skip={"workflow_1"}, on_dispatched=on_dispatched
+        )
+
+        # Assert
+        mock_enqueue_run.assert_called_once()
+        assert mock_enqueue_run.call_args.kwargs["workflow_id"] == "workflow_2"
+        on_dispatched.assert_called_once_with("workflow_2")
+
+    @patch('services.workflows.get_workflow_routes')
+    @patch('services.workflows.enqueue_run')
+    def test_dispatch_with_no_workflows(self, mock_enqueue_run, mock_get_workflow_routes):
+        """Test dispatching an event no workflow subscribes to."""
+        # Arrange
+        mock_get_workflow_routes.return_value = []
         service = WorkflowService(org_id=123, event="test_event")
 
         # Act
-        service.run()
+        service.dispatch("payload_hash", source_log_id="log_123")
 
         # Assert
-        mock_repository.mongo.logs.create.assert_called_once()
+        mock_enqueue_run.assert_not_called()
+
+    @patch('services.workflows.get_payload_store')
+    @patch('services.workflows.repository')
+    @patch('services.workflows.enqueue_run')
+    def test_trigger(self, mock_enqueue_run, mock_repository, mock_get_payload_store):
+        """Test that a manual run is logged and queued in the lane of its event."""
+        # Arrange
+        mock_get_payload_store.return_value.put.return_value = "payload_hash"
+        mock_repository.mongo.logs.create.return_value = Mock(id="log_123")
+        service = WorkflowService(org_id=123, event="manual_prompt")
+
+        # Act
+        log_id = service.trigger("workflow_1", {"text": "hi"})
+
+        # Assert
+        assert log_id == "log_123"
+        log = mock_repository.mongo.logs.create.call_args[0][0]
+        assert (log.type, log.source, log.payload_ref) == ("input", "manual_prompt", "payload_hash")
+        mock_enqueue_run.assert_called_once_with(
+            123,
+            "manual_prompt",
+            workflow_id="workflow_1",
+            payload_ref="payload_hash",
+            source="manual_prompt",
+            source_log_id="log_123",
+        )
 
     @patch('services.workflows.repository')
     @patch('services.workflows.AgentCaller')
@@ -108,6 +160,11 @@ class TestWorkflowService:
         workflow.organizationId = 456
         workflow.enabled = True
         workflow.is_task = False
+        workflow.timeout_seconds = None
+        workflow.hedge = None
+        workflow.cache_ttl_seconds = None
+        workflow.structured_output = None
+        workflow.node_type = None
         workflow.agent = "TestAgent"
         workflow.prompt = "Test prompt"
         workflow.next_flow = None
@@ -128,7 +185,9 @@ class TestWorkflowService:
             WorkflowService.run_workflow(workflow, payload, source="test", source_log_id="507f1f77bcf86cd799439011")
 
         # Assert
-        mock_agent_caller.create.assert_called_once_with(org_id=456, agent="TestAgent")
+        mock_agent_caller.create.assert_called_once_with(
+            org_id=456, agent="TestAgent", ephemeral=True
+        )
         mock_agent_instance.generate.assert_called_once()
         mock_repository.mongo.logs.create.assert_called_once()
 
@@ -171,6 +230,7 @@ class TestWorkflowService:
         mock_task_template = Mock()
         mock_task_template.id = "task_template_456"
         mock_task_template.function_name = "test_task_function"
+        mock_task_template.parameters = []
         mock_repository.mongo.task.find_by_id.return_value = mock_task_template
 
         mock_run_task.return_value = {"result": "success"}
@@ -225,6 +285,11 @@ class TestWorkflowService:
         workflow.organizationId = 456
         workflow.enabled = True
         workflow.is_task = False
+        workflow.timeout_seconds = None
+        workflow.hedge = None
+        workflow.cache_ttl_seconds = None
+        workflow.structured_output = None
+        workflow.node_type = None
         workflow.agent = "TestAgent"
         workflow.prompt = "Test prompt"
         workflow.next_flow = "next_workflow_456"
@@ -233,6 +298,11 @@ class TestWorkflowService:
         next_workflow.id = "next_workflow_456"
         next_workflow.enabled = True
         next_workflow.is_task = False
+        next_workflow.timeout_seconds = None
+        next_workflow.hedge = None
+        next_workflow.cache_ttl_seconds = None
+        next_workflow.structured_output = None
+        next_workflow.node_type = None
         next_workflow.organizationId = 456
         next_workflow.agent = "NextAgent"
         next_workflow.prompt = "Next prompt"
@@ -256,3 +326,376 @@ class TestWorkflowService:
         assert mock_agent_caller.create.call_count == 2
         assert mock_repository.mongo.logs.create.call_count == 2
         mock_repository.mongo.workflow.find_by_id.assert_called_once_with("next_workflow_456")
+
+    @patch('services.workflows.repository')
+    @patch('services.workflows.AgentCaller')
+    def test_run_workflow_node_timeout(self, mock_agent_caller, mock_repository):
+        """Test that a timed out node is logged and the chain stops."""
+        # Arrange
+        workflow = Mock(spec=Workflow)
+        workflow.id = "workflow_123"
+        workflow.organizationId = 456
+        workflow.enabled = True
+        workflow.is_task = False
+        workflow.agent = "TestAgent"
+        workflow.prompt = "Test prompt"
+        workflow.next_flow = "next_workflow_456"
+        workflow.timeout_seconds = 5
+        workflow.hedge = True
+        workflow.cache_ttl_seconds = None
+        workflow.structured_output = None
+        workflow.node_type = None
+
+        mock_agent_instance = Mock()
+        mock_agent_instance.generate = AsyncMock(side_effect=TimeoutError())
+        mock_agent_caller.create.return_value = mock_agent_instance
+        mock_repository.mongo.workflow.get_with_task.return_value = None
+
+        # Act
+        WorkflowService.run_workflow(workflow, {"input": "test"})
+
+        # Assert
+        call_kwargs = mock_agent_instance.generate.call_args[1]
+        assert 0 < call_kwargs["timeout"] <= 5
+        assert call_kwargs["hedge"] is True
+        log = mock_repository.mongo.logs.create.call_args[0][0]
+        assert "timed out" in log.data
+        mock_repository.mongo.workflow.find_by_id.assert_not_called()
+
+    @patch('services.workflows.repository')
+    @patch('services.workflows.AgentCaller')
+    def test_run_workflow_deadline_exceeded(self, mock_agent_caller, mock_repository):
+        """Test that a node is skipped once the run deadline has passed."""
+        # Arrange
+        workflow = Mock(spec=Workflow)
+        workflow.id = "workflow_123"
+        workflow.organizationId = 456
+        workflow.enabled = True
+        workflow.is_task = False
+        workflow.agent = "TestAgent"
+        workflow.prompt = "Test prompt"
+        workflow.next_flow = None
+        workflow.timeout_seconds = None
+        workflow.hedge = None
+        workflow.cache_ttl_seconds = None
+        workflow.structured_output = None
+        workflow.node_type = None
+
+        mock_agent_instance = Mock()
+        mock_agent_instance.generate = AsyncMock()
+        mock_agent_caller.create.return_value = mock_agent_instance
+        mock_repository.mongo.workflow.get_with_task.return_value = None
+
+        # Act
+        WorkflowService.run_workflow(workflow, {}, deadline=time.time() - 1)
+
+        # Assert
+        mock_agent_instance.generate.assert_not_called()
+        log = mock_repository.mongo.logs.create.call_args[0][0]
+        assert "deadline exceeded" in log.data
+
+    @patch('services.workflows.config_version', return_value=5)
+    @patch('services.workflows.metrics')
+    @patch('services.workflows.get_cached_result')
+    @patch('services.workflows.repository')
+    @patch('services.workflows.AgentCaller')
+    def test_run_workflow_cache_hit(
+        self,
+        mock_agent_caller,
+        mock_repository,
+        mock_get_cached_result,
+        mock_metrics,
+        mock_config_version,
+    ):
+        """Test that a cached node result skips the model call and is marked in the log."""
+        # Arrange
+        workflow = Mock(spec=Workflow)
+        workflow.id = "workflow_123"
+        workflow.organizationId = 456
+        workflow.enabled = True
+        workflow.is_task = False
+        workflow.agent = "TestAgent"
+        workflow.prompt = "Test prompt"
+        workflow.next_flow = None
+        workflow.timeout_seconds = None
+        workflow.hedge = None
+        workflow.cache_ttl_seconds = 3600
+        workflow.structured_output = None
+        workflow.node_type = None
+        workflow.cache_version = 2
+
+        mock_agent_instance = Mock()
+        mock_agent_instance.generate = AsyncMock()
+        mock_agent_caller.create.return_value = mock_agent_instance
+        mock_repository.mongo.workflow.get_with_task.return_value = None
+        mock_get_cached_result.return_value = {"result": "cached"}
+
+        # Act
+        WorkflowService.run_workflow(workflow, {"input": "test"})
+
+        # Assert
+        mock_agent_instance.generate.assert_not_called()
+        assert mock_get_cached_result.call_args[0][:2] == ("workflow_123", 2)
+        assert mock_get_cached_result.call_args[0][3] == 5
+        mock_config_version.assert_called_once_with(456, "testagent")
+        log = mock_repository.mongo.logs.create.call_args[0][0]
+        assert log.cache_hit is True
+        assert json.loads(log.data) == {"result": "cached"}
+
+    @patch('services.workflows.config_version', return_value=5)
+    @patch('services.workflows.set_cached_result')
+    @patch('services.workflows.get_cached_result')
+    @patch('services.workflows.repository')
+    @patch('services.workflows.AgentCaller')
+    def test_run_workflow_cache_miss(
+        self,
+        mock_agent_caller,
+        mock_repository,
+        mock_get_cached_result,
+        mock_set_cached_result,
+        mock_config_version,
+    ):
+        """Test that a parsed result is cached on a miss."""
+        # Arrange
+        workflow = Mock(spec=Workflow)
+        workflow.id = "workflow_123"
+        workflow.organizationId = 456
+        workflow.enabled = True
+        workflow.is_task = False
+        workflow.agent = "TestAgent"
+        workflow.prompt = "Test prompt"
+        workflow.next_flow = None
+        workflow.timeout_seconds = None
+        workflow.hedge = None
+        workflow.cache_ttl_seconds = 3600
+        workflow.structured_output = None
+        workflow.node_type = None
+        workflow.cache_version = 0
+
+        mock_agent_instance = Mock()
+        mock_agent_instance.generate = AsyncMock(return_value='{"result": "fresh"}')
+        mock_agent_caller.create.return_value = mock_agent_instance
+        mock_repository.mongo.workflow.get_with_task.return_value = None
+        mock_get_cached_result.return_value = None
+
+        # Act
+        WorkflowService.run_workflow(workflow, {"input": "test"})
+
+        # Assert
+        mock_agent_instance.generate.assert_called_once()
+        args, kwargs = mock_set_cached_result.call_args
+        assert args[0] == "workflow_123"
+        assert args[3] == {"result": "fresh"}
+        assert kwargs["ttl"] == 3600
+        assert kwargs["agent_version"] == 5
+        log = mock_repository.mongo.logs.create.call_args[0][0]
+        assert log.cache_hit is False
+
+    @patch('services.workflows.repository')
+    @patch('services.workflows.AgentCaller')
+    def test_run_workflow_structured_output(self, mock_agent_caller, mock_repository):
+        """Test that structured nodes request the next task's parameters as a schema."""
+        # Arrange
+        workflow = Mock(spec=Workflow)
+        workflow.id = "workflow_123"
+        workflow.organizationId = 456
+        workflow.enabled = True
+        workflow.is_task = False
+        workflow.agent = "TestAgent"
+        workflow.prompt = "Test prompt"
+        workflow.next_flow = None
+        workflow.timeout_seconds = None
+        workflow.hedge = None
+        workflow.cache_ttl_seconds = None
+        workflow.structured_output = True
+        workflow.node_type = None
+
+        next_workflow = Mock(spec=Workflow)
+        next_workflow.is_task = True
+        next_workflow.task = Task(
+            title="Email",
+            function_name="email",
+            parameters=[Parameter(title="To", name="to", type="string", required=True)],
+        )
+        next_workflow.parameters = {}
+        mock_repository.mongo.workflow.get_with_task.return_value = next_workflow
+
+        mock_agent_instance = Mock()
+        mock_agent_instance.generate = AsyncMock(
+            return_value='{"result": "done", "next_task": {"to": "dev@example.com"}}'
+        )
+        mock_agent_caller.create.return_value = mock_agent_instance
+
+        # Act
+        WorkflowService.run_workflow(workflow, {"input": "test"})
+
+        # Assert
+        output_schema = mock_agent_instance.generate.call_args[1]["output_schema"]
+        assert set(output_schema.model_fields) == {"result", "context", "next_task"}
+        log = mock_repository.mongo.logs.create.call_args[0][0]
+        assert json.loads(log.data) == {"result": "done", "next_task": {"to": "dev@example.com"}}
+
+    @patch('services.workflows.repository')
+    @patch('services.workflows.AgentCaller')
+    def test_run_rule_condition_stops_chain(self, mock_agent_caller, mock_repository):
+        """Test that a condition that does not hold stops the chain without a model call."""
+        # Arrange
+        workflow = Mock(spec=Workflow)
+        workflow.id = "workflow_123"
+        workflow.organizationId = 456
+        workflow.enabled = True
+        workflow.is_task = False
+        workflow.node_type = NodeType.CONDITION
+        workflow.condition = 'payload.ref == "refs/heads/main"'
+        workflow.next_flow = "next_workflow_456"
+
+        # Act
+        WorkflowService.run_workflow(workflow, {"ref": "refs/heads/feature"})
+
+        # Assert
+        mock_agent_caller.create.assert_not_called()
+        mock_repository.mongo.workflow.get_with_task.assert_not_called()
+        log = mock_repository.mongo.logs.create.call_args[0][0]
+        assert log.type == "condition"
+        assert json.loads(log.data)["passed"] is False
+
+    @patch('services.workflows.repository')
+    def test_run_rule_condition_passes_through(self, mock_repository):
+        """Test that a condition that holds runs the next node with the previous result."""
+        # Arrange
+        workflow = Mock(spec=Workflow)
+        workflow.id = "workflow_123"
+        workflow.organizationId = 456
+        workflow.enabled = True
+        workflow.is_task = False
+        workflow.node_type = NodeType.CONDITION
+        workflow.condition = "len(payload.commits) > 0"
+        workflow.next_flow = "next_workflow_456"
+        next_workflow = Mock(spec=Workflow)
+        mock_repository.mongo.workflow.get_with_task.return_value = next_workflow
+        context = {"last_response": {"result": "summary"}}
+
+        # Act
+        with patch.object(WorkflowService, "run_workflow") as mock_run:
+            WorkflowService.run_rule(workflow, {"commits": [{"id": "a1"}]}, context)
+
+        # Assert
+        mock_run.assert_called_once()
+        assert mock_run.call_args[0][0] is next_workflow
+        assert mock_run.call_args[1]["context"]["last_response"] == {"result": "summary"}
+
+    @patch('services.workflows.repository')
+    def test_run_rule_transform(self, mock_repository):
+        """Test that a transform renders its mapping as the node result."""
+        # Arrange
+        workflow = Mock(spec=Workflow)
+        workflow.id = "workflow_123"
+        workflow.organizationId = 456
+        workflow.node_type = NodeType.TRANSFORM
+        workflow.mapping = {
+            "result": "{{ last.result }}",
+            "next_task": {"subject": "Push to {{ payload.ref }}"},
+        }
+        workflow.next_flow = "next_workflow_456"
+        mock_repository.mongo.workflow.get_with_task.return_value = Mock(spec=Workflow)
+        context = {"last_response": {"result": "summary"}}
+
+        # Act
+        with patch.object(WorkflowService, "run_workflow") as mock_run:
+            WorkflowService.run_rule(workflow, {"ref": "main"}, context)
+
+        # Assert
+        expected = {"result": "summary", "next_task": {"subject": "Push to main"}}
+        assert context["last_response"] == expected
+        assert context["prev_workflow"] == [{"workflow_id": "workflow_123", "result": expected}]
+        mock_run.assert_called_once()
+        log = mock_repository.mongo.logs.create.call_args[0][0]
+        assert log.type == "transform"
+
+    @patch('services.workflows.repository')
+    @patch('services.workflows.run_task')
+    def test_run_task_validates_parameters(self, mock_run_task, mock_repository):
+        """Test that LLM-filled and static parameters are validated before the task runs."""
+        # Arrange
+        workflow = Mock(spec=Workflow)
+        workflow.id = "task_workflow_123"
+        workflow.organizationId = 789
+        workflow.agent = None
+        workflow.task_template_id = "task_template_456"
+        workflow.parameters = {"to": "dev@example.com"}
+        workflow.next_flow = None
+        mock_repository.mongo.task.find_by_id.return_value = Task(
+            title="Email",
+            function_name="email",
+            parameters=[
+                Parameter(title="To", name="to", type="string", required=True),
+                Parameter(title="Retries", name="retries", type="integer"),
+            ],
+        )
+        mock_run_task.return_value = {"success": True}
+        context = {"last_response": {"next_task": {"retries": "3", "to": "llm@example.com"}}}
+
+        # Act
+        WorkflowService.run_task(workflow, {}, context=context)
+
+        # Assert
+        assert mock_run_task.call_args[1]["payload"] == {"to": "dev@example.com", "retries": 3}
+
+    @patch('services.workflows.repository')
+    @patch('services.workflows.run_task')
+    def test_run_task_parameters_from_payload(self, mock_run_task, mock_repository):
+        """Test that the incoming payload fills the parameters nothing else sets."""
+        # Arrange
+        workflow = Mock(spec=Workflow)
+        workflow.id = "task_workflow_123"
+        workflow.organizationId = 789
+        workflow.agent = None
+        workflow.task_template_id = "task_template_456"
+        workflow.parameters = {"subject": "Release"}
+        workflow.next_flow = None
+        mock_repository.mongo.task.find_by_id.return_value = Task(
+            title="Email",
+            function_name="email",
+            parameters=[
+                Parameter(title="To", name="to", type="string", required=True),
+                Parameter(title="Subject", name="subject", type="string"),
+            ],
+        )
+        mock_run_task.return_value = {"success": True}
+        payload = {"to": "dev@example.com", "subject": "Push", "ref": "refs/heads/main"}
+
+        # Act
+        WorkflowService.run_task(workflow, payload, context={})
+
+        # Assert
+        assert mock_run_task.call_args[1]["payload"] == {
+            "to": "dev@example.com",
+            "subject": "Release",
+        }
+
+    @patch('services.workflows.repository')
+    @patch('services.workflows.run_task')
+    def test_run_task_rejects_invalid_parameters(self, mock_run_task, mock_repository):
+        """Test that a task with invalid parameters is not run."""
+        # Arrange
+        workflow = Mock(spec=Workflow)
+        workflow.id = "task_workflow_123"
+        workflow.organizationId = 789
+        workflow.agent = None
+        workflow.task_template_id = "task_template_456"
+        workflow.parameters = {}
+        workflow.next_flow = "next_workflow_456"
+        mock_repository.mongo.task.find_by_id.return_value = Task(
+            title="Email",
+            function_name="email",
+            parameters=[Parameter(title="To", name="to", type="string", required=True)],
+        )
+
+        # Act
+        WorkflowService.run_task(workflow, {}, context={"last_response": {"result": "x"}})
+
+        # Assert
+        mock_run_task.assert_not_called()
+        log = mock_repository.mongo.logs.create.call_args[0][0]
+        assert json.loads(log.data)["error"] == "Invalid task parameters"
+        mock_repository.mongo.workflow.find_by_id.assert_not_called()
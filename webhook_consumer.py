@@ -0,0 +1,17 @@
+#!/usr/bin/env python
+"""
+Webhook consumer launcher script
+Run this script to consume the webhook ingest stream:
+    python webhook_consumer.py
+"""
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from services.webhook_service.consumer import WebhookConsumer  # noqa: E402
+
+if __name__ == "__main__":
+    print("Starting webhook consumer...")
+    WebhookConsumer().run_forever()